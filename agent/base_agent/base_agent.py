@@ -155,10 +155,15 @@ class DeepSeekChatOpenAI(ChatOpenAI):
         return result
 
 
-from prompts.agent_prompt import STOP_SIGNAL, get_agent_system_prompt
+from agent.base_agent.tool_middleware import ToolExecutionMiddleware, ToolMemoMiddleware
+from prompts.agent_prompt import (INTRADAY_FORMATS, STOP_SIGNAL, get_agent_system_prompt,
+                                  get_agent_system_prompt_prefix)
 from tools.general_tools import (extract_conversation, extract_tool_messages,
                                  get_config_value, write_config_value)
-from tools.price_tools import add_no_trade_record
+from tools.agent_memory import parse_memory_block, update_memory
+from tools.price_tools import add_no_trade_record, get_latest_position
+from tools.online_metrics import default_periods_per_year, get_live_metrics_file, load_live_metrics, save_live_metrics
+from tools.prompt_cache import PromptPrefixTracker, collect_token_usage
 
 # Load environment variables
 load_dotenv()
@@ -310,7 +315,16 @@ class BaseAgent:
         initial_cash: float = 10000.0,
         init_date: str = "2025-10-13",
         market: str = "us",
-        verbose: bool = False
+        verbose: bool = False,
+        http_async_client: Optional[Any] = None,
+        connection_pool: Optional[Any] = None,
+        tool_transport: str = "http",
+        tool_concurrency: int = 4,
+        tool_memo: bool = True,
+        screener_top_k: Optional[int] = None,
+        intraday_format: str = "ohlc",
+        agent_memory: bool = False,
+        live_metrics: bool = True
     ):
         """
         Initialize BaseAgent
@@ -330,6 +344,19 @@ class BaseAgent:
             init_date: Initialization date
             market: Market type, "us" for US stocks or "cn" for A-shares
             verbose: Enable verbose output for LangChain agent
+            http_async_client: Shared httpx.AsyncClient for model requests (used by the in-process runner)
+            connection_pool: Shared ConnectionPoolManager; provides the model HTTP client and
+                persistent MCP sessions when set
+            tool_transport: "http" to call the local tools through their MCP servers (default),
+                "inprocess" to load them as in-process LangChain tools
+            tool_concurrency: Maximum concurrent read-only tool calls per MCP server within one model turn
+            tool_memo: Memoize read-only tool results within a session, keyed by (tool, args, TODAY_DATE)
+            screener_top_k: Render only the top K screened symbols plus holdings in the prompt (None = all)
+            intraday_format: Encoding of the hourly intraday table ("ohlc", "csv", "delta" or "features")
+            agent_memory: Keep open-thesis notes per holding across sessions (position/memory.json),
+                shown in the prompt and updated from the <MEMORY> block of the final message
+            live_metrics: Update CR/Sortino/Sharpe/Vol/MDD incrementally after every session and
+                persist them in position/live_metrics.json (see tools/online_metrics.py)
         """
         self.signature = signature
         self.basemodel = basemodel
@@ -356,6 +383,20 @@ class BaseAgent:
         self.initial_cash = initial_cash
         self.init_date = init_date
         self.verbose = verbose
+        self.connection_pool = connection_pool
+        if http_async_client is None and connection_pool is not None:
+            http_async_client = connection_pool.llm_client
+        self.http_async_client = http_async_client
+        self.tool_transport = tool_transport
+        self.tool_concurrency = tool_concurrency
+        self.tool_memo = ToolMemoMiddleware() if tool_memo else None
+        self.screener_top_k = screener_top_k
+        if intraday_format not in INTRADAY_FORMATS:
+            raise ValueError(f"intraday_format must be one of {INTRADAY_FORMATS}, got '{intraday_format}'")
+        self.intraday_format = intraday_format
+        self.prompt_prefix_tracker = PromptPrefixTracker()
+        self.agent_memory = agent_memory
+        self.live_metrics = live_metrics
 
         # Set MCP configuration
         self.mcp_config = mcp_config or self._get_default_mcp_config()
@@ -376,6 +417,8 @@ class BaseAgent:
         # Initialize components
         self.client: Optional[MultiServerMCPClient] = None
         self.tools: Optional[List] = None
+        self.tool_servers: Dict[str, str] = {}
+        self.tool_middleware: Optional[ToolExecutionMiddleware] = None
         self.model: Optional[ChatOpenAI] = None
         self.agent: Optional[Any] = None
 
@@ -388,7 +431,16 @@ class BaseAgent:
         NOTE: Search/news tool intentionally excluded for Indian market backtest.
         The news tool fetches live 2026 articles which would introduce lookahead
         bias when backtesting historical 2025 data.
+
+        With tool_transport="inprocess" the same servers are loaded directly from
+        agent_tools/ (see agent_tools/inprocess_tools.py) instead of over HTTP.
         """
+        if self.tool_transport == "inprocess":
+            return {
+                "math": {"transport": "inprocess", "module": "agent_tools.tool_math"},
+                "stock_local": {"transport": "inprocess", "module": "agent_tools.tool_get_price_local"},
+                "trade": {"transport": "inprocess", "module": "agent_tools.tool_trade"},
+            }
         return {
             "math": {
                 "transport": "streamable_http",
@@ -404,6 +456,50 @@ class BaseAgent:
             },
         }
 
+    def _register_tools(self, server_name: str, tools: List[Any]) -> None:
+        """Add tools loaded from one MCP server and remember which server provides each"""
+        self.tools.extend(tools)
+        for tool in tools:
+            self.tool_servers[tool.name] = server_name
+
+    def _build_agent_middleware(self) -> List[Any]:
+        """Middleware passed to create_agent for every session (memo outermost, so hits skip execution)"""
+        return [m for m in (self.tool_memo, self.tool_middleware) if m is not None]
+
+    def _log_tool_stats(self, log_file: str, response: Any = None) -> Optional[Dict[str, int]]:
+        """Write timings and memo hit counts of the tool calls made since the last step, plus the
+        token usage (including provider-reported cached tokens) of the step's model calls, to the session log
+
+        Returns:
+            The step's token usage (see collect_token_usage) plus "tool_calls", None if neither
+            the provider nor the tool middleware reported anything
+        """
+        usage = collect_token_usage(response)
+        if usage:
+            self._log_message(log_file, [{"role": "token_usage", "content": usage}])
+        if self.tool_middleware is not None:
+            timings = self.tool_middleware.drain_timings()
+            if timings:
+                self._log_message(log_file, [{"role": "tool_timing", "content": timings}])
+                usage = {**(usage or {}), "tool_calls": len(timings["calls"])}
+        if self.tool_memo is not None:
+            memo_stats = self.tool_memo.drain_stats()
+            if memo_stats:
+                self._log_message(log_file, [{"role": "tool_memo", "content": memo_stats}])
+        return usage
+
+    def _update_agent_memory(self, log_file: str, today_date: str, final_response: str) -> None:
+        """Apply the <MEMORY> block of the session's final message and drop notes on closed positions"""
+        if not self.agent_memory:
+            return
+        updates = parse_memory_block(final_response)
+        if updates is None and final_response and "<MEMORY>" in final_response:
+            print("⚠️ Could not parse the <MEMORY> block of the final message; notes unchanged")
+        positions, _ = get_latest_position(today_date, self.signature)
+        result = update_memory(self.signature, updates, positions, today_date)
+        if result["updated"] or result["dropped"]:
+            self._log_message(log_file, [{"role": "agent_memory", "content": result}])
+
     async def initialize(self) -> None:
         """Initialize MCP client and AI model"""
         print(f"🚀 Initializing agent: {self.signature}")
@@ -427,11 +523,31 @@ class BaseAgent:
             print("⚠️  OpenAI base URL not set, using default")
 
         try:
-            # Create MCP client
-            self.client = MultiServerMCPClient(self.mcp_config)
+            local_servers = {k: v for k, v in self.mcp_config.items() if v.get("transport") == "inprocess"}
+            remote_servers = {k: v for k, v in self.mcp_config.items() if k not in local_servers}
+
+            self.tools = []
+            self.tool_servers = {}
+            if local_servers:
+                # Call local tool functions directly, no MCP HTTP round trip
+                from agent_tools.inprocess_tools import load_inprocess_tools
+
+                for name, server_config in local_servers.items():
+                    self._register_tools(name, await load_inprocess_tools({name: server_config}))
+            if remote_servers:
+                if self.connection_pool is not None:
+                    # Reuse the pool's persistent per-server MCP sessions
+                    for name, server_config in remote_servers.items():
+                        self._register_tools(name, await self.connection_pool.get_mcp_tools({name: server_config}))
+                else:
+                    # Create MCP client
+                    self.client = MultiServerMCPClient(remote_servers)
 
-            # Get tools
-            self.tools = await self.client.get_tools()
+                    # Get tools
+                    for name in remote_servers:
+                        self._register_tools(name, await self.client.get_tools(server_name=name))
+
+            self.tool_middleware = ToolExecutionMiddleware(self.tool_servers, self.tool_concurrency)
             if not self.tools:
                 print("⚠️  Warning: No MCP tools loaded. MCP services may not be running.")
                 print(f"   MCP configuration: {self.mcp_config}")
@@ -463,6 +579,7 @@ class BaseAgent:
                     api_key=self.openai_api_key,
                     max_retries=3,
                     timeout=300,
+                    http_async_client=self.http_async_client,
                 )
             else:
                 self.model = ChatOpenAI(
@@ -471,6 +588,7 @@ class BaseAgent:
                     api_key=self.openai_api_key,
                     max_retries=3,
                     timeout=300,
+                    http_async_client=self.http_async_client,
                 )
         except Exception as e:
             raise RuntimeError(f"❌ Failed to initialize AI model: {e}")
@@ -497,12 +615,19 @@ class BaseAgent:
         with open(log_file, "a", encoding="utf-8") as f:
             f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
 
-    async def _ainvoke_with_retry(self, message: List[Dict[str, str]]) -> Any:
-        """Agent invocation with retry — handles 429 rate-limits with longer backoff"""
+    async def _ainvoke_with_retry(self, message: List[Dict[str, str]], model_only: bool = False) -> Any:
+        """Agent invocation with retry — handles 429 rate-limits with longer backoff
+
+        Args:
+            message: Conversation messages
+            model_only: Call the chat model directly (one completion, no tools) instead of the agent
+        """
         for attempt in range(1, self.max_retries + 1):
             try:
                 if self.verbose:
                     print(f"🤖 Calling LLM API ({self.basemodel})...")
+                if model_only:
+                    return await self.model.ainvoke(message)
                 return await self.agent.ainvoke({"messages": message}, {"recursion_limit": 200})
             except Exception as e:
                 err_str = str(e)
@@ -531,11 +656,23 @@ class BaseAgent:
         log_file = self._setup_logging(today_date)
         write_config_value("LOG_FILE", log_file)
         # Update system prompt
+        prompt_stats: Dict[str, Any] = {}
+        system_prompt = get_agent_system_prompt(
+            today_date, self.signature, self.market, self.stock_symbols,
+            screener_top_k=self.screener_top_k, prompt_stats=prompt_stats, agent_memory=self.agent_memory,
+        )
+        prompt_stats["prefix"] = self.prompt_prefix_tracker.observe(
+            system_prompt,
+            get_agent_system_prompt_prefix(self.market, hourly=" " in today_date, agent_memory=self.agent_memory),
+        )
         self.agent = create_agent(
             self.model,
             tools=self.tools,
-            system_prompt=get_agent_system_prompt(today_date, self.signature, self.market, self.stock_symbols),
+            system_prompt=system_prompt,
+            middleware=self._build_agent_middleware(),
         )
+        if prompt_stats:
+            self._log_message(log_file, [{"role": "prompt_stats", "content": prompt_stats}])
         # If verbose, try to attach console callbacks to the agent itself
         if self.verbose and _ConsoleHandler is not None:
             try:
@@ -558,6 +695,7 @@ class BaseAgent:
         self._log_message(log_file, user_query)
 
         # Trading loop
+        agent_response = ""
         current_step = 0
         while current_step < self.max_steps:
             current_step += 1
@@ -566,6 +704,7 @@ class BaseAgent:
             try:
                 # Call agent
                 response = await self._ainvoke_with_retry(message)
+                self._log_tool_stats(log_file, response)
 
                 # Extract agent response
                 agent_response = extract_conversation(response, "final")
@@ -599,6 +738,8 @@ class BaseAgent:
                 print(f"Error details: {e}")
                 raise
 
+        self._update_agent_memory(log_file, today_date, agent_response)
+
         # Handle trading results
         await self._handle_trading_result(today_date)
 
@@ -616,6 +757,44 @@ class BaseAgent:
                 print(f"❌ NameError: {e}")
                 raise
             write_config_value("IF_TRADE", False)
+        self._update_live_metrics(today_date)
+
+    def _update_live_metrics(self, today_date: str) -> None:
+        """Add this session's closing NAV to the signature's live metrics (one point per session)"""
+        if not self.live_metrics:
+            return
+        from tools.market_store import parse_price
+        from tools.price_tools import get_market_store
+
+        try:
+            metrics_file = get_live_metrics_file(self.data_path)
+            accumulator = load_live_metrics(metrics_file)
+            if accumulator.points == 0 and os.path.exists(self.position_file):
+                # Seed with the registration record (initial cash) so returns start from it
+                with open(self.position_file, "r") as f:
+                    first = json.loads(f.readline())
+                accumulator.update(first["date"], first["positions"].get("CASH", 0.0))
+
+            positions, _ = get_latest_position(today_date, self.signature)
+            store = get_market_store(self.market)
+            value = positions.get("CASH", 0.0)
+            for symbol, amount in positions.items():
+                if symbol == "CASH" or not amount:
+                    continue
+                bar = store.bar(symbol, today_date, self.market)
+                price = parse_price(bar.get("4. sell price")) if bar else None
+                if price is None:
+                    price = accumulator.last_prices.get(symbol)
+                else:
+                    accumulator.last_prices[symbol] = price
+                if price is not None:
+                    value += amount * price
+
+            if accumulator.update(today_date, value):
+                save_live_metrics(metrics_file, accumulator, default_periods_per_year(today_date, self.market))
+        except Exception as e:
+            # Metrics are informational; never fail a trading session over them
+            print(f"⚠️ Could not update live metrics: {e}")
 
     def register_agent(self) -> None:
         """Register new agent, create initial positions"""
@@ -6,6 +6,7 @@ Extends BaseAgent with hour-level specific functionality
 import os
 import json
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from pathlib import Path
@@ -23,12 +24,14 @@ sys.path.insert(0, project_root)
 
 from tools.general_tools import extract_conversation, extract_tool_messages, get_config_value, write_config_value
 from tools.price_tools import add_no_trade_record
-from prompts.agent_prompt import get_agent_system_prompt, STOP_SIGNAL
+from prompts.agent_prompt import (IntradayContext, add_holdings_to_screen, get_agent_system_prompt,
+                                  get_agent_system_prompt_prefix, screen_universe, STOP_SIGNAL)
 
 # Load environment variables
 load_dotenv()
 
 from agent.base_agent.base_agent import BaseAgent
+from agent.base_agent.slot_gate import SlotGate
 
 
 class BaseAgent_Hour(BaseAgent):
@@ -39,7 +42,64 @@ class BaseAgent_Hour(BaseAgent):
     to support hour-level trading logic:
     - get_trading_dates: Reads from merged.jsonl for hour-level timestamps
     - run_trading_session: Enhanced error handling for tool messages
+    - run_date_range: Fills standing orders, skips slots the slot gate finds immaterial and
+      prefetches the next slot's market snapshot while the current session runs
     """
+
+    SESSION_MODES = ("per_slot", "continuous")
+    DECISION_MODES = ("tool_loop", "single_shot")
+
+    def __init__(
+        self,
+        *args,
+        slot_gate: Optional[Dict[str, Any]] = None,
+        session_mode: str = "per_slot",
+        session_max_slots: int = 4,
+        decision_mode: str = "tool_loop",
+        prefetch: bool = True,
+        **kwargs
+    ):
+        """
+        Args:
+            slot_gate: Slot gating config (see agent/base_agent/slot_gate.py DEFAULT_SLOT_GATE);
+                None or {"enabled": false} runs the model on every slot
+            session_mode: "per_slot" builds a fresh agent and system prompt every slot;
+                "continuous" keeps one conversation per trading day and sends each new slot
+                as a short update message (new candles, standing-order fills, position changes)
+            session_max_slots: In continuous mode, slots one conversation may span before it is
+                rebuilt with a fresh system prompt (bounds the history the model re-reads)
+            decision_mode: "tool_loop" lets the model call tools over several steps;
+                "single_shot" sends one precomputed context, asks for one JSON order list and
+                executes it in batch (see agent/base_agent/single_shot.py); session_mode is
+                ignored in this mode
+            prefetch: Build the next slot's market-only context (intraday candles, screener
+                ranking, open prices) in a worker thread while the current slot's session runs
+            *args, **kwargs: Passed to BaseAgent
+        """
+        super().__init__(*args, **kwargs)
+        if session_mode not in self.SESSION_MODES:
+            raise ValueError(f"session_mode must be one of {self.SESSION_MODES}, got '{session_mode}'")
+        if decision_mode not in self.DECISION_MODES:
+            raise ValueError(f"decision_mode must be one of {self.DECISION_MODES}, got '{decision_mode}'")
+        self.slot_gate = SlotGate(slot_gate)
+        self.session_mode = session_mode
+        self.session_max_slots = max(1, session_max_slots)
+        self.decision_mode = decision_mode
+        self.prefetch = prefetch
+        # Intraday candles for the current day, advanced slot by slot
+        self._intraday_context: Optional[IntradayContext] = None
+        # Market-only context of the current slot (see _market_snapshot)
+        self._snapshot: Optional[Dict[str, Any]] = None
+        # Continuous-session state: conversation so far and what it has already seen
+        self._session_day: Optional[str] = None
+        self._session_slots = 0
+        self._session_messages: List[Any] = []
+        self._session_context_chars = 0
+        self._session_candles_sent = 0
+        self._session_positions: Dict[str, float] = {}
+        self._pending_fills: List[Dict[str, Any]] = []
+        # Single-shot state: orders rejected last slot, reported in the next context
+        self._last_rejections: List[Dict[str, Any]] = []
     
     async def run_trading_session(self, today_date: str) -> None:
         """
@@ -48,42 +108,45 @@ class BaseAgent_Hour(BaseAgent):
         Args:
             today_date: Trading date
         """
+        if self.decision_mode == "single_shot":
+            return await self._run_single_shot_session(today_date)
+
         print(f"📈 Starting trading session: {today_date}")
         
         # Set up logging
         log_file = self._setup_logging(today_date)
         write_config_value("LOG_FILE", log_file)
         
-        # Update system prompt
-        from langchain.agents import create_agent
-        self.agent = create_agent(
-            self.model,
-            tools=self.tools,
-            system_prompt=get_agent_system_prompt(today_date, self.signature, self.market, self.stock_symbols),
-        )
-        # If verbose, try to attach console callbacks to the agent itself
-        if getattr(self, "verbose", False):
-            try:
-                from agent.base_agent.base_agent import _ConsoleHandler  # reuse resolved handler
-                if _ConsoleHandler is not None:
-                    handler = _ConsoleHandler()
-                    self.agent = self.agent.with_config({
-                        "callbacks": [handler],
-                        "tags": [self.signature, today_date],
-                        "run_name": f"{self.signature}-session"
-                    })
-                else:
-                    print("⚠️ Verbose requested but no StdOut/Console callback handler found in current LangChain version.")
-            except Exception:
-                pass
+        session_started = time.perf_counter()
+        prompt_stats: Dict[str, Any] = {}
+        build_started = time.perf_counter()
+        prompt_stats["snapshot"] = self._snapshot_stats(self._slot_snapshot(today_date))
+
+        if self._continue_session(today_date):
+            # Continuous mode: same agent and system prompt, only the changes since the last slot
+            update = self._build_slot_update(today_date)
+            prompt_stats.update(session="continued", update_chars=len(update))
+            prompt_stats["build_ms"] = round((time.perf_counter() - build_started) * 1000, 3)
+            self._log_message(log_file, [{"role": "prompt_stats", "content": prompt_stats}])
+            context_chars = self._session_context_chars
+            # Everything sent in earlier slots is an unchanged prefix the provider can cache
+            cacheable_chars = context_chars + sum(len(str(m.content)) for m in self._session_messages)
+            message = list(self._session_messages) + [HumanMessage(content=update)]
+            query_start = len(self._session_messages)
+        else:
+            system_prompt = self._start_session(today_date, log_file, prompt_stats, build_started)
+            context_chars = len(system_prompt)
+            cacheable_chars = prompt_stats["prefix"]["prefix_chars"]
+            # Initial user query
+            message = [HumanMessage(content=f"Please analyze and update today's ({today_date}) positions.")]
+            query_start = 0
 
-        # Initial user query
-        message = [HumanMessage(content=f"Please analyze and update today's ({today_date}) positions.")]
-        
         # Log initial message
-        self._log_message(log_file, [{"role": "user", "content": m.content} for m in message])
-        
+        self._log_message(log_file, [{"role": "user", "content": m.content} for m in message[query_start:]])
+
         # Trading loop
+        usage_total: Dict[str, int] = {}
+        agent_response = ""
         current_step = 0
         while current_step < self.max_steps:
             current_step += 1
@@ -92,6 +155,9 @@ class BaseAgent_Hour(BaseAgent):
             try:
                 # Call agent
                 response = await self._ainvoke_with_retry(message)
+                usage = self._log_tool_stats(log_file, response)
+                for key, value in (usage or {}).items():
+                    usage_total[key] = usage_total.get(key, 0) + value
                 
                 # Extract agent response
                 agent_response = extract_conversation(response, "final")
@@ -101,6 +167,7 @@ class BaseAgent_Hour(BaseAgent):
                     print("✅ Received stop signal, trading session ended")
                     print(agent_response)
                     self._log_message(log_file, [{"role": "assistant", "content": agent_response}])
+                    message.append(AIMessage(content=agent_response))
                     break
                 
                 # Extract tool messages with None check
@@ -123,10 +190,317 @@ class BaseAgent_Hour(BaseAgent):
                 print(f"❌ Trading session error: {str(e)}")
                 print(f"Error details: {e}")
                 raise
-        
+
+        self._update_agent_memory(log_file, today_date, agent_response)
+        if self.session_mode == "continuous":
+            self._end_slot(today_date, message, context_chars)
+        total_chars = context_chars + sum(len(str(m.content)) for m in message)
+        self._record_session_stats(today_date, {
+            "session": prompt_stats.get("session", "new"),
+            "steps": current_step,
+            "elapsed_s": round(time.perf_counter() - session_started, 3),
+            "context_chars": total_chars,
+            "new_context_chars": total_chars - cacheable_chars,
+            **usage_total,
+        })
+
         # Handle trading results
         await self._handle_trading_result(today_date)
-    
+
+    async def _run_single_shot_session(self, today_date: str) -> None:
+        """
+        Run one slot as a single model call: precomputed context in, JSON order list out
+
+        The orders are validated against the feasibility limits shown to the model and
+        executed in batch through the trade tool functions, so fees, guardrails and the
+        ledger format match the tool loop. Rejections are shown in the next slot's context.
+        """
+        from langchain_core.messages import SystemMessage
+        from agent_tools.tool_trade import buy, cancel, place_stop, place_target, sell
+        from agent.base_agent.single_shot import (build_decision_context, execute_orders, feasibility_limits,
+                                                  parse_decision, validate_orders)
+        from tools.agent_memory import update_memory
+        from tools.order_book import format_orders, load_orders
+        from tools.price_tools import get_latest_position, get_yesterday_open_and_close_price
+
+        print(f"📈 Starting single-shot trading session: {today_date}")
+        log_file = self._setup_logging(today_date)
+        write_config_value("LOG_FILE", log_file)
+
+        session_started = time.perf_counter()
+        prompt_stats: Dict[str, Any] = {"session": "single_shot"}
+        snapshot = self._slot_snapshot(today_date)
+        prompt_stats["snapshot"] = self._snapshot_stats(snapshot)
+        system_prompt = get_agent_system_prompt(
+            today_date, self.signature, self.market, self.stock_symbols,
+            screener_top_k=self.screener_top_k, prompt_stats=prompt_stats,
+            intraday_context=self._intraday_context, intraday_format=self.intraday_format,
+            agent_memory=self.agent_memory, screen=snapshot["screen"], decision_mode="single_shot",
+        )
+        prompt_stats["prefix"] = self.prompt_prefix_tracker.observe(
+            system_prompt,
+            get_agent_system_prompt_prefix(self.market, hourly=" " in today_date, agent_memory=self.agent_memory,
+                                           decision_mode="single_shot"),
+        )
+
+        # Precomputed context: holdings, derived features and per-symbol limits
+        positions, _ = get_latest_position(today_date, self.signature)
+        holdings = [sym for sym, qty in positions.items() if sym != "CASH" and qty > 0]
+        symbols = self._screened_symbols(snapshot, holdings)
+        prices = {sym: snapshot["open_prices"].get(f"{sym}_price") for sym in symbols}
+        if self._intraday_context is not None:
+            closes = self._intraday_context.yesterday_close
+        else:
+            _, closes = get_yesterday_open_and_close_price(today_date, symbols, market=self.market)
+        yesterday_close = {sym: closes.get(f"{sym}_price") for sym in symbols}
+        limits = feasibility_limits(symbols, positions, prices, self.market)
+        orders_book = load_orders(self.signature)
+        context = build_decision_context(
+            today_date, positions, prices, yesterday_close, limits,
+            self._intraday_context.render(symbols, fmt="features") if self._intraday_context else None,
+            format_orders(orders_book), self._last_rejections,
+        )
+        prompt_stats["context_chars"] = len(context)
+        self._log_message(log_file, [{"role": "prompt_stats", "content": prompt_stats}])
+        self._log_message(log_file, [{"role": "user", "content": context}])
+
+        # One model call, no tools
+        response = await self._ainvoke_with_retry(
+            [SystemMessage(content=system_prompt), HumanMessage(content=context)], model_only=True
+        )
+        usage = self._log_tool_stats(log_file, {"messages": [response]}) or {}
+        reply = response.content if isinstance(response.content, str) else str(response.content)
+        self._log_message(log_file, [{"role": "assistant", "content": reply}])
+
+        decision, error = parse_decision(reply)
+        if decision is None:
+            print(f"⚠️ Single-shot reply not executed: {error}")
+            accepted, rejected, executed = [], [{"order": None, "reason": f"reply not executed: {error}"}], []
+        else:
+            accepted, rejected = validate_orders(
+                decision["orders"], positions, limits, [o["id"] for o in orders_book], self.market
+            )
+            executed, failed = execute_orders(accepted, {
+                "buy": buy.fn, "sell": sell.fn, "cancel": cancel.fn,
+                "place_stop": place_stop.fn, "place_target": place_target.fn,
+            })
+            rejected.extend(failed)
+        self._last_rejections = rejected
+        self._log_message(log_file, [{"role": "single_shot", "content": {
+            "orders": accepted, "executed": executed, "rejected": rejected,
+        }}])
+        print(f"🧾 Single-shot orders: {len(executed)} executed, {len(rejected)} rejected")
+
+        if self.agent_memory:
+            positions_after, _ = get_latest_position(today_date, self.signature)
+            memory = (decision or {}).get("memory")
+            result = update_memory(
+                self.signature, memory if isinstance(memory, dict) else None, positions_after, today_date
+            )
+            if result["updated"] or result["dropped"]:
+                self._log_message(log_file, [{"role": "agent_memory", "content": result}])
+
+        total_chars = len(system_prompt) + len(context) + len(reply)
+        self._record_session_stats(today_date, {
+            "session": "single_shot",
+            "steps": 1,
+            "elapsed_s": round(time.perf_counter() - session_started, 3),
+            "context_chars": total_chars,
+            "new_context_chars": total_chars - prompt_stats["prefix"]["prefix_chars"],
+            "model_calls": 1,
+            **usage,
+            "tool_calls": 0,
+        })
+        await self._handle_trading_result(today_date)
+
+    def _continue_session(self, today_date: str) -> bool:
+        """True if this slot extends the current conversation instead of starting a new one"""
+        return (
+            self.session_mode == "continuous"
+            and self.agent is not None
+            and self._session_day == today_date.split(" ")[0]
+            and 0 < self._session_slots < self.session_max_slots
+        )
+
+    def _start_session(
+        self, today_date: str, log_file: str, prompt_stats: Dict[str, Any], build_started: float
+    ) -> str:
+        """Create the agent with a full system prompt for today_date and return that prompt"""
+        system_prompt = get_agent_system_prompt(
+            today_date, self.signature, self.market, self.stock_symbols,
+            screener_top_k=self.screener_top_k, prompt_stats=prompt_stats,
+            intraday_context=self._intraday_context, intraday_format=self.intraday_format,
+            agent_memory=self.agent_memory, screen=self._snapshot["screen"] if self._snapshot else None,
+        )
+        prompt_stats["session"] = "new"
+        prompt_stats["build_ms"] = round((time.perf_counter() - build_started) * 1000, 3)
+        prompt_stats["prefix"] = self.prompt_prefix_tracker.observe(
+            system_prompt,
+            get_agent_system_prompt_prefix(self.market, hourly=" " in today_date, agent_memory=self.agent_memory),
+        )
+        self.agent = create_agent(
+            self.model,
+            tools=self.tools,
+            system_prompt=system_prompt,
+            middleware=self._build_agent_middleware(),
+        )
+        self._log_message(log_file, [{"role": "prompt_stats", "content": prompt_stats}])
+
+        # Fresh conversation: nothing sent yet beyond the system prompt
+        self._session_day = today_date.split(" ")[0]
+        self._session_slots = 0
+        self._session_messages = []
+        self._session_context_chars = len(system_prompt)
+        self._pending_fills = []
+
+        # If verbose, try to attach console callbacks to the agent itself
+        if getattr(self, "verbose", False):
+            try:
+                from agent.base_agent.base_agent import _ConsoleHandler  # reuse resolved handler
+                if _ConsoleHandler is not None:
+                    handler = _ConsoleHandler()
+                    self.agent = self.agent.with_config({
+                        "callbacks": [handler],
+                        "tags": [self.signature, today_date],
+                        "run_name": f"{self.signature}-session"
+                    })
+                else:
+                    print("⚠️ Verbose requested but no StdOut/Console callback handler found in current LangChain version.")
+            except Exception:
+                pass
+        return system_prompt
+
+    def _build_slot_update(self, today_date: str) -> str:
+        """
+        Update message for a continued session: candles completed since the last slot,
+        standing-order fills, position changes, current positions and open orders
+        """
+        from tools.order_book import format_orders, load_orders
+        from tools.price_tools import get_latest_position
+
+        # Latest record, so standing-order fills at this bar are included
+        positions, _ = get_latest_position(today_date, self.signature)
+        held = {k: v for k, v in positions.items() if v != 0 or k == "CASH"}
+        lines = [f"⏰ New hourly slot: {today_date}. Current hour ({today_date.split(' ')[1][:5]}) shows open price only."]
+
+        snapshot = self._slot_snapshot(today_date)
+        symbols = self._screened_symbols(snapshot, [k for k in held if k != "CASH"])
+        if self._intraday_context is not None:
+            lines.append("📊 New candles since the last update:")
+            lines.append(self._intraday_context.render_update(
+                symbols, since=self._session_candles_sent, fmt=self.intraday_format
+            ))
+        else:
+            current_prices = {
+                f"{sym}_price": snapshot["open_prices"][f"{sym}_price"]
+                for sym in symbols if snapshot["open_prices"].get(f"{sym}_price") is not None
+            }
+            lines.append(f"Current Price: {current_prices}")
+
+        if self._pending_fills:
+            lines.append("📌 Standing orders triggered since the last update:")
+            for fill in self._pending_fills:
+                order = fill["order"]
+                line = (f"  #{order['id']} {order['type'].upper()} {order['symbol']}: {fill['status']} "
+                        f"{fill['amount']} @ {fill['fill_price']:.2f}")
+                if fill["status"] == "rejected":
+                    line += f" — {fill['reason']} (order still open)"
+                lines.append(line)
+
+        changes = {
+            k: f"{self._session_positions.get(k, 0)} → {v}"
+            for k, v in positions.items()
+            if k != "CASH" and v != self._session_positions.get(k, 0)
+        }
+        if changes:
+            lines.append(f"Position changes: {changes}")
+        lines.append(f"Positions: {held}")
+        lines.append(f"Standing Orders: {format_orders(load_orders(self.signature))}")
+        lines.append(f"Please analyze and update positions for {today_date}.")
+        return "\n".join(lines)
+
+    def _market_snapshot(
+        self, today_date: str, context: Optional[IntradayContext], prefetched: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Market-only parts of a slot's context
+
+        None of it depends on positions, so it can be built for slot t+1 while slot t's
+        session is still running; holdings are merged in afterwards (add_holdings_to_screen).
+
+        Args:
+            context: IntradayContext to advance to today_date (modified in place), None to start a new one
+            prefetched: Whether this runs ahead of time (recorded in prompt_stats)
+
+        Returns:
+            {"date", "intraday_context", "screen" (ranking without holdings, None if the universe is
+             not screened), "open_prices", "prefetched", "build_ms"}
+        """
+        from tools.price_tools import get_open_prices
+
+        started = time.perf_counter()
+        snapshot: Dict[str, Any] = {"date": today_date, "intraday_context": context, "screen": None}
+        if self.market == "in" and " " in today_date:
+            snapshot["intraday_context"] = IntradayContext.for_slot(
+                context, today_date, self.stock_symbols, market=self.market
+            )
+        if self.screener_top_k and len(self.stock_symbols) > self.screener_top_k:
+            snapshot["screen"] = screen_universe(
+                today_date, self.stock_symbols, [], self.screener_top_k, market=self.market
+            )
+        snapshot["open_prices"] = get_open_prices(today_date, self.stock_symbols, market=self.market)
+        snapshot["prefetched"] = prefetched
+        snapshot["build_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return snapshot
+
+    def _slot_snapshot(self, today_date: str) -> Dict[str, Any]:
+        """Market snapshot for today_date: the prefetched one when available, else built now"""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot["date"] != today_date:
+            snapshot = self._market_snapshot(today_date, self._intraday_context)
+            self._snapshot = snapshot
+        self._intraday_context = snapshot["intraday_context"]
+        return snapshot
+
+    def _prefetch_snapshot(self, next_date: str) -> "asyncio.Task[Dict[str, Any]]":
+        """Start building next_date's market snapshot in a worker thread"""
+        context = self._intraday_context
+        if context is not None and context.date_str == next_date.split(" ")[0]:
+            # Advance a copy so the running session keeps its own candles
+            context = context.clone()
+        else:
+            context = None
+        return asyncio.create_task(asyncio.to_thread(self._market_snapshot, next_date, context, True))
+
+    @staticmethod
+    def _snapshot_stats(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: snapshot[key] for key in ("prefetched", "build_ms", "wait_ms") if key in snapshot}
+
+    def _screened_symbols(self, snapshot: Dict[str, Any], holdings: List[str]) -> List[str]:
+        """Symbols rendered this slot: the snapshot's screener ranking plus current holdings"""
+        if snapshot["screen"] is None:
+            return self.stock_symbols
+        return add_holdings_to_screen(snapshot["screen"], self.stock_symbols, holdings)["symbols"]
+
+    def _end_slot(self, today_date: str, message: List[Any], context_chars: int) -> None:
+        """Keep this slot's conversation for the next slot of the same continuous session"""
+        from tools.price_tools import get_latest_position
+
+        self._session_slots += 1
+        self._session_messages = message
+        self._session_context_chars = context_chars
+        self._session_candles_sent = self._intraday_context.completed_count if self._intraday_context else 0
+        self._session_positions, _ = get_latest_position(today_date, self.signature)
+        self._pending_fills = []
+
+    def _record_session_stats(self, today_date: str, stats: Dict[str, Any]) -> None:
+        """Append one slot's session cost (steps, latency, tokens) to log/session_stats.jsonl"""
+        stats_file = os.path.join(self.data_path, "log", "session_stats.jsonl")
+        os.makedirs(os.path.dirname(stats_file), exist_ok=True)
+        record = {"date": today_date, "session_mode": self.session_mode, "decision_mode": self.decision_mode, **stats}
+        with open(stats_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
     def get_trading_dates(self, init_date: str, end_date: str) -> List[str]:
         """
         Get trading date list from merged.jsonl for hour-level data
@@ -151,29 +525,14 @@ class BaseAgent_Hour(BaseAgent):
             raise ValueError("Only support hour-level trading. Please use YYYY-MM-DD HH:MM:SS format.")
         
         # Get merged.jsonl path
-        from tools.price_tools import get_merged_file_path
+        from tools.price_tools import get_merged_file_path, get_market_store
         merged_file = get_merged_file_path(self.market)
         
         if not merged_file.exists():
             return []
         
-        # Collect all timestamps from merged.jsonl
-        all_timestamps = set()
-        
-        with merged_file.open("r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                try:
-                    doc = json.loads(line)
-                    # 查找所有以 "Time Series" 开头的键
-                    for key, value in doc.items():
-                        if key.startswith("Time Series"):
-                            if isinstance(value, dict):
-                                all_timestamps.update(value.keys())
-                            break
-                except Exception:
-                    continue
+        # Collect all timestamps from the shared market data store
+        all_timestamps = set(get_market_store(self.market).timestamps)
         
         if not all_timestamps:
             return []
@@ -272,8 +631,9 @@ class BaseAgent_Hour(BaseAgent):
         
         print(f"📊 Trading days to process: {trading_dates}")
         
-        # Process each trading day
-        for date in trading_dates:
+        # Process each trading day; the next slot's market snapshot is built while this one runs
+        pending: Optional[asyncio.Task] = None
+        for index, date in enumerate(trading_dates):
             print(f"\n" + "═"*70)
             print(f"🚀 [ BACKTEST PROGRESS ] » {date} | Agent: {self.signature}")
             print(f"═"*70 + "\n")
@@ -285,14 +645,142 @@ class BaseAgent_Hour(BaseAgent):
             write_config_value("SIGNATURE", self.signature)
             
             try:
+                if pending is not None:
+                    await self._collect_prefetch(pending)
+                    pending = None
+                self._slot_snapshot(date)
+                if self.prefetch and index + 1 < len(trading_dates):
+                    pending = self._prefetch_snapshot(trading_dates[index + 1])
+
+                # Fill breached stop/target orders before the model sees this bar
+                fills = self.execute_standing_orders(date)
+                self._pending_fills.extend(fills)
+                if not await self._gate_slot(date, len(fills)):
+                    continue
                 await self.run_with_retry(date)
             except Exception as e:
                 print(f"❌ Error processing {self.signature} - Date: {date}")
                 print(e)
                 raise
         
+        stats = self.slot_gate.stats
+        print(f"📊 Slots run: {stats['slots_run']} | skipped by slot gate: {stats['slots_skipped']}")
         print(f"✅ {self.signature} processing completed")
 
+    async def _collect_prefetch(self, pending: "asyncio.Task[Dict[str, Any]]") -> None:
+        """Wait for a prefetched snapshot; on failure the slot builds its snapshot itself"""
+        waited = time.perf_counter()
+        try:
+            snapshot = await pending
+        except Exception as e:
+            print(f"⚠️ Prefetching the market snapshot failed, building it in the session instead: {e}")
+            return
+        snapshot["wait_ms"] = round((time.perf_counter() - waited) * 1000, 3)
+        self._snapshot = snapshot
+
+    async def _gate_slot(self, today_date: str, filled_orders: int = 0) -> bool:
+        """
+        Decide whether this slot needs a model session
+
+        Skipped slots are recorded through the ledger as no_trade (unless a standing
+        order already traded) and logged with the market-state signature.
+
+        Returns:
+            True if the model should run for this slot
+        """
+        from tools.order_book import load_orders
+        from tools.price_tools import get_latest_position
+
+        open_prices = self._slot_snapshot(today_date)["open_prices"]
+        prices = {sym: open_prices.get(f"{sym}_price") for sym in self.stock_symbols}
+        positions, _ = get_latest_position(today_date, self.signature)
+        orders = load_orders(self.signature)
+
+        run, reasons, state = self.slot_gate.evaluate(today_date, prices, positions, orders, filled_orders)
+        if run:
+            self.slot_gate.record_decision(today_date, prices)
+            return True
+
+        print(f"⏭️  Slot gate: nothing material at {today_date}, skipping model session")
+        log_file = self._setup_logging(today_date)
+        self._log_message(log_file, [{"role": "slot_gate", "content": {"skipped": True, "state": state}}])
+        await self._handle_trading_result(today_date)
+        return False
+
+    def execute_standing_orders(self, today_date: str) -> List[Dict[str, Any]]:
+        """
+        Fill standing stop/target orders breached since the previous bar, without the LLM
+
+        Each order is checked against the previous bar's low/high and this bar's open,
+        and triggered orders are sold at this bar's open through the regular sell tool,
+        so fees, guardrails and the ledger format are identical to a model-issued sell.
+
+        Args:
+            today_date: Current bar timestamp (YYYY-MM-DD HH:MM:SS)
+
+        A rejected fill (below the minimum trade value, no open price, ...) leaves the
+        order in the book, so the protection stays in place and is retried next bar.
+
+        Returns:
+            List of fill records (order, fill price, amount, sell result, status, and the
+            rejection reason when the sell was rejected)
+        """
+        from agent_tools.tool_trade import sell
+        from tools.order_book import evaluate_orders, load_orders, remove_orders
+        from tools.price_tools import get_latest_position, get_market_store
+        from tools.market_store import parse_price
+
+        orders = load_orders(self.signature)
+        if not orders:
+            return []
+
+        store = get_market_store(self.market)
+        today_dt = datetime.strptime(today_date, "%Y-%m-%d %H:%M:%S")
+        prev_dt = store.previous_datetime(today_dt)
+        prev_ts = prev_dt.strftime("%Y-%m-%d %H:%M:%S") if prev_dt else None
+
+        prev_low, prev_high, open_prices = {}, {}, {}
+        for symbol in {o["symbol"] for o in orders}:
+            bar = store.bar(symbol, today_date, self.market) or {}
+            prev_bar = (store.bar(symbol, prev_ts, self.market) if prev_ts else None) or {}
+            open_prices[symbol] = parse_price(bar.get("1. buy price"))
+            prev_low[symbol] = parse_price(prev_bar.get("3. low"))
+            prev_high[symbol] = parse_price(prev_bar.get("2. high"))
+
+        fills = []
+        done_ids = []
+        for order, fill_price in evaluate_orders(orders, prev_low, prev_high, open_prices):
+            symbol = order["symbol"]
+            positions, _ = get_latest_position(today_date, self.signature)
+            held = positions.get(symbol, 0)
+            if held <= 0:
+                # Position already closed (manual sell or an earlier order this bar)
+                done_ids.append(order["id"])
+                continue
+            amount = min(order["amount"] or held, held)
+            result = sell.fn(symbol, amount)
+            fill = {"order": order, "fill_price": fill_price, "amount": amount, "result": result}
+            if isinstance(result, dict) and "error" in result:
+                fill.update(status="rejected", reason=result["error"])
+            else:
+                fill["status"] = "filled"
+                done_ids.append(order["id"])
+            fills.append(fill)
+            status = "❌ rejected (order kept)" if fill["status"] == "rejected" else "✅ filled"
+            print(f"📌 Standing {order['type']} #{order['id']} {symbol} @ {order['trigger_price']:.2f}: "
+                  f"{status} {amount} @ {fill_price:.2f}")
+
+        # Drop orders on symbols that are no longer held
+        positions, _ = get_latest_position(today_date, self.signature)
+        done_ids.extend(o["id"] for o in orders if positions.get(o["symbol"], 0) <= 0 and o["id"] not in done_ids)
+        if done_ids:
+            remove_orders(self.signature, done_ids)
+
+        if fills:
+            log_file = self._setup_logging(today_date)
+            self._log_message(log_file, [{"role": "standing_order", "content": fills}])
+        return fills
+
     def __str__(self) -> str:
         return f"BaseAgent_Hour(signature='{self.signature}', basemodel='{self.basemodel}', stocks={len(self.stock_symbols)})"
     
@@ -0,0 +1,277 @@
+"""
+Single-shot decision mode for hourly sessions.
+
+Instead of a multi-turn tool loop, the model gets one precomputed context
+(holdings with value and weight, derived intraday features, per-symbol
+feasibility limits, last slot's rejections) and answers with one JSON order
+list. The orders are validated against the same limits, executed in batch
+through the trade tool functions (sells first, so buys can use the freed
+cash), and anything rejected is reported back in the next slot's context.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ACTIONS = ("sell", "buy", "cancel", "place_stop", "place_target")
+
+SINGLE_SHOT_INSTRUCTIONS = """
+SINGLE-SHOT MODE: You cannot call tools in this mode. Everything you need is below, and your reply is executed once as a batch.
+Reply with ONE JSON object and nothing else:
+{"orders": [{"action": "buy" | "sell" | "place_stop" | "place_target" | "cancel", "symbol": "TCS", "amount": 10, "trigger_price": 0.0, "order_id": 0}], "reasoning": "one or two sentences", "memory": {}}
+- buy/sell: symbol + amount (shares). Sells run before buys, so buys may use the cash sells free up.
+- place_stop/place_target: symbol + trigger_price (+ amount, 0 = whole position); only on shares held after the batch.
+- cancel: order_id of a standing order.
+- Stay within each symbol's max_buy / max_sell shares below; orders outside them are rejected.
+- "orders": [] means no trade this slot. "memory" is optional: {"SYMBOL": {"thesis", "entry", "stop", "target"} or null}.
+"""
+
+
+def _pct(value: Optional[float], base: Optional[float]) -> Optional[float]:
+    if value is None or not base:
+        return None
+    return round((value / base - 1.0) * 100, 2)
+
+
+def buy_fee_rate(market: str) -> float:
+    """Fractional fees added to a buy's turnover (0 outside the Indian market)."""
+    if market != "in":
+        return 0.0
+    from tools.fee_schedule import BUY_FEE_RATE
+    return BUY_FEE_RATE
+
+
+def feasibility_limits(
+    symbols: List[str],
+    positions: Dict[str, float],
+    prices: Dict[str, Optional[float]],
+    market: str,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-symbol trade limits mirroring the buy/sell guardrails
+
+    Returns:
+        {symbol: {"price", "held", "max_buy", "max_sell", "min_buy", "max_position"}} for symbols
+        with a price; max_position is the per-stock share cap (None when the market has none)
+    """
+    from tools.fee_schedule import MIN_TRADE_VALUE_INR, POSITION_CAP_FLOOR_INR, POSITION_CAP_FRACTION
+
+    cash = positions.get("CASH", 0.0)
+    fee_rate = buy_fee_rate(market)
+    # Same per-stock cap as buy(): max(₹40,000, 40% of cash) in the Indian market
+    position_cap = max(POSITION_CAP_FLOOR_INR, cash * POSITION_CAP_FRACTION) if market == "in" else None
+    limits = {}
+    for sym in symbols:
+        price = prices.get(sym)
+        if not price:
+            continue
+        held = positions.get(sym, 0)
+        max_position = int(position_cap / price) if position_cap is not None else None
+        max_buy = int(cash / (price * (1 + fee_rate)))
+        if max_position is not None:
+            max_buy = min(max_buy, max(0, max_position - int(held)))
+        min_buy = int(MIN_TRADE_VALUE_INR / price) + 1 if market == "in" else 1
+        limits[sym] = {
+            "price": round(price, 2),
+            "held": held,
+            "max_buy": max_buy if max_buy >= min_buy else 0,
+            "max_sell": max(0, int(held)),
+            "min_buy": min_buy,
+            "max_position": max_position,
+        }
+    return limits
+
+
+def build_decision_context(
+    today_date: str,
+    positions: Dict[str, float],
+    prices: Dict[str, Optional[float]],
+    yesterday_close: Dict[str, Optional[float]],
+    limits: Dict[str, Dict[str, Any]],
+    features_table: Optional[str],
+    orders_text: str,
+    rejections: List[Dict[str, Any]],
+) -> str:
+    """Render the precomputed context the model decides on in one call."""
+    holdings_value = sum(
+        qty * prices[sym] for sym, qty in positions.items() if sym != "CASH" and qty > 0 and prices.get(sym)
+    )
+    total_value = positions.get("CASH", 0.0) + holdings_value
+
+    lines = [SINGLE_SHOT_INSTRUCTIONS.strip(), "", f"Slot: {today_date}"]
+    lines.append(f"Cash: {positions.get('CASH', 0.0):.2f} | Holdings value: {holdings_value:.2f} | Total: {total_value:.2f}")
+    lines.append("Holdings (symbol, shares, price, value, weight %, change vs yest_close %):")
+    held = [(sym, qty) for sym, qty in sorted(positions.items()) if sym != "CASH" and qty > 0]
+    for sym, qty in held:
+        price = prices.get(sym)
+        value = qty * price if price else None
+        lines.append(
+            f"  {sym}, {qty}, {price if price is not None else 'N/A'}, "
+            f"{'' if value is None else f'{value:.2f}'}, "
+            f"{'' if value is None or not total_value else f'{value / total_value * 100:.1f}'}, "
+            f"{_pct(price, yesterday_close.get(sym)) if price else ''}"
+        )
+    if not held:
+        lines.append("  none")
+
+    lines.append(f"Standing orders: {orders_text}")
+    if features_table:
+        lines.append("Intraday features:")
+        lines.append(features_table)
+    lines.append("Feasibility limits (symbol, price, held, max_buy, max_sell, min_buy):")
+    for sym, lim in limits.items():
+        lines.append(f"  {sym}, {lim['price']}, {lim['held']}, {lim['max_buy']}, {lim['max_sell']}, {lim['min_buy']}")
+    if rejections:
+        lines.append("Rejected in the previous slot:")
+        for r in rejections:
+            lines.append(f"  {json.dumps(r['order'])}: {r['reason']}")
+    return "\n".join(lines)
+
+
+def parse_decision(text: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Parse the model's JSON reply (tolerates code fences and text around the object)
+
+    Returns:
+        (decision, error) — decision has an "orders" list when parsing succeeded
+    """
+    raw = (text or "").strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", raw, re.DOTALL)
+    if fenced:
+        raw = fenced.group(1).strip()
+    start, end = raw.find("{"), raw.rfind("}")
+    if start < 0 or end <= start:
+        return None, "no JSON object in reply"
+    try:
+        decision = json.loads(raw[start:end + 1])
+    except ValueError as e:
+        return None, f"invalid JSON: {e}"
+    if not isinstance(decision, dict) or not isinstance(decision.get("orders", []), list):
+        return None, '"orders" must be a list'
+    decision.setdefault("orders", [])
+    return decision, None
+
+
+def validate_orders(
+    orders: List[Any],
+    positions: Dict[str, float],
+    limits: Dict[str, Dict[str, Any]],
+    open_order_ids: List[int],
+    market: str,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Check a batch against the feasibility limits, simulating cash and shares in execution order
+
+    Sells free cash net of fees and, in the Indian market, must meet the same minimum
+    trade value as sell(), so buys are only accepted if the trade tools can fund them.
+
+    Returns:
+        (accepted orders sorted sells → buys → cancels → stops/targets, [{"order", "reason"}])
+    """
+    from tools.fee_schedule import MIN_TRADE_VALUE_INR, nse_fees
+
+    accepted, rejected = [], []
+    normalized = []
+    for order in orders:
+        if not isinstance(order, dict) or order.get("action") not in ACTIONS:
+            rejected.append({"order": order, "reason": f"action must be one of {ACTIONS}"})
+            continue
+        normalized.append(order)
+    normalized.sort(key=lambda o: ACTIONS.index(o["action"]))
+
+    cash = positions.get("CASH", 0.0)
+    held = {sym: qty for sym, qty in positions.items() if sym != "CASH"}
+    fee_rate = buy_fee_rate(market)
+    for order in normalized:
+        action, sym = order["action"], order.get("symbol")
+        if action == "cancel":
+            try:
+                order_id = int(order.get("order_id"))
+            except (TypeError, ValueError):
+                rejected.append({"order": order, "reason": "cancel needs an integer order_id"})
+                continue
+            if order_id not in open_order_ids:
+                rejected.append({"order": order, "reason": f"no standing order #{order_id}"})
+                continue
+            accepted.append({"action": action, "order_id": order_id})
+            continue
+
+        if sym not in limits:
+            rejected.append({"order": order, "reason": f"unknown symbol or no price: {sym}"})
+            continue
+        lim = limits[sym]
+        try:
+            amount = int(order.get("amount", 0) or 0)
+        except (TypeError, ValueError):
+            rejected.append({"order": order, "reason": "amount must be an integer"})
+            continue
+
+        if action in ("place_stop", "place_target"):
+            try:
+                trigger = float(order.get("trigger_price"))
+            except (TypeError, ValueError):
+                rejected.append({"order": order, "reason": "trigger_price must be a number"})
+                continue
+            if held.get(sym, 0) <= 0 or amount < 0 or amount > held.get(sym, 0):
+                rejected.append({"order": order, "reason": f"holding {held.get(sym, 0)} shares after the batch"})
+                continue
+            accepted.append({"action": action, "symbol": sym, "amount": amount, "trigger_price": trigger})
+            continue
+
+        if amount <= 0:
+            rejected.append({"order": order, "reason": "amount must be positive"})
+            continue
+        if action == "sell":
+            if amount > held.get(sym, 0):
+                rejected.append({"order": order, "reason": f"only {held.get(sym, 0)} shares held"})
+                continue
+            turnover = amount * lim["price"]
+            fees = 0.0
+            if market == "in":
+                if turnover < MIN_TRADE_VALUE_INR:
+                    rejected.append({"order": order, "reason": f"sell value {turnover:.2f} below minimum {MIN_TRADE_VALUE_INR:.0f}"})
+                    continue
+                fees = nse_fees(turnover, is_buy=False)["total"]
+            held[sym] = held.get(sym, 0) - amount
+            cash += turnover - fees
+        else:
+            cost = amount * lim["price"] * (1 + fee_rate)
+            if amount < lim["min_buy"]:
+                rejected.append({"order": order, "reason": f"below minimum trade size ({lim['min_buy']} shares)"})
+                continue
+            if lim["max_position"] is not None and held.get(sym, 0) + amount > lim["max_position"]:
+                rejected.append({"order": order, "reason": f"per-stock cap is {lim['max_position']} shares"})
+                continue
+            if cost > cash:
+                rejected.append({"order": order, "reason": f"needs {cost:.2f} cash, {cash:.2f} left in batch"})
+                continue
+            held[sym] = held.get(sym, 0) + amount
+            cash -= cost
+        accepted.append({"action": action, "symbol": sym, "amount": amount})
+    return accepted, rejected
+
+
+def execute_orders(
+    orders: List[Dict[str, Any]], trade_functions: Dict[str, Callable[..., Dict[str, Any]]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Run validated orders through the trade tool functions, in order
+
+    Returns:
+        (executed [{"order", "result"}], rejected [{"order", "reason"}] — rejections by the trade tools)
+    """
+    executed, rejected = [], []
+    for order in orders:
+        action = order["action"]
+        fn = trade_functions[action]
+        if action == "cancel":
+            result = fn(order["order_id"])
+        elif action in ("place_stop", "place_target"):
+            result = fn(order["symbol"], order["trigger_price"], order["amount"])
+        else:
+            result = fn(order["symbol"], order["amount"])
+        if isinstance(result, dict) and "error" in result:
+            rejected.append({"order": order, "reason": result["error"]})
+        else:
+            executed.append({"order": order, "result": result})
+    return executed, rejected
@@ -0,0 +1,129 @@
+"""
+Event gate for hourly trading sessions.
+
+Decides, from a cheap market-state signature, whether a slot is worth a model
+session: price moves since the last decision, held positions moving past a P&L
+band, and standing orders close to their trigger. Slots with nothing material
+are recorded as no_trade without calling the model.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SLOT_GATE = {
+    "enabled": False,
+    # Any watched symbol moving this much (%) since the last decision
+    "move_threshold_pct": 1.0,
+    # Any held symbol moving this much (%) since the last decision
+    "pnl_band_pct": 0.5,
+    # Any standing order within this distance (%) of its trigger
+    "order_proximity_pct": 0.5,
+    # Always run the first slot of each trading day (overnight gap, fresh candles)
+    "run_on_new_day": True,
+    # Force a session after this many consecutive skipped slots (0 = never)
+    "max_skipped_slots": 6,
+}
+
+
+class SlotGate:
+    """
+    Decide whether an hourly slot needs an LLM session
+
+    Args:
+        config: Overrides for DEFAULT_SLOT_GATE (the "slot_gate" section of agent_config)
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_SLOT_GATE, **(config or {})}
+        self.enabled = bool(self.config["enabled"])
+        self._reference: Dict[str, float] = {}
+        self._reference_day: Optional[str] = None
+        self._skipped_in_row = 0
+        self.stats = {"slots_run": 0, "slots_skipped": 0}
+
+    def signature(
+        self,
+        prices: Dict[str, Optional[float]],
+        positions: Dict[str, float],
+        orders: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        Market-state signature relative to the last decision
+
+        Returns:
+            {"max_move_pct", "max_held_move_pct", "min_order_distance_pct", "moved", "held_moved", "near_orders"}
+        """
+        symbols = [s for s, p in prices.items() if p is not None and self._reference.get(s)]
+        current = np.array([prices[s] for s in symbols], dtype=float)
+        reference = np.array([self._reference[s] for s in symbols], dtype=float)
+        moves = np.abs(current / reference - 1.0) * 100 if symbols else np.zeros(0)
+        held = np.array([positions.get(s, 0) > 0 for s in symbols], dtype=bool)
+
+        moved = [s for s, m in zip(symbols, moves) if m >= self.config["move_threshold_pct"]]
+        held_moved = [s for s, m, h in zip(symbols, moves, held) if h and m >= self.config["pnl_band_pct"]]
+
+        order_symbols = [o for o in orders if prices.get(o["symbol"]) is not None]
+        if order_symbols:
+            order_px = np.array([prices[o["symbol"]] for o in order_symbols], dtype=float)
+            triggers = np.array([o["trigger_price"] for o in order_symbols], dtype=float)
+            distances = np.abs(order_px - triggers) / order_px * 100
+        else:
+            distances = np.zeros(0)
+        near_orders = [o["id"] for o, d in zip(order_symbols, distances) if d <= self.config["order_proximity_pct"]]
+
+        return {
+            "max_move_pct": round(float(moves.max()), 3) if moves.size else 0.0,
+            "max_held_move_pct": round(float(moves[held].max()), 3) if held.any() else 0.0,
+            "min_order_distance_pct": round(float(distances.min()), 3) if distances.size else None,
+            "moved": moved,
+            "held_moved": held_moved,
+            "near_orders": near_orders,
+        }
+
+    def evaluate(
+        self,
+        today_date: str,
+        prices: Dict[str, Optional[float]],
+        positions: Dict[str, float],
+        orders: List[Dict[str, Any]],
+        filled_orders: int = 0,
+    ) -> Tuple[bool, List[str], Dict[str, Any]]:
+        """
+        Returns:
+            (run, reasons, signature) — run is True when the slot needs a model session
+        """
+        day = today_date.split(" ")[0]
+        state = self.signature(prices, positions, orders)
+        reasons = []
+        if not self.enabled:
+            reasons.append("gate disabled")
+        if not self._reference:
+            reasons.append("no previous decision")
+        if self.config["run_on_new_day"] and day != self._reference_day:
+            reasons.append("new trading day")
+        if filled_orders:
+            reasons.append(f"{filled_orders} standing order(s) filled")
+        if state["moved"]:
+            reasons.append(f"price move >= {self.config['move_threshold_pct']}%: {', '.join(state['moved'])}")
+        if state["held_moved"]:
+            reasons.append(f"holding moved >= {self.config['pnl_band_pct']}%: {', '.join(state['held_moved'])}")
+        if state["near_orders"]:
+            reasons.append(f"standing order near trigger: {state['near_orders']}")
+        max_skipped = self.config["max_skipped_slots"]
+        if max_skipped and self._skipped_in_row >= max_skipped:
+            reasons.append(f"{self._skipped_in_row} slots skipped in a row")
+
+        run = bool(reasons)
+        if run:
+            self.stats["slots_run"] += 1
+            self._skipped_in_row = 0
+        else:
+            self.stats["slots_skipped"] += 1
+            self._skipped_in_row += 1
+        return run, reasons, state
+
+    def record_decision(self, today_date: str, prices: Dict[str, Optional[float]]) -> None:
+        """Remember the prices the model last decided on."""
+        self._reference = {s: p for s, p in prices.items() if p is not None}
+        self._reference_day = today_date.split(" ")[0]
@@ -0,0 +1,205 @@
+"""
+Agent middleware for tool execution.
+
+LangChain dispatches every tool call of one assistant message concurrently.
+ToolExecutionMiddleware keeps that concurrency for read-only tools (bounded per
+MCP server), forces mutating tools (buy/sell/orders) to run one at a time in the order
+the model emitted them, and records per-call timings for the session log.
+ToolMemoMiddleware answers repeated read-only calls within a session from memory.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import ToolMessage
+
+from tools.general_tools import get_config_value
+
+# Tools that change the ledger or the standing-order book; everything else is treated as read-only
+MUTATING_TOOLS = {"buy", "sell", "place_stop", "place_target", "cancel"}
+
+
+def _find_tool_call_batch(state: Any, tool_call_id: str) -> List[Dict[str, Any]]:
+    """Return the tool_calls of the assistant message that issued tool_call_id."""
+    messages = state.get("messages", []) if isinstance(state, dict) else getattr(state, "messages", [])
+    for msg in reversed(messages or []):
+        tool_calls = getattr(msg, "tool_calls", None) or []
+        if any(tc.get("id") == tool_call_id for tc in tool_calls):
+            return tool_calls
+    return []
+
+
+class ToolExecutionMiddleware(AgentMiddleware):
+    """
+    Concurrency control and timing for tool calls
+
+    Args:
+        tool_servers: Mapping of tool name to the MCP server that provides it
+        max_concurrency_per_server: Maximum in-flight read-only calls per server
+    """
+
+    def __init__(self, tool_servers: Optional[Dict[str, str]] = None, max_concurrency_per_server: int = 4):
+        super().__init__()
+        self.tool_servers = tool_servers or {}
+        self.max_concurrency_per_server = max(1, max_concurrency_per_server)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._mutation_lock = asyncio.Lock()
+        self._order_cond = asyncio.Condition()
+        self._completed_mutations: set = set()
+        self._timings: List[Dict[str, Any]] = []
+
+    def _semaphore(self, server: str) -> asyncio.Semaphore:
+        if server not in self._semaphores:
+            self._semaphores[server] = asyncio.Semaphore(self.max_concurrency_per_server)
+        return self._semaphores[server]
+
+    async def _wait_for_turn(self, request: Any) -> None:
+        """Block until every mutating call emitted before this one has finished."""
+        call_id = request.tool_call.get("id")
+        batch = _find_tool_call_batch(request.state, call_id)
+        earlier = []
+        for tc in batch:
+            if tc.get("id") == call_id:
+                break
+            if tc.get("name") in MUTATING_TOOLS:
+                earlier.append(tc.get("id"))
+        async with self._order_cond:
+            await self._order_cond.wait_for(lambda: all(i in self._completed_mutations for i in earlier))
+
+    async def _mark_done(self, call_id: str) -> None:
+        async with self._order_cond:
+            self._completed_mutations.add(call_id)
+            self._order_cond.notify_all()
+
+    async def awrap_tool_call(self, request: Any, handler: Any) -> Any:
+        name = request.tool_call.get("name")
+        call_id = request.tool_call.get("id")
+        server = self.tool_servers.get(name, name)
+        mutating = name in MUTATING_TOOLS
+
+        queued = time.perf_counter()
+        if mutating:
+            try:
+                await self._wait_for_turn(request)
+                async with self._mutation_lock:
+                    started = time.perf_counter()
+                    result = await handler(request)
+            finally:
+                await self._mark_done(call_id)
+        else:
+            async with self._semaphore(server):
+                started = time.perf_counter()
+                result = await handler(request)
+        finished = time.perf_counter()
+
+        self._timings.append({
+            "tool": name,
+            "server": server,
+            "mutating": mutating,
+            "started": started,
+            "finished": finished,
+            "wait_ms": round((started - queued) * 1000, 3),
+            "duration_ms": round((finished - started) * 1000, 3),
+        })
+        return result
+
+    def drain_timings(self) -> Optional[Dict[str, Any]]:
+        """
+        Summarize and clear the timings recorded since the last call
+
+        Returns:
+            None if no tool ran, otherwise per-call timings plus the sum of call
+            durations versus the wall-clock span they covered
+        """
+        timings, self._timings = self._timings, []
+        self._completed_mutations.clear()
+        if not timings:
+            return None
+        serial_ms = sum(t["duration_ms"] for t in timings)
+        wall_ms = (max(t["finished"] for t in timings) - min(t["started"] for t in timings)) * 1000
+        return {
+            "calls": [
+                {k: t[k] for k in ("tool", "server", "mutating", "wait_ms", "duration_ms")}
+                for t in timings
+            ],
+            "serial_ms": round(serial_ms, 3),
+            "wall_ms": round(wall_ms, 3),
+        }
+
+
+# Tools whose result depends only on their arguments and the current TODAY_DATE
+READ_ONLY_TOOLS = {"add", "multiply", "get_price_local"}
+
+
+def _mutation_succeeded(result: Any) -> bool:
+    """True if a buy/sell ToolMessage reports success (trade tools return {"error": ...} on rejection)."""
+    if getattr(result, "status", "success") == "error":
+        return False
+    content = getattr(result, "content", None)
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except (TypeError, ValueError):
+            return True
+    return not (isinstance(content, dict) and "error" in content)
+
+
+class ToolMemoMiddleware(AgentMiddleware):
+    """
+    Session-level memoization of read-only tool results
+
+    Results are keyed by (tool, args, TODAY_DATE). The memo is cleared when
+    TODAY_DATE changes or a mutating tool succeeds.
+    """
+
+    def __init__(self, read_only_tools: Optional[set] = None):
+        super().__init__()
+        self.read_only_tools = READ_ONLY_TOOLS if read_only_tools is None else set(read_only_tools)
+        self._memo: Dict[Tuple[str, str, Any], Any] = {}
+        self._today: Any = None
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _invalidate(self) -> None:
+        if self._memo:
+            self._stats["invalidations"] += 1
+        self._memo.clear()
+
+    async def awrap_tool_call(self, request: Any, handler: Any) -> Any:
+        name = request.tool_call.get("name")
+        today = get_config_value("TODAY_DATE")
+        if today != self._today:
+            self._invalidate()
+            self._today = today
+
+        if name not in self.read_only_tools:
+            result = await handler(request)
+            if name in MUTATING_TOOLS and _mutation_succeeded(result):
+                self._invalidate()
+            return result
+
+        key = (name, json.dumps(request.tool_call.get("args", {}), sort_keys=True, default=str), today)
+        cached = self._memo.get(key)
+        if cached is not None:
+            self._stats["hits"] += 1
+            return ToolMessage(
+                content=cached.content,
+                name=cached.name,
+                tool_call_id=request.tool_call.get("id"),
+            )
+
+        self._stats["misses"] += 1
+        result = await handler(request)
+        if isinstance(result, ToolMessage) and result.status != "error":
+            self._memo[key] = result
+        return result
+
+    def drain_stats(self) -> Optional[Dict[str, int]]:
+        """Hit/miss/invalidation counts since the last call, None if no read-only tool was called."""
+        stats = dict(self._stats, entries=len(self._memo))
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        if not (stats["hits"] or stats["misses"]):
+            return None
+        return stats
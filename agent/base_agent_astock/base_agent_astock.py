@@ -83,10 +83,12 @@ class DeepSeekChatOpenAI(ChatOpenAI):
 
 
 from prompts.agent_prompt_astock import (STOP_SIGNAL,
-                                         get_agent_system_prompt_astock)
+                                         get_agent_system_prompt_astock,
+                                         get_agent_system_prompt_astock_prefix)
 from tools.general_tools import (extract_conversation, extract_tool_messages,
                                  get_config_value, write_config_value)
 from tools.price_tools import add_no_trade_record
+from tools.prompt_cache import PromptPrefixTracker, collect_token_usage
 
 # Load environment variables
 load_dotenv()
@@ -225,6 +227,9 @@ class BaseAgentAStock:
         else:
             self.openai_api_key = openai_api_key
 
+        # Checks the system prompt's static prefix stays identical across sessions
+        self.prompt_prefix_tracker = PromptPrefixTracker()
+
         # Initialize components
         self.client: Optional[MultiServerMCPClient] = None
         self.tools: Optional[List] = None
@@ -320,6 +325,12 @@ class BaseAgentAStock:
             os.makedirs(log_path)
         return os.path.join(log_path, "log.jsonl")
 
+    def _log_token_usage(self, log_file: str, response: Any) -> None:
+        """Write the token usage (including provider-reported cached tokens) of one agent invocation to the session log"""
+        usage = collect_token_usage(response)
+        if usage:
+            self._log_message(log_file, [{"role": "token_usage", "content": usage}])
+
     def _log_message(self, log_file: str, new_messages: List[Dict[str, str]]) -> None:
         """Log messages to log file"""
         log_entry = {"timestamp": datetime.now().isoformat(), "signature": self.signature, "new_messages": new_messages}
@@ -351,11 +362,14 @@ class BaseAgentAStock:
         log_file = self._setup_logging(today_date)
 
         # Update system prompt - 使用A股专用提示词
+        system_prompt = get_agent_system_prompt_astock(today_date, self.signature, self.stock_symbols)
+        prefix_stats = self.prompt_prefix_tracker.observe(system_prompt, get_agent_system_prompt_astock_prefix())
         self.agent = create_agent(
             self.model,
             tools=self.tools,
-            system_prompt=get_agent_system_prompt_astock(today_date, self.signature, self.stock_symbols),
+            system_prompt=system_prompt,
         )
+        self._log_message(log_file, [{"role": "prompt_stats", "content": {"prefix": prefix_stats}}])
 
         # Initial user query
         user_query = [{"role": "user", "content": f"请分析并更新今日（{today_date}）的持仓。"}]
@@ -373,6 +387,7 @@ class BaseAgentAStock:
             try:
                 # Call agent
                 response = await self._ainvoke_with_retry(message)
+                self._log_token_usage(log_file, response)
 
                 # Extract agent response
                 agent_response = extract_conversation(response, "final")
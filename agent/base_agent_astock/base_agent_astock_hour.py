@@ -30,7 +30,8 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 from agent.base_agent_astock.base_agent_astock import BaseAgentAStock
-from prompts.agent_prompt_astock import STOP_SIGNAL, get_agent_system_prompt_astock
+from prompts.agent_prompt_astock import (STOP_SIGNAL, get_agent_system_prompt_astock,
+                                         get_agent_system_prompt_astock_prefix)
 from tools.general_tools import (extract_conversation, extract_tool_messages,
                                  get_config_value, write_config_value)
 from tools.price_tools import add_no_trade_record
@@ -268,11 +269,14 @@ class BaseAgentAStock_Hour(BaseAgentAStock):
         write_config_value("LOG_FILE", log_file)
 
         # Update system prompt - use A-shares specific prompt
+        system_prompt = get_agent_system_prompt_astock(today_date, self.signature, self.stock_symbols)
+        prefix_stats = self.prompt_prefix_tracker.observe(system_prompt, get_agent_system_prompt_astock_prefix())
         self.agent = create_agent(
             self.model,
             tools=self.tools,
-            system_prompt=get_agent_system_prompt_astock(today_date, self.signature, self.stock_symbols),
+            system_prompt=system_prompt,
         )
+        self._log_message(log_file, [{"role": "prompt_stats", "content": {"prefix": prefix_stats}}])
 
         # Initial user query in Chinese
         user_query = [{"role": "user", "content": f"请分析并更新今日（{today_date}）的持仓。"}]
@@ -290,6 +294,7 @@ class BaseAgentAStock_Hour(BaseAgentAStock):
             try:
                 # Call agent
                 response = await self._ainvoke_with_retry(message)
+                self._log_token_usage(log_file, response)
 
                 # Extract agent response
                 agent_response = extract_conversation(response, "final")
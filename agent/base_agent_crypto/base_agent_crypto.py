@@ -95,10 +95,12 @@ class DeepSeekChatOpenAI(ChatOpenAI):
         return result
 
 
-from prompts.agent_prompt_crypto import STOP_SIGNAL, get_agent_system_prompt_crypto
+from prompts.agent_prompt_crypto import (STOP_SIGNAL, get_agent_system_prompt_crypto,
+                                         get_agent_system_prompt_crypto_prefix)
 from tools.general_tools import (extract_conversation, extract_tool_messages,
                                  get_config_value, write_config_value)
 from tools.price_tools import add_no_trade_record
+from tools.prompt_cache import PromptPrefixTracker, collect_token_usage
 
 # Load environment variables
 load_dotenv()
@@ -202,6 +204,9 @@ class BaseAgentCrypto:
         else:
             self.openai_api_key = openai_api_key
 
+        # Checks the system prompt's static prefix stays identical across sessions
+        self.prompt_prefix_tracker = PromptPrefixTracker()
+
         # Initialize components
         self.client: Optional[MultiServerMCPClient] = None
         self.tools: Optional[List] = None
@@ -298,6 +303,12 @@ class BaseAgentCrypto:
             os.makedirs(log_path)
         return os.path.join(log_path, "log.jsonl")
 
+    def _log_token_usage(self, log_file: str, response: Any) -> None:
+        """Write the token usage (including provider-reported cached tokens) of one agent invocation to the session log"""
+        usage = collect_token_usage(response)
+        if usage:
+            self._log_message(log_file, [{"role": "token_usage", "content": usage}])
+
     def _log_message(self, log_file: str, new_messages: List[Dict[str, str]]) -> None:
         """Log messages to log file"""
         log_entry = {
@@ -333,11 +344,14 @@ class BaseAgentCrypto:
         log_file = self._setup_logging(today_date)
         write_config_value("LOG_FILE", log_file)
         # Update system prompt
+        system_prompt = get_agent_system_prompt_crypto(today_date, self.signature, self.market, self.crypto_symbols)
+        prefix_stats = self.prompt_prefix_tracker.observe(system_prompt, get_agent_system_prompt_crypto_prefix())
         self.agent = create_agent(
             self.model,
             tools=self.tools,
-            system_prompt=get_agent_system_prompt_crypto(today_date, self.signature, self.market, self.crypto_symbols),
+            system_prompt=system_prompt,
         )
+        self._log_message(log_file, [{"role": "prompt_stats", "content": {"prefix": prefix_stats}}])
 
         # Initial user query
         user_query = [{"role": "user", "content": f"Please analyze and update today's ({today_date}) positions."}]
@@ -355,6 +369,7 @@ class BaseAgentCrypto:
             try:
                 # Call agent
                 response = await self._ainvoke_with_retry(message)
+                self._log_token_usage(log_file, response)
 
                 # Extract agent response
                 agent_response = extract_conversation(response, "final")
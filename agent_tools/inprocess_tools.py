@@ -0,0 +1,82 @@
+"""
+In-process loader for the local MCP tool servers.
+
+Imports tool_math, tool_get_price_local and tool_trade directly and exposes their
+registered FastMCP tools as LangChain tools, so backtests call the Python
+functions without an HTTP round trip. Schemas, descriptions and result text are
+taken from the same FastMCP tool objects the HTTP servers publish.
+"""
+
+import asyncio
+import importlib
+import inspect
+import os
+import sys
+from typing import Any, Dict, List
+
+from langchain_core.tools import StructuredTool, ToolException
+
+# Ensure project root is on sys.path so `agent_tools.*` / `tools.*` import cleanly
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# MCP server name -> module defining a FastMCP instance named `mcp`
+INPROCESS_TOOL_MODULES = {
+    "math": "agent_tools.tool_math",
+    "stock_local": "agent_tools.tool_get_price_local",
+    "trade": "agent_tools.tool_trade",
+}
+
+
+def _to_langchain_tool(server_name: str, tool: Any) -> StructuredTool:
+    """Wrap a FastMCP tool so it behaves like the tool langchain-mcp-adapters would return."""
+    mcp_tool = tool.to_mcp_tool()
+    # FastMCP calls sync tool functions inline; those do file locking and JSONL I/O
+    # (buy/sell, get_price_local), so run them in a worker thread like the prefetch
+    # does, keeping other agents' model calls on the event loop moving
+    blocking = not inspect.iscoroutinefunction(getattr(tool, "fn", None))
+
+    async def call_tool(**arguments: Any) -> str:
+        try:
+            if blocking:
+                result = await asyncio.to_thread(asyncio.run, tool.run(arguments))
+            else:
+                result = await tool.run(arguments)
+        except Exception as e:
+            # FastMCP reports tool exceptions as isError results; the adapter raises ToolException
+            raise ToolException(f"Error calling tool '{tool.name}': {e}") from e
+        texts = [block.text for block in result.content if getattr(block, "type", None) == "text"]
+        if not texts:
+            return ""
+        return texts[0] if len(texts) == 1 else "\n".join(texts)
+
+    return StructuredTool(
+        name=mcp_tool.name,
+        description=mcp_tool.description or "",
+        args_schema=mcp_tool.inputSchema,
+        coroutine=call_tool,
+        metadata={"server": server_name, "transport": "inprocess"},
+    )
+
+
+async def load_inprocess_tools(servers: Dict[str, Dict[str, Any]]) -> List[StructuredTool]:
+    """
+    Load tools for in-process MCP server entries
+
+    Args:
+        servers: Mapping of server name to config ({"transport": "inprocess", "module": ...});
+            "module" defaults to INPROCESS_TOOL_MODULES[name]
+
+    Returns:
+        LangChain tools backed by the local FastMCP tool functions
+    """
+    tools: List[StructuredTool] = []
+    for name, config in servers.items():
+        module_path = config.get("module") or INPROCESS_TOOL_MODULES.get(name)
+        if not module_path:
+            raise ValueError(f"No in-process module configured for MCP server '{name}'")
+        module = importlib.import_module(module_path)
+        registered = await module.mcp.get_tools()
+        tools.extend(_to_langchain_tool(name, tool) for tool in registered.values())
+    return tools
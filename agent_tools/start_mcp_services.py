@@ -115,9 +115,13 @@ class MCPServiceManager:
         try:
             # Start service process
             log_file = self.log_dir / f"{service_id}.log"
+            # Plain JSON responses instead of per-request SSE streams: the MCP client closes
+            # SSE streams early, which drops the connection and defeats keep-alive reuse
+            env = os.environ.copy()
+            env.setdefault("FASTMCP_JSON_RESPONSE", "true")
             with open(log_file, "w") as f:
                 process = subprocess.Popen(
-                    [sys.executable, script_path], stdout=f, stderr=subprocess.STDOUT, cwd=os.getcwd()
+                    [sys.executable, script_path], stdout=f, stderr=subprocess.STDOUT, cwd=os.getcwd(), env=env
                 )
 
             self.services[service_id] = {"process": process, "name": service_name, "port": port, "log_file": log_file}
@@ -1,4 +1,3 @@
-import json
 import os
 import sys
 from datetime import datetime
@@ -21,6 +20,7 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from tools.general_tools import get_config_value
+from tools.market_store import get_store
 
 
 def _workspace_data_path(filename: str, symbol: Optional[str] = None) -> Path:
@@ -100,44 +100,16 @@ def get_price_local(symbol: str, date: str) -> Dict[str, Any]:
 
 
 
-# In-memory cache for price data
-_PRICE_CACHE = {}
-
 def _get_cached_data(data_path: Path) -> Dict[str, Dict[str, Any]]:
-    """Load and cache data from the merged JSONL file."""
-    if data_path in _PRICE_CACHE:
-        return _PRICE_CACHE[data_path]
-    
-    data = {}
+    """Return per-symbol price series from the shared in-memory market data store."""
     if not data_path.exists():
-        return data
-
+        return {}
     try:
-        with data_path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                doc = json.loads(line)
-                meta = doc.get("Meta Data", {})
-                symbol = meta.get("2. Symbol")
-                if not symbol:
-                    continue
-                
-                if symbol not in data:
-                    data[symbol] = {}
-                
-                # Look for any Time Series key (Daily, 60min, etc.)
-                for key, value in doc.items():
-                    if key.startswith("Time Series") and isinstance(value, dict):
-                        data[symbol].update(value)
-                        break
+        return get_store(data_path).series_by_symbol
     except Exception as e:
         print(f"Error loading price data into cache: {e}")
         return {}
 
-    _PRICE_CACHE[data_path] = data
-    return data
-
 
 @mcp.tool()
 def get_price_local(symbol: str, date: str) -> Dict[str, Any]:
@@ -17,16 +17,11 @@ from tools.price_tools import (get_latest_position, get_open_prices,
                                get_yesterday_date,
                                get_yesterday_open_and_close_price,
                                get_yesterday_profit, get_market_type, all_nifty_50_symbols)
+from tools.order_book import add_order, format_orders, load_orders, remove_orders
 
-# --- Indian Market Guardrails & Taxes ---
-MIN_TRADE_VALUE_INR = 2000.0  # Prevent DP charge eat-up
-DP_CHARGE_INR = 15.93         # Flat DP charge per sell action (inc. GST)
-STT_RATE = 0.001              # 0.1% for Equity Delivery (Buy & Sell)
-STAMP_DUTY_BUY_RATE = 0.00015 # 0.015% (Buy only)
-TRANS_CHARGE_RATE = 0.0000345 # 0.00345% (NSE)
-SEBI_CHARGE_RATE = 0.000001   # 0.0001% (SEBI)
-GST_RATE = 0.18               # 18% on Trans + SEBI
-# -------------------------------
+# Indian Market Guardrails & Taxes (shared with tools/trade_analytics.py)
+from tools.fee_schedule import (DP_CHARGE_INR, MIN_TRADE_VALUE_INR, POSITION_CAP_FLOOR_INR, POSITION_CAP_FRACTION,
+                                SEBI_CHARGE_RATE, STAMP_DUTY_BUY_RATE, STT_RATE, TRANS_CHARGE_RATE, nse_fees)
 
 mcp = FastMCP("TradeTools")
 
@@ -203,7 +198,7 @@ def buy(symbol: str, amount: int) -> Dict[str, Any]:
                 pass
         # Simpler and correct: cap is 40% of initial portfolio = 40% of (current_cash + current stocks)
         # Use: 40% of current total cash as a simple guardrail to avoid over-concentration
-        MAX_POSITION_VALUE_INR = max(40000.0, current_cash * 0.40)
+        MAX_POSITION_VALUE_INR = max(POSITION_CAP_FLOOR_INR, current_cash * POSITION_CAP_FRACTION)
         existing_shares = current_position.get(symbol, 0)
         existing_value = existing_shares * this_symbol_price
         new_total_value = existing_value + turnover
@@ -223,12 +218,7 @@ def buy(symbol: str, amount: int) -> Dict[str, Any]:
     # Calculate fees if market is India
     total_fees = 0
     if market == "in":
-        stt = turnover * STT_RATE
-        stamp = turnover * STAMP_DUTY_BUY_RATE
-        trans = turnover * TRANS_CHARGE_RATE
-        sebi = turnover * SEBI_CHARGE_RATE
-        gst = (trans + sebi) * GST_RATE
-        total_fees = stt + stamp + trans + sebi + gst
+        total_fees = nse_fees(turnover, is_buy=True)["total"]
         print(f"🇮🇳 Indian Buy Taxes: ₹{total_fees:.2f} (Turnover: ₹{turnover:.2f})")
 
     # Calculate cash required for purchase: turnover + fees
@@ -490,12 +480,8 @@ def sell(symbol: str, amount: int) -> Dict[str, Any]:
     # Calculate fees if market is India
     total_fees = 0
     if market == "in":
-        stt = turnover * STT_RATE
-        trans = turnover * TRANS_CHARGE_RATE
-        sebi = turnover * SEBI_CHARGE_RATE
-        gst = (trans + sebi) * GST_RATE
         # DP Charge is applied once per sell action per stock
-        total_fees = stt + trans + sebi + gst + DP_CHARGE_INR
+        total_fees = nse_fees(turnover, is_buy=False)["total"]
         print(f"🇮🇳 Indian Sell Taxes: ₹{total_fees:.2f} (Turnover: ₹{turnover:.2f}, inc. ₹{DP_CHARGE_INR} DP Charge)")
 
     # Create a copy of current position to avoid directly modifying original data
@@ -537,6 +523,133 @@ def sell(symbol: str, amount: int) -> Dict[str, Any]:
     return new_position
 
 
+def _place_standing_order(order_type: str, symbol: str, trigger_price: float, amount: int) -> Dict[str, Any]:
+    """Validate and store a standing stop/target order for the current signature."""
+    signature = get_config_value("SIGNATURE")
+    if signature is None:
+        raise ValueError("SIGNATURE environment variable is not set")
+    today_date = get_config_value("TODAY_DATE")
+    if symbol.endswith((".SH", ".SZ")):
+        market = "cn"
+    elif symbol in all_nifty_50_symbols or get_market_type() == "in":
+        market = "in"
+    else:
+        market = "us"
+    currency_symbol = {"in": "₹", "cn": "¥"}.get(market, "$")
+
+    # Only the hourly US/Indian agent (BaseAgent_Hour) checks the book before each session;
+    # anywhere else a stored order would never fire
+    if market == "cn" or " " not in str(today_date or ""):
+        return {"error": "Standing orders are only supported in hourly US/Indian sessions. Use sell() to exit a position.",
+                "symbol": symbol, "date": today_date}
+
+    try:
+        trigger_price = float(trigger_price)
+        amount = int(amount)
+    except (TypeError, ValueError):
+        return {"error": "trigger_price must be a number and amount an integer.", "symbol": symbol, "date": today_date}
+    if trigger_price <= 0 or amount < 0:
+        return {"error": "trigger_price must be positive and amount must be >= 0 (0 = whole position).",
+                "symbol": symbol, "date": today_date}
+
+    current_position, _ = get_latest_position(today_date, signature)
+    held = current_position.get(symbol, 0)
+    if held <= 0:
+        return {"error": f"No position for {symbol}! Standing orders can only protect shares you hold.",
+                "symbol": symbol, "date": today_date}
+    if amount > held:
+        return {"error": "Insufficient shares for this order.", "have": held, "order_amount": amount,
+                "symbol": symbol, "date": today_date}
+
+    current_price = get_open_prices(today_date, [symbol], market=market).get(f"{symbol}_price")
+    if current_price is not None:
+        if order_type == "stop" and trigger_price >= current_price:
+            return {"error": f"Stop {currency_symbol}{trigger_price:.2f} is at or above the current price {currency_symbol}{current_price:.2f}. Sell now instead.",
+                    "symbol": symbol, "date": today_date}
+        if order_type == "target" and trigger_price <= current_price:
+            return {"error": f"Target {currency_symbol}{trigger_price:.2f} is at or below the current price {currency_symbol}{current_price:.2f}. Sell now instead.",
+                    "symbol": symbol, "date": today_date}
+
+    with _position_lock(signature):
+        order = add_order(signature, order_type, symbol, trigger_price, amount, today_date)
+        orders = load_orders(signature)
+    return {"placed": order, "standing_orders": format_orders(orders)}
+
+
+@mcp.tool()
+def place_stop(symbol: str, trigger_price: float, amount: int = 0) -> Dict[str, Any]:
+    """
+    Place a standing stop-loss order on a held stock
+
+    The order stays active across hours and is checked against every new bar by the
+    backtest engine without calling you. When a bar trades at or below trigger_price,
+    the shares are sold at the next bar's open, with the same fees and guardrails as sell().
+    Only available in hourly US/Indian sessions.
+
+    Args:
+        symbol: Stock symbol you currently hold
+        trigger_price: Stop price, must be below the current price
+        amount: Shares to sell when triggered; 0 (default) sells the whole position
+
+    Returns:
+        Dict[str, Any]:
+          - Success: {"placed": order, "standing_orders": summary}
+          - Failure: {"error": error message, ...}
+    """
+    return _place_standing_order("stop", symbol, trigger_price, amount)
+
+
+@mcp.tool()
+def place_target(symbol: str, trigger_price: float, amount: int = 0) -> Dict[str, Any]:
+    """
+    Place a standing take-profit order on a held stock
+
+    The order stays active across hours and is checked against every new bar by the
+    backtest engine without calling you. When a bar trades at or above trigger_price,
+    the shares are sold at the next bar's open, with the same fees and guardrails as sell().
+    Only available in hourly US/Indian sessions.
+
+    Args:
+        symbol: Stock symbol you currently hold
+        trigger_price: Target price, must be above the current price
+        amount: Shares to sell when triggered; 0 (default) sells the whole position
+
+    Returns:
+        Dict[str, Any]:
+          - Success: {"placed": order, "standing_orders": summary}
+          - Failure: {"error": error message, ...}
+    """
+    return _place_standing_order("target", symbol, trigger_price, amount)
+
+
+@mcp.tool()
+def cancel(order_id: int) -> Dict[str, Any]:
+    """
+    Cancel a standing stop/target order
+
+    Args:
+        order_id: Id of the order (shown as #id in the standing orders list)
+
+    Returns:
+        Dict[str, Any]:
+          - Success: {"cancelled": order, "standing_orders": summary}
+          - Failure: {"error": error message}
+    """
+    signature = get_config_value("SIGNATURE")
+    if signature is None:
+        raise ValueError("SIGNATURE environment variable is not set")
+    try:
+        order_id = int(order_id)
+    except (TypeError, ValueError):
+        return {"error": f"Invalid order id: {order_id}"}
+    with _position_lock(signature):
+        removed = remove_orders(signature, [order_id])
+        orders = load_orders(signature)
+    if not removed:
+        return {"error": f"No standing order with id {order_id}.", "standing_orders": format_orders(orders)}
+    return {"cancelled": removed[0], "standing_orders": format_orders(orders)}
+
+
 if __name__ == "__main__":
     # new_result = buy("AAPL", 1)
     # print(new_result)
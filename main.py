@@ -10,6 +10,7 @@ load_dotenv()
 
 from prompts.agent_prompt import all_nasdaq_100_symbols, all_nifty_50_symbols
 # Import tools and prompts
+from tools.connection_pool import ConnectionPoolManager
 from tools.general_tools import get_config_value, write_config_value
 
 # Agent class mapping table - for dynamic import and instantiation
@@ -73,6 +74,39 @@ def get_agent_class(agent_type):
         raise AttributeError(f"❌ Class {class_name} not found in module {module_path}: {e}")
 
 
+def get_agent_options(agent_type, agent_config, connection_pool=None):
+    """
+    Extra constructor options supported only by BaseAgent / BaseAgent_Hour
+
+    Args:
+        agent_type: Agent type name
+        agent_config: "agent_config" section of the configuration file
+        connection_pool: Shared ConnectionPoolManager for the run (model client and MCP sessions)
+
+    Returns:
+        dict: Keyword arguments to pass to the agent class
+    """
+    if agent_type not in ("BaseAgent", "BaseAgent_Hour"):
+        return {}
+    options = {
+        "tool_transport": agent_config.get("tool_transport", "http"),
+        "tool_concurrency": agent_config.get("tool_concurrency", 4),
+        "tool_memo": agent_config.get("tool_memo", True),
+        "screener_top_k": agent_config.get("screener_top_k"),
+        "intraday_format": agent_config.get("intraday_format", "ohlc"),
+        "agent_memory": agent_config.get("agent_memory", False),
+        "live_metrics": agent_config.get("live_metrics", True),
+        "connection_pool": connection_pool,
+    }
+    if agent_type == "BaseAgent_Hour":
+        options["slot_gate"] = agent_config.get("slot_gate")
+        options["session_mode"] = agent_config.get("session_mode", "per_slot")
+        options["session_max_slots"] = agent_config.get("session_max_slots", 4)
+        options["decision_mode"] = agent_config.get("decision_mode", "tool_loop")
+        options["prefetch"] = agent_config.get("prefetch", True)
+    return options
+
+
 def load_config(config_path=None):
     """
     Load configuration file from configs directory
@@ -192,6 +226,10 @@ async def main(config_path=None):
         f"⚙️  Agent config: max_steps={max_steps}, max_retries={max_retries}, base_delay={base_delay}, initial_cash={initial_cash}, verbose={verbose}"
     )
 
+    # One pool for the whole run: a keep-alive model client and one persistent MCP session
+    # per HTTP tool server, reused by every model below (models run one at a time)
+    connection_pool = ConnectionPoolManager(concurrency=1)
+
     for model_config in enabled_models:
         # Read basemodel and signature directly from configuration file
         model_name = model_config.get("name", "unknown")
@@ -286,7 +324,8 @@ async def main(config_path=None):
                     init_date=INIT_DATE,
                     market=market,
                     openai_base_url=openai_base_url,
-                    openai_api_key=openai_api_key
+                    openai_api_key=openai_api_key,
+                    **get_agent_options(agent_type, agent_config, connection_pool)
                 )
 
             print(f"✅ {agent_type} instance created successfully: {agent}")
@@ -332,6 +371,8 @@ async def main(config_path=None):
         print(f"✅ Model {model_name} ({signature}) processing completed")
         print("=" * 60)
 
+    connection_pool.report()
+    await connection_pool.aclose()
     print("🎉 All models processing completed!")
 
 
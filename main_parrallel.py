@@ -9,7 +9,7 @@ import argparse
 load_dotenv()
 
 # Import tools and prompts
-from tools.general_tools import write_config_value
+from tools.general_tools import get_config_value, runtime_context, write_config_value
 from prompts.agent_prompt import all_nasdaq_100_symbols, all_nifty_50_symbols
 
 
@@ -97,7 +97,14 @@ def load_config(config_path=None):
         exit(1)
 
 
-async def _run_model_in_current_process(AgentClass, model_config, INIT_DATE, END_DATE, agent_config, log_config):
+async def _run_model_in_current_process(AgentClass, model_config, INIT_DATE, END_DATE, agent_config, log_config,
+                                        connection_pool=None, isolated: bool = False):
+    """Run a single model to completion in this process
+
+    When isolated is True the caller has already entered a runtime_context, so the
+    per-signature runtime env file and process environment are left untouched, and
+    the tools must be loaded in-process (ValueError for any other tool_transport).
+    """
     model_name = model_config.get("name", "unknown")
     basemodel = model_config.get("basemodel")
     signature = model_config.get("signature")
@@ -116,12 +123,14 @@ async def _run_model_in_current_process(AgentClass, model_config, INIT_DATE, END
     print(f"📝 Signature: {signature}")
     print(f"🔧 BaseModel: {basemodel}")
 
-    project_root = Path(__file__).resolve().parent
-    runtime_env_dir = project_root / "data" / "agent_data" / signature
-    runtime_env_dir.mkdir(parents=True, exist_ok=True)
-    runtime_env_path = runtime_env_dir / ".runtime_env.json"
-    os.environ["RUNTIME_ENV_PATH"] = str(runtime_env_path)
-    os.environ["SIGNATURE"] = signature
+    if not isolated:
+        project_root = Path(__file__).resolve().parent
+        runtime_env_dir = project_root / "data" / "agent_data" / signature
+        runtime_env_dir.mkdir(parents=True, exist_ok=True)
+        runtime_env_path = runtime_env_dir / ".runtime_env.json"
+        os.environ["RUNTIME_ENV_PATH"] = str(runtime_env_path)
+        os.environ["SIGNATURE"] = signature
+    write_config_value("SIGNATURE", signature)
     write_config_value("TODAY_DATE", END_DATE)
     write_config_value("IF_TRADE", False)
 
@@ -129,8 +138,20 @@ async def _run_model_in_current_process(AgentClass, model_config, INIT_DATE, END
     max_retries = agent_config.get("max_retries", 3)
     base_delay = agent_config.get("base_delay", 0.5)
     initial_cash = agent_config.get("initial_cash", 10000.0)
-    from tools.general_tools import get_config_value
     log_path = log_config.get("log_path", "./data/agent_data")
+    # In-process runs load the local tools directly so trade/price calls see this task's runtime_context
+    tool_transport = agent_config.get("tool_transport", "inprocess" if isolated else "http")
+    if isolated and tool_transport != "inprocess":
+        raise ValueError(f"isolated runs need tool_transport 'inprocess', got '{tool_transport}'")
+    hour_options = {}
+    if AgentClass.__name__ == "BaseAgent_Hour":
+        hour_options = {
+            "slot_gate": agent_config.get("slot_gate"),
+            "session_mode": agent_config.get("session_mode", "per_slot"),
+            "session_max_slots": agent_config.get("session_max_slots", 4),
+            "decision_mode": agent_config.get("decision_mode", "tool_loop"),
+            "prefetch": agent_config.get("prefetch", True),
+        }
 
     try:
         market = get_config_value("MARKET", "us")
@@ -152,7 +173,16 @@ async def _run_model_in_current_process(AgentClass, model_config, INIT_DATE, END
             base_delay=base_delay,
             initial_cash=initial_cash,
             init_date=INIT_DATE,
-            market=market
+            market=market,
+            connection_pool=connection_pool,
+            tool_transport=tool_transport,
+            tool_concurrency=agent_config.get("tool_concurrency", 4),
+            tool_memo=agent_config.get("tool_memo", True),
+            screener_top_k=agent_config.get("screener_top_k"),
+            intraday_format=agent_config.get("intraday_format", "ohlc"),
+            agent_memory=agent_config.get("agent_memory", False),
+            live_metrics=agent_config.get("live_metrics", True),
+            **hour_options
         )
 
         print(f"✅ {AgentClass.__name__} instance created successfully: {agent}")
@@ -198,12 +228,67 @@ async def _spawn_model_subprocesses(config_path, enabled_models):
     await asyncio.gather(*tasks)
 
 
-async def main(config_path=None, only_signature: str | None = None):
+async def _run_models_in_process(AgentClass, enabled_models, INIT_DATE, END_DATE, agent_config, log_config,
+                                 concurrency: int):
+    """Run all models as asyncio tasks inside this process
+
+    Each task gets its own runtime_context (SIGNATURE, TODAY_DATE, IF_TRADE, ...)
+    instead of a per-signature runtime env file; tools must be loaded in-process,
+    since HTTP tool servers cannot see it (ValueError otherwise). All agents share the process-wide
+    market data store and one ConnectionPoolManager (its keep-alive model client;
+    in-process tools need no MCP sessions), and at most `concurrency` agents run at the same time.
+    """
+    from tools.connection_pool import ConnectionPoolManager
+    from tools.price_tools import get_market_store
+
+    # HTTP MCP servers run in their own processes and never see a task's runtime_context,
+    # so their buy/sell/get_price would act on another agent's SIGNATURE and TODAY_DATE
+    tool_transport = agent_config.get("tool_transport", "inprocess")
+    if tool_transport != "inprocess":
+        raise ValueError(f"--in-process needs tool_transport 'inprocess', got '{tool_transport}'")
+
+    market = get_config_value("MARKET", "us")
+    log_path = log_config.get("log_path", "./data/agent_data")
+
+    # Parse market data once up front; every agent reads the same store
+    get_market_store(market)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = {}
+
+    async with ConnectionPoolManager(concurrency=concurrency) as connection_pool:
+
+        async def _run_one(model_config):
+            signature = model_config.get("signature")
+            async with semaphore:
+                with runtime_context(SIGNATURE=signature, MARKET=market, LOG_PATH=log_path, IF_TRADE=False):
+                    try:
+                        await _run_model_in_current_process(
+                            AgentClass, model_config, INIT_DATE, END_DATE, agent_config, log_config,
+                            connection_pool=connection_pool, isolated=True,
+                        )
+                        results[signature] = None
+                    except Exception as e:
+                        results[signature] = e
+
+        await asyncio.gather(*(_run_one(m) for m in enabled_models))
+        connection_pool.report()
+
+    failed = {sig: err for sig, err in results.items() if err is not None}
+    for sig, err in failed.items():
+        print(f"❌ {sig} failed: {err}")
+    print(f"📊 In-process run finished: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+
+
+async def main(config_path=None, only_signature: str | None = None, in_process: bool = False,
+               concurrency: int | None = None):
     """Run trading experiment using Agent class (parallel runner)
     
     Args:
         config_path: Configuration file path, if None use default config
         only_signature: If provided, run only this model signature
+        in_process: Run all models as asyncio tasks in this process instead of subprocesses
+        concurrency: Maximum number of concurrently running agents for the in-process runner
     """
     # Load configuration file
     config = load_config(config_path)
@@ -262,7 +347,14 @@ async def main(config_path=None, only_signature: str | None = None):
     print(f"📅 Date range: {INIT_DATE} to {END_DATE}")
     print(f"🤖 Model list: {model_names}")
 
-    if len(enabled_models) <= 1:
+    if in_process and len(enabled_models) > 1:
+        if concurrency is None:
+            concurrency = agent_config.get("max_concurrency", 4)
+        print(f"⚡ Multiple models enabled; running them in-process (concurrency={concurrency})...")
+        await _run_models_in_process(AgentClass, enabled_models, INIT_DATE, END_DATE, agent_config, log_config,
+                                     concurrency)
+        print("🎉 All models processing completed!")
+    elif len(enabled_models) <= 1:
         for model_config in enabled_models:
             await _run_model_in_current_process(AgentClass, model_config, INIT_DATE, END_DATE, agent_config, log_config)
         print("🎉 All models processing completed!")
@@ -276,6 +368,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="AI-Trader parallel runner")
     parser.add_argument("config_path", nargs="?", default=None, help="Path to config JSON")
     parser.add_argument("--signature", dest="signature", default=None, help="Run only this model signature")
+    parser.add_argument("--in-process", dest="in_process", action="store_true",
+                        help="Run models as asyncio tasks in one process instead of subprocesses")
+    parser.add_argument("--concurrency", dest="concurrency", type=int, default=None,
+                        help="Max concurrently running agents for --in-process (default: agent_config.max_concurrency or 4)")
     args = parser.parse_args()
 
     if args.config_path:
@@ -285,5 +381,5 @@ if __name__ == "__main__":
     if args.signature:
         print(f"🎯 Filtering to single signature: {args.signature}")
 
-    asyncio.run(main(args.config_path, args.signature))
+    asyncio.run(main(args.config_path, args.signature, args.in_process, args.concurrency))
 
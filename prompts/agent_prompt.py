@@ -3,23 +3,29 @@ import os
 from dotenv import load_dotenv
 
 load_dotenv()
-import json
+import copy
 import os
 import sys
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 
 # Add project root directory to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 from tools.general_tools import get_config_value
+from tools.market_store import parse_price
 from tools.price_tools import (all_nasdaq_100_symbols, all_sse_50_symbols,
                                all_nifty_50_symbols,
                                format_price_dict_with_names, get_open_prices,
                                get_today_init_position, get_yesterday_date,
                                get_yesterday_open_and_close_price,
-                               get_yesterday_profit, get_merged_file_path)
+                               get_yesterday_profit, get_market_store)
+from tools.agent_memory import format_memory, load_memory
+from tools.order_book import format_orders, load_orders
 
 STOP_SIGNAL = "<FINISH_SIGNAL>"
 
@@ -29,7 +35,7 @@ NSE_HOURLY_SLOTS = [
     "12:15:00", "13:15:00", "14:15:00", "15:15:00"
 ]
 
-agent_system_prompt = """
+agent_system_prompt_prefix = """
 You are a professional stock trading assistant with full autonomy.
 
 Your goals are:
@@ -64,7 +70,7 @@ Mandatory Thinking Protocol (follow in exact order every hourly session):
    b. Calculate: (current price - your entry price) as both ₹ and %.
    c. Compare current price against your self-defined stop-loss. If breached → SELL immediately.
    d. Compare current price against your price target. If hit → take profit immediately.
-   You are NOT allowed to skip this step. Use `get_price_local` only if a stock is missing from the table.
+   You are NOT allowed to skip this step.{price_lookup}
 
 2. ⚖️ WEIGH NEW OPPORTUNITIES: Study the Intraday Price Table below.
    - Each row shows: yesterday's close → today's 9:15 open → each completed hour → current hour (open only).
@@ -73,9 +79,30 @@ Mandatory Thinking Protocol (follow in exact order every hourly session):
    - Look for stocks where BOTH gap AND momentum are strongly positive = breakout signal.
    - High positive momentum + both Gate 1 and Gate 2 pass → consider entry.
 
-3. ⚡ ACT: Execute your buys/sells. Use up to 30 steps.
-
+{act}
+"""
 
+# Prefix lines that depend on how the model acts: tool calls over several steps
+# ("tool_loop") or one JSON order list without tools ("single_shot", see
+# agent/base_agent/single_shot.py)
+DECISION_MODE_PROMPTS = {
+    "tool_loop": {
+        "price_lookup": " Use `get_price_local` only if a stock is missing from the table.",
+        "act": f"3. ⚡ ACT: Execute your buys/sells. Use up to 30 steps.\n\nWhen complete, output {STOP_SIGNAL}",
+        "standing_orders": "Use `place_stop` / `place_target` to record your stop-loss and price target as standing orders, and `cancel` to remove one.",
+        "memory": f'In your final message, before {STOP_SIGNAL}, add <MEMORY>{{"SYMBOL": {{"thesis": "...", "entry": 0.0, "stop": 0.0, "target": 0.0}}}}</MEMORY> for every holding you opened or whose plan changed; use "SYMBOL": null to drop a note.',
+    },
+    "single_shot": {
+        "price_lookup": "",
+        "act": "3. ⚡ ACT: Decide your buys/sells and reply with the JSON order list described in the message.",
+        "standing_orders": 'Use "place_stop" / "place_target" orders to record your stop-loss and price target as standing orders, and "cancel" orders to remove one.',
+        "memory": 'In your reply\'s "memory" field, add {"SYMBOL": {"thesis": "...", "entry": 0.0, "stop": 0.0, "target": 0.0}} for every holding you opened or whose plan changed; use "SYMBOL": null to drop a note.',
+    },
+}
+
+# Dynamic part of the system prompt, appended after the static prefix so the
+# rules block above stays byte-identical across sessions (provider prompt caching)
+agent_system_prompt_suffix = """
 Current information:
 - Date: {date}
 - Positions: {positions}
@@ -84,181 +111,485 @@ Current information:
 {intraday_table}
 
 ⚠️  Current hour ({current_slot}) shows open price only — high/low/close not yet available (no lookahead).
-
-When complete, output {STOP_SIGNAL}
 """
 
 
-def get_todays_intraday_candles(
-    today_date: str,
+def _format_candle(slot_label: str, bar: Dict[str, float]) -> str:
+    """Render one candle cell of the intraday table."""
+    if "close" in bar:
+        # Completed candle — show OHLC
+        o = f"O:{bar['open']:.1f}" if "open" in bar else ""
+        h = f"H:{bar['high']:.1f}" if "high" in bar else ""
+        l = f"L:{bar['low']:.1f}" if "low" in bar else ""
+        c = f"C:{bar['close']:.1f}" if "close" in bar else ""
+        return f"{slot_label} {o} {h} {l} {c}".strip()
+    # Current candle — open only
+    o = f"O:{bar['open']:.1f}" if "open" in bar else "no data"
+    return f"{slot_label} {o} ← NOW"
+
+
+def _format_row_head(sym: str, yclose: Optional[float]) -> str:
+    yclose_str = f"₹{yclose:.1f}" if yclose is not None else "N/A"
+    return f"{sym:<14} | yest_close={yclose_str}"
+
+
+def _parse_bar(bar: Dict[str, Any], open_only: bool = False) -> Dict[str, float]:
+    """Convert a raw merged.jsonl bar into {"open", "high", "low", "close"} floats."""
+    fields = [("open", "1. buy price")]
+    if not open_only:
+        fields += [("high", "2. high"), ("low", "3. low"), ("close", "4. sell price")]
+    entry = {}
+    for key, raw_key in fields:
+        value = parse_price(bar.get(raw_key))
+        if value is not None:
+            entry[key] = value
+    return entry
+
+
+def _fmt_pct(value: Optional[float]) -> str:
+    if value is None:
+        return ""
+    return f"{round(value, 2) or 0.0:+.2f}"  # avoid "-0.00"
+
+
+def _pct(value: Optional[float], base: Optional[float]) -> Optional[float]:
+    if value is None or not base:
+        return None
+    return (value / base - 1.0) * 100
+
+
+def _slot_columns(
+    candles: Dict[str, Dict[str, Dict[str, float]]], symbols: List[str]
+) -> List[str]:
+    return sorted({label for sym in symbols for label in candles.get(sym, {})})
+
+
+def render_intraday_csv(
+    yesterday_close: Dict[str, Optional[float]],
+    candles: Dict[str, Dict[str, Dict[str, float]]],
+    current_open: Dict[str, Dict[str, float]],
+    current_slot: str,
     symbols: List[str],
-    market: str = "in"
-) -> Dict[str, Dict[str, Dict]]:
+) -> str:
     """
-    Fetch all completed hourly candles for today up to (but not including) the current session,
-    plus the open price for the current session.
-
-    Returns a dict like:
-    {
-      "RELIANCE": {
-        "09:15": {"open": 1418.0, "high": 1425.0, "low": 1415.0, "close": 1422.0},
-        "10:15": {"open": 1422.0, "high": 1432.0, "low": 1420.0, "close": 1429.0},
-        "11:15": {"open": 1429.0}   ← current hour: only open available
-      },
-      ...
-    }
+    Header-once matrix: one row per symbol, one o/h/l/c column per completed slot.
+
+    Output example:
+    symbol,yest_close,09:15 o/h/l/c,10:15 o/h/l/c,11:15 open(NOW)
+    RELIANCE,1423.5,1418.0/1425.0/1415.0/1422.0,1422.0/1432.0/1420.0/1429.0,1429.0
+    """
+    slots = _slot_columns(candles, symbols)
+    lines = [",".join(["symbol", "yest_close"] + [f"{slot} o/h/l/c" for slot in slots] + [f"{current_slot} open(NOW)"])]
+    for sym in symbols:
+        sym_candles = candles.get(sym, {})
+        current = current_open.get(sym, {})
+        if not sym_candles and not current:
+            continue
+        yclose = yesterday_close.get(f"{sym}_price")
+        row = [sym, "" if yclose is None else f"{yclose:.1f}"]
+        for slot in slots:
+            bar = sym_candles.get(slot)
+            row.append(
+                "/".join("" if k not in bar else f"{bar[k]:.1f}" for k in ("open", "high", "low", "close"))
+                if bar else ""
+            )
+        row.append(f"{current['open']:.1f}" if "open" in current else "")
+        lines.append(",".join(row))
+    if len(lines) == 1:
+        return "(No intraday data available)"
+    return "\n".join(lines)
+
+
+def render_intraday_delta(
+    yesterday_close: Dict[str, Optional[float]],
+    candles: Dict[str, Dict[str, Dict[str, float]]],
+    current_open: Dict[str, Dict[str, float]],
+    current_slot: str,
+    symbols: List[str],
+) -> str:
     """
-    if " " not in today_date:
-        return {}  # daily mode, not hourly
-
-    date_str, time_str = today_date.split(" ", 1)
-    current_slot = time_str  # e.g. "11:15:00"
-
-    # Determine which slots are past (completed) and which is current
-    past_slots = []
-    for slot in NSE_HOURLY_SLOTS:
-        if slot < current_slot:
-            past_slots.append(slot)
-        elif slot == current_slot:
-            break  # current slot — stop here
-
-    merged_file = get_merged_file_path(market)
-    if not merged_file.exists():
-        return {}
-
-    # Build lookup: symbol → { "YYYY-MM-DD HH:MM:SS" → bar_dict }
-    wanted = set(symbols)
-    symbol_series: Dict[str, Dict] = {}
-
-    with merged_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-            except Exception:
-                continue
-            meta = doc.get("Meta Data", {})
-            sym = meta.get("2. Symbol", "")
-
-            # Indian market: strip exchange suffix for matching
-            clean_sym = sym.split(".")[0] if market == "in" else sym
-            matched = None
-            if clean_sym in wanted:
-                matched = clean_sym
-            elif sym in wanted:
-                matched = sym
-
-            if matched is None:
-                continue
-
-            for key, value in doc.items():
-                if key.startswith("Time Series") and isinstance(value, dict):
-                    symbol_series[matched] = value
-                    break
-
-    # Now build the result dict
-    result: Dict[str, Dict[str, Dict]] = {}
+    Same matrix as the csv renderer, with prices as % change vs. yesterday close
+    (vs. today's first open when there is no previous close).
 
+    Output example:
+    symbol,yest_close,09:15 o/h/l/c %,10:15 o/h/l/c %,11:15 open(NOW) %
+    RELIANCE,1423.5,-0.39/+0.11/-0.60/-0.11,-0.11/+0.60/-0.25/+0.39,+0.39
+    """
+    slots = _slot_columns(candles, symbols)
+    lines = [",".join(["symbol", "yest_close"] + [f"{slot} o/h/l/c %" for slot in slots] + [f"{current_slot} open(NOW) %"])]
     for sym in symbols:
-        series = symbol_series.get(sym)
-        if not series:
+        sym_candles = candles.get(sym, {})
+        current = current_open.get(sym, {})
+        if not sym_candles and not current:
             continue
+        base = yesterday_close.get(f"{sym}_price")
+        row = [sym, "" if base is None else f"{base:.1f}"]
+        if base is None:
+            first = sym_candles[min(sym_candles)] if sym_candles else current
+            base = first.get("open")
+            row[1] = "" if base is None else f"open={base:.1f}"
+        for slot in slots:
+            bar = sym_candles.get(slot)
+            row.append(
+                "/".join(_fmt_pct(_pct(bar.get(k), base)) for k in ("open", "high", "low", "close"))
+                if bar else ""
+            )
+        row.append(_fmt_pct(_pct(current.get("open"), base)))
+        lines.append(",".join(row))
+    if len(lines) == 1:
+        return "(No intraday data available)"
+    return "\n".join(lines)
+
 
-        sym_data: Dict[str, Dict] = {}
+def render_intraday_features(
+    yesterday_close: Dict[str, Optional[float]],
+    candles: Dict[str, Dict[str, Dict[str, float]]],
+    current_open: Dict[str, Dict[str, float]],
+    current_slot: str,
+    symbols: List[str],
+) -> str:
+    """
+    Derived features only, one row per symbol.
 
-        # Past slots — full OHLC available
-        for slot in past_slots:
+    Columns: current open, gap% (today's first open vs. yesterday close), mom% (current
+    open vs. today's first open), range% (today's high-low vs. first open), last% (last
+    completed candle close vs. its open), pos (current open within today's range, 0-100).
+    """
+    header = f"symbol,price({current_slot}),gap%,mom%,range%,last%,pos"
+    lines = [header]
+    for sym in symbols:
+        sym_candles = candles.get(sym, {})
+        current = current_open.get(sym, {})
+        if not sym_candles and not current:
+            continue
+        bars = [sym_candles[slot] for slot in sorted(sym_candles)]
+        price = current.get("open")
+        if price is None and bars:
+            price = bars[-1].get("close")
+        first_open = bars[0].get("open") if bars else price
+        highs = [b["high"] for b in bars if "high" in b] + ([price] if price is not None else [])
+        lows = [b["low"] for b in bars if "low" in b] + ([price] if price is not None else [])
+        day_range = (max(highs) - min(lows)) / first_open * 100 if highs and lows and first_open else None
+        last = _pct(bars[-1].get("close"), bars[-1].get("open")) if bars else None
+        pos = ""
+        if price is not None and highs and lows and max(highs) > min(lows):
+            pos = f"{(price - min(lows)) / (max(highs) - min(lows)) * 100:.0f}"
+        lines.append(",".join([
+            sym,
+            "" if price is None else f"{price:.1f}",
+            _fmt_pct(_pct(first_open, yesterday_close.get(f"{sym}_price"))),
+            _fmt_pct(_pct(price, first_open)),
+            "" if day_range is None else f"{day_range:.2f}",
+            _fmt_pct(last),
+            pos,
+        ]))
+    if len(lines) == 1:
+        return "(No intraday data available)"
+    return "\n".join(lines)
+
+
+# intraday_format -> (renderer, one-line legend prepended to the table); "ohlc" is IntradayContext's own row format
+INTRADAY_RENDERERS = {
+    "csv": (render_intraday_csv, "CSV, one row per stock; each slot column is open/high/low/close, last column is the current open."),
+    "delta": (render_intraday_delta, "CSV, prices as % change vs. yest_close; each slot column is open/high/low/close %, last column is the current open %."),
+    "features": (render_intraday_features, "CSV of derived features: gap% = first open vs. yest_close, mom% = current vs. first open, range% = day high-low vs. first open, last% = last candle close vs. open, pos = current price within day range (0-100)."),
+}
+INTRADAY_FORMATS = ("ohlc",) + tuple(INTRADAY_RENDERERS)
+
+
+class IntradayContext:
+    """
+    Per-day intraday state reused across hourly slots.
+
+    Previous-day closes are computed once per day; each advance() appends only the
+    candles completed since the last slot and keeps each symbol's rendered row
+    prefix, so a slot costs one new candle per symbol instead of a rebuild.
+    """
+
+    def __init__(self, date_str: str, symbols: List[str], market: str = "in"):
+        self.date_str = date_str
+        self.symbols = list(symbols)
+        self.market = market
+        self.store = get_market_store(market)
+        self.yesterday_close = self._previous_day_close()
+        self._reset()
+
+    @classmethod
+    def for_slot(
+        cls, context: Optional["IntradayContext"], today_date: str, symbols: List[str], market: str = "in"
+    ) -> "IntradayContext":
+        """Reuse context if it covers this day and universe, else start a new one; then advance to today_date."""
+        date_str = today_date.split(" ")[0]
+        if context is None or context.date_str != date_str or context.market != market \
+                or not set(symbols) <= set(context.symbols):
+            context = cls(date_str, symbols, market)
+        context.advance(today_date)
+        return context
+
+    def clone(self) -> "IntradayContext":
+        """Independent copy that can be advanced (e.g. by a prefetch thread) without touching this one."""
+        other = copy.copy(self)
+        other.candles = {sym: dict(candles) for sym, candles in self.candles.items()}
+        other._row_cells = {sym: list(cells) for sym, cells in self._row_cells.items()}
+        other._completed_slots = list(self._completed_slots)
+        return other
+
+    def _reset(self) -> None:
+        self.candles: Dict[str, Dict[str, Dict[str, float]]] = {sym: {} for sym in self.symbols}
+        self._row_cells: Dict[str, List[str]] = {sym: [] for sym in self.symbols}
+        self._completed_slots: List[str] = []
+        self.current_slot: Optional[str] = None
+
+    def _previous_day_close(self) -> Dict[str, Optional[float]]:
+        """{"SYM_price": close of the last bar before this day} — the true previous-day close."""
+        day_start = datetime.strptime(self.date_str, "%Y-%m-%d")
+        prev_dt = self.store.previous_datetime(day_start)
+        closes: Dict[str, Optional[float]] = {}
+        if prev_dt is None:
+            return closes
+        prev_ts = prev_dt.strftime("%Y-%m-%d %H:%M:%S")
+        for sym in self.symbols:
+            bar = self.store.bar(sym, prev_ts, self.market)
+            closes[f"{sym}_price"] = parse_price(bar.get("4. sell price")) if bar else None
+        return closes
+
+    def advance(self, today_date: str) -> None:
+        """Move to the slot at today_date, appending only newly completed candles."""
+        date_str, current_slot = today_date.split(" ", 1)
+        if date_str != self.date_str:
+            raise ValueError(f"IntradayContext for {self.date_str} cannot advance to {today_date}")
+
+        past_slots = [slot for slot in NSE_HOURLY_SLOTS if slot < current_slot]
+        if past_slots[:len(self._completed_slots)] != self._completed_slots:
+            # Went backwards (e.g. a retried slot): rebuild from the start of the day
+            self._reset()
+
+        for slot in past_slots[len(self._completed_slots):]:
             ts = f"{date_str} {slot}"
-            bar = series.get(ts)
-            if bar:
-                entry = {}
-                if bar.get("1. buy price") is not None:
-                    try:
-                        entry["open"] = float(str(bar["1. buy price"]).replace(",", ""))
-                    except Exception:
-                        pass
-                if bar.get("2. high") is not None:
-                    try:
-                        entry["high"] = float(str(bar["2. high"]).replace(",", ""))
-                    except Exception:
-                        pass
-                if bar.get("3. low") is not None:
-                    try:
-                        entry["low"] = float(str(bar["3. low"]).replace(",", ""))
-                    except Exception:
-                        pass
-                if bar.get("4. sell price") is not None:
-                    try:
-                        entry["close"] = float(str(bar["4. sell price"]).replace(",", ""))
-                    except Exception:
-                        pass
+            label = slot[:5]  # store as "09:15" not "09:15:00"
+            for sym in self.symbols:
+                bar = self.store.bar(sym, ts, self.market)
+                entry = _parse_bar(bar) if bar else {}
                 if entry:
-                    sym_data[slot[:5]] = entry  # store as "09:15" not "09:15:00"
+                    self.candles[sym][label] = entry
+                    self._row_cells[sym].append(_format_candle(label, entry))
+            self._completed_slots.append(slot)
 
         # Current slot — open price only (anti-lookahead)
-        cur_ts = f"{date_str} {current_slot}"
-        cur_bar = series.get(cur_ts)
-        if cur_bar and cur_bar.get("1. buy price") is not None:
-            try:
-                sym_data[current_slot[:5]] = {
-                    "open": float(str(cur_bar["1. buy price"]).replace(",", ""))
-                }
-            except Exception:
-                pass
+        self.current_slot = current_slot
+        self.current_open: Dict[str, Dict[str, float]] = {}
+        for sym in self.symbols:
+            bar = self.store.bar(sym, today_date, self.market)
+            entry = _parse_bar(bar, open_only=True) if bar else {}
+            if entry:
+                self.current_open[sym] = entry
+
+    @property
+    def completed_count(self) -> int:
+        """Number of completed slots included so far."""
+        return len(self._completed_slots)
+
+    def render_update(self, symbols: Optional[List[str]] = None, since: int = 0, fmt: str = "ohlc") -> str:
+        """
+        Candles completed after the first `since` slots, plus the current open
+
+        Used by continuous sessions to send only what changed since the previous slot.
+        The csv/delta/features encodings are snapshots, so they are re-rendered whole.
+        """
+        if fmt != "ohlc":
+            return self.render(symbols, fmt)
+        labels = [slot[:5] for slot in self._completed_slots[since:]]
+        lines = []
+        for sym in symbols or self.symbols:
+            sym_candles = self.candles.get(sym, {})
+            parts = [f"{sym:<14}"] + [_format_candle(label, sym_candles[label]) for label in labels if label in sym_candles]
+            current = self.current_open.get(sym)
+            if current:
+                parts.append(_format_candle(self.current_slot[:5], current))
+            if len(parts) > 1:
+                lines.append(" | ".join(parts))
+        if not lines:
+            return "(No intraday data available)"
+        return "\n".join(lines)
+
+    def render(self, symbols: Optional[List[str]] = None, fmt: str = "ohlc") -> str:
+        """
+        Intraday table for symbols (default: the whole universe)
+
+        Args:
+            fmt: One of INTRADAY_FORMATS; "ohlc" is one row per symbol: yesterday close, then every candle so far
+        """
+        if fmt != "ohlc":
+            if fmt not in INTRADAY_RENDERERS:
+                raise ValueError(f"Unknown intraday_format '{fmt}', expected one of {INTRADAY_FORMATS}")
+            renderer, legend = INTRADAY_RENDERERS[fmt]
+            table = renderer(
+                self.yesterday_close, self.candles, self.current_open, self.current_slot[:5], symbols or self.symbols
+            )
+            return f"({legend})\n{table}"
+
+        lines = []
+        for sym in symbols or self.symbols:
+            cells = self._row_cells.get(sym, [])
+            current = self.current_open.get(sym)
+            if not cells and not current:
+                continue  # skip stocks with no data today
+            parts = [_format_row_head(sym, self.yesterday_close.get(f"{sym}_price"))] + cells
+            if current:
+                parts.append(_format_candle(self.current_slot[:5], current))
+            lines.append(" | ".join(parts))
+
+        if not lines:
+            return "(No intraday data available)"
+        return "\n".join(lines)
+
+
+def _percentile_rank(values: np.ndarray) -> np.ndarray:
+    """Rank values into [0, 1] (NaN ranks lowest)."""
+    filled = np.where(np.isnan(values), -np.inf, values)
+    order = filled.argsort(kind="stable")
+    ranks = np.empty(len(values), dtype=float)
+    ranks[order] = np.arange(len(values), dtype=float)
+    return ranks / max(len(values) - 1, 1)
+
+
+def screen_universe(
+    today_date: str,
+    symbols: List[str],
+    holdings: List[str],
+    top_k: int,
+    market: str = "in",
+    lookback: int = 14,
+) -> Dict[str, Any]:
+    """
+    Rank the universe with cross-sectional features and keep the top K plus holdings.
+
+    Features (computed for all symbols at once from the market store matrices):
+    - gap_pct: today's first open vs the previous trading day's last close
+    - momentum_pct: current open vs today's first open
+    - volume_surge: last completed bar's volume vs its average over `lookback` bars
+    - volatility_pct: std of bar-to-bar close returns over `lookback` bars
+    The score is the mean percentile rank of the four features.
+
+    Returns:
+        {"symbols": kept symbols in universe order, "features": {symbol: {...}},
+         "universe": int, "elapsed_ms": float}
+    """
+    started = time.perf_counter()
+    store = get_market_store(market)
+    col = store.timestamp_col(today_date)
+    present, rows = store.rows_for(symbols, market)
+
+    if col is None or len(present) <= top_k:
+        kept = list(symbols)
+        return {"symbols": kept, "features": {}, "universe": len(symbols),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+    timestamps = store.timestamps
+    day = today_date.split(" ")[0]
+    day_start = col
+    while day_start > 0 and timestamps[day_start - 1].startswith(day):
+        day_start -= 1
+
+    opens = store.field_matrix("1. buy price")[rows]
+    closes = store.field_matrix("4. sell price")[rows]
+    volumes = store.field_matrix("5. volume")[rows]
+    window = slice(max(col - lookback, 0), col)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        prev_close = closes[:, day_start - 1] if day_start > 0 else np.full(len(rows), np.nan)
+        gap = (opens[:, day_start] / prev_close - 1.0) * 100
+        momentum = (opens[:, col] / opens[:, day_start] - 1.0) * 100
+        last_volume = volumes[:, col - 1] if col > 0 else np.full(len(rows), np.nan)
+        volume_surge = last_volume / np.nanmean(volumes[:, window], axis=1)
+        returns = np.diff(closes[:, window], axis=1) / closes[:, window][:, :-1]
+        volatility = np.nanstd(returns, axis=1) * 100 if returns.shape[1] else np.full(len(rows), np.nan)
+
+    score = np.mean([_percentile_rank(x) for x in (gap, momentum, volume_surge, volatility)], axis=0)
+    top = {present[i] for i in np.argsort(-score, kind="stable")[:top_k]}
+    keep = top | set(holdings)
+    kept = [sym for sym in symbols if sym in keep]
+
+    def _num(x: float) -> Optional[float]:
+        return None if np.isnan(x) else round(float(x), 2)
+
+    features = {
+        sym: {
+            "score": round(float(score[i]), 3),
+            "gap_pct": _num(gap[i]),
+            "momentum_pct": _num(momentum[i]),
+            "volume_surge": _num(volume_surge[i]),
+            "volatility_pct": _num(volatility[i]),
+        }
+        for i, sym in enumerate(present) if sym in keep
+    }
+    return {"symbols": kept, "features": features, "universe": len(symbols),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
 
-        if sym_data:
-            result[sym] = sym_data
 
-    return result
+def add_holdings_to_screen(screen: Dict[str, Any], symbols: List[str], holdings: List[str]) -> Dict[str, Any]:
+    """Complete a screen_universe result computed without holdings (e.g. prefetched) with the current holdings."""
+    keep = set(screen["symbols"]) | set(holdings)
+    return {**screen, "symbols": [sym for sym in symbols if sym in keep]}
 
 
-def format_intraday_table(
-    yesterday_close: Dict[str, Optional[float]],
-    intraday: Dict[str, Dict[str, Dict]],
-    symbols: List[str]
+def get_agent_system_prompt_prefix(
+    market: str = "us", hourly: bool = False, agent_memory: bool = False, decision_mode: str = "tool_loop"
 ) -> str:
     """
-    Format the intraday candles + yesterday close into a readable table string.
+    Static part of the system prompt: identical for every session of a market/frequency,
+    so it must not contain dates, positions or prices.
 
-    Output example:
-    RELIANCE  | yest_close=1423.5 | 09:15 O:1418 H:1425 L:1415 C:1422 | 10:15 O:1422 H:1432 L:1420 C:1429 | 11:15 O:1429* (current)
+    decision_mode selects the tool-loop or single-shot wording (DECISION_MODE_PROMPTS).
     """
-    lines = []
-    for sym in symbols:
-        candles = intraday.get(sym)
-        if not candles:
-            continue  # skip stocks with no data today
-
-        ykey = f"{sym}_price"
-        yclose = yesterday_close.get(ykey)
-        yclose_str = f"₹{yclose:.1f}" if yclose is not None else "N/A"
-
-        parts = [f"{sym:<14} | yest_close={yclose_str}"]
-
-        for slot_label, bar in sorted(candles.items()):
-            if "close" in bar:
-                # Completed candle — show OHLC
-                o = f"O:{bar['open']:.1f}" if "open" in bar else ""
-                h = f"H:{bar['high']:.1f}" if "high" in bar else ""
-                l = f"L:{bar['low']:.1f}" if "low" in bar else ""
-                c = f"C:{bar['close']:.1f}" if "close" in bar else ""
-                parts.append(f"{slot_label} {o} {h} {l} {c}".strip())
-            else:
-                # Current candle — open only
-                o = f"O:{bar['open']:.1f}" if "open" in bar else "no data"
-                parts.append(f"{slot_label} {o} ← NOW")
-
-        lines.append(" | ".join(parts))
-
-    if not lines:
-        return "(No intraday data available)"
-    return "\n".join(lines)
+    mode = DECISION_MODE_PROMPTS[decision_mode]
+    prompt_text = agent_system_prompt_prefix.format(price_lookup=mode["price_lookup"], act=mode["act"])
+    if hourly:
+        prompt_text += "\nStanding Orders:"
+        prompt_text += f"\n- {mode['standing_orders']} They are checked every hour without you, so you don't need to re-check them manually."
+        prompt_text += "\n- Your open standing orders are listed below the intraday table."
+    if market == "in":
+        prompt_text += "\nNote for Indian Market:"
+        prompt_text += "\n- NO search/news tool available. Base decisions purely on price action shown in the intraday table below."
+        prompt_text += "\n- Use the intraday candles to judge: is momentum building or fading across hours?"
+        prompt_text += "\n- Small Position Friction: If buying < ₹4,000, fixed DP charges (₹16) eat a HIGH % of the trade. Adjust Gate 1 'Expected Profit' upward to compensate."
+    if agent_memory:
+        prompt_text += "\nMemory:"
+        prompt_text += "\n- 'Open theses' below are your own notes from earlier sessions (entry, stop, target, thesis per holding). Use them instead of re-deriving your plan or re-querying prices you already have."
+        prompt_text += f"\n- {mode['memory']} Notes on stocks you no longer hold are dropped automatically."
+    return prompt_text + "\n"
 
 
 def get_agent_system_prompt(
-    today_date: str, signature: str, market: str = "us", stock_symbols: Optional[List[str]] = None
+    today_date: str,
+    signature: str,
+    market: str = "us",
+    stock_symbols: Optional[List[str]] = None,
+    screener_top_k: Optional[int] = None,
+    prompt_stats: Optional[Dict[str, Any]] = None,
+    intraday_context: Optional[IntradayContext] = None,
+    intraday_format: str = "ohlc",
+    agent_memory: bool = False,
+    screen: Optional[Dict[str, Any]] = None,
+    decision_mode: str = "tool_loop",
 ) -> str:
+    """
+    Build the system prompt for one trading session: the static prefix from
+    get_agent_system_prompt_prefix followed by this session's data.
+
+    Args:
+        screener_top_k: If set and the universe is larger, only the top K screened
+            symbols plus current holdings are rendered (see screen_universe)
+        prompt_stats: Optional dict filled with prompt-build statistics (e.g. screener latency)
+        intraday_context: IntradayContext already advanced to today_date (hourly Indian market);
+            built on the fly when not given
+        intraday_format: Intraday table encoding, one of INTRADAY_FORMATS (default "ohlc")
+        agent_memory: Show the signature's open-thesis notes (tools/agent_memory.py) and ask
+            the model to update them
+        screen: screen_universe result for today_date computed without holdings (e.g. prefetched
+            while the previous slot ran); holdings are added here
+        decision_mode: "tool_loop" or "single_shot" (no tools, one JSON reply)
+    """
     print(f"signature: {signature}")
     print(f"today_date: {today_date}")
     print(f"market: {market}")
@@ -267,27 +598,42 @@ def get_agent_system_prompt(
     if stock_symbols is None:
         stock_symbols = all_nifty_50_symbols
 
-    # Get yesterday's close prices
-    _, yesterday_sell_prices = get_yesterday_open_and_close_price(
-        today_date, stock_symbols, market=market
-    )
-
     today_init_position = get_today_init_position(today_date, signature)
 
     # Filter positions to only show non-zero holdings and CASH
     filtered_positions = {k: v for k, v in today_init_position.items() if v != 0 or k == "CASH"}
 
+    # Cap the rendered universe: top K by screener score, plus everything we hold
+    if screener_top_k and len(stock_symbols) > screener_top_k:
+        holdings = [k for k in filtered_positions if k != "CASH"]
+        if screen is None:
+            screen = screen_universe(today_date, stock_symbols, holdings, screener_top_k, market=market)
+        else:
+            screen = add_holdings_to_screen(screen, stock_symbols, holdings)
+        print(f"🔎 Screener: kept {len(screen['symbols'])}/{screen['universe']} symbols in {screen['elapsed_ms']:.1f} ms")
+        stock_symbols = screen["symbols"]
+        if prompt_stats is not None:
+            prompt_stats["screener"] = {
+                "universe": screen["universe"],
+                "kept": len(screen["symbols"]),
+                "elapsed_ms": screen["elapsed_ms"],
+            }
+
     # Determine current slot label for prompt annotation
     current_slot = "09:15"
     if " " in today_date:
         current_slot = today_date.split(" ")[1][:5]  # e.g. "11:15"
 
     if market == "in" and " " in today_date:
-        # Build full intraday candle table
-        intraday = get_todays_intraday_candles(today_date, stock_symbols, market=market)
-        filtered_yesterday_close = {k: v for k, v in yesterday_sell_prices.items() if v is not None}
-        intraday_table = format_intraday_table(filtered_yesterday_close, intraday, stock_symbols)
+        # Intraday candle table, rendered from the (incremental) per-day context
+        if intraday_context is None:
+            intraday_context = IntradayContext.for_slot(None, today_date, stock_symbols, market=market)
+        intraday_table = intraday_context.render(stock_symbols, fmt=intraday_format)
     else:
+        # Get yesterday's close prices
+        _, yesterday_sell_prices = get_yesterday_open_and_close_price(
+            today_date, stock_symbols, market=market
+        )
         # Daily mode or non-Indian market — fall back to just current price
         today_session_price = get_open_prices(today_date, stock_symbols, market=market)
         filtered_session_prices = {k: v for k, v in today_session_price.items() if v is not None}
@@ -297,22 +643,25 @@ def get_agent_system_prompt(
             f"Current Price:   {filtered_session_prices}"
         )
 
-    prompt_text = agent_system_prompt
-    if market == "in":
-        prompt_text += "\nNote for Indian Market:"
-        prompt_text += "\n- NO search/news tool available. Base decisions purely on price action shown in the intraday table above."
-        prompt_text += "\n- Use the intraday candles to judge: is momentum building or fading across hours?"
-        prompt_text += "\n- Small Position Friction: If buying < ₹4,000, fixed DP charges (₹16) eat a HIGH % of the trade. Adjust Gate 1 'Expected Profit' upward to compensate."
-
-    return prompt_text.format(
+    suffix = agent_system_prompt_suffix
+    if " " in today_date:
+        # Hourly mode: standing orders are filled by the backtest engine between sessions
+        standing_orders = format_orders(load_orders(signature)).replace("{", "{{").replace("}", "}}")
+        suffix += "\nStanding Orders (filled automatically at the next bar's open once breached):"
+        suffix += f"\n  {standing_orders}\n"
+    if agent_memory:
+        notes = format_memory(load_memory(signature)).replace("{", "{{").replace("}", "}}")
+        suffix += f"\nOpen theses (your notes from earlier sessions):\n  {notes}\n"
+
+    prefix = get_agent_system_prompt_prefix(market, hourly=" " in today_date, agent_memory=agent_memory,
+                                            decision_mode=decision_mode)
+    return prefix + suffix.format(
         date=today_date,
         positions=filtered_positions,
-        STOP_SIGNAL=STOP_SIGNAL,
         intraday_table=intraday_table,
         current_slot=current_slot,
     )
 
-
 if __name__ == "__main__":
     today_date = get_config_value("TODAY_DATE")
     signature = get_config_value("SIGNATURE")
@@ -27,7 +27,7 @@ from tools.price_tools import (all_sse_50_symbols,
 
 STOP_SIGNAL = "<FINISH_SIGNAL>"
 
-agent_system_prompt_astock = """
+agent_system_prompt_astock_prefix = """
 你是一位A股基本面分析交易助手。
 
 
@@ -74,6 +74,12 @@ agent_system_prompt_astock = """
    - ST股票：±5%
    - 科创板/创业板：±20%
 
+当你认为任务完成时，输出
+{STOP_SIGNAL}
+"""
+
+# 提示词的动态部分，放在静态前缀之后，使上面的规则部分在各个时段间保持逐字节不变（便于模型服务端的提示词缓存）
+agent_system_prompt_astock_suffix = """
 以下是你需要的信息：
 
 当前时间：
@@ -90,12 +96,16 @@ agent_system_prompt_astock = """
 
 上一时间段收益情况（日线=昨日收益，小时线=上一小时收益）：
 {current_profit}
-
-当你认为任务完成时，输出
-{STOP_SIGNAL}
 """
 
 
+def get_agent_system_prompt_astock_prefix() -> str:
+    """
+    系统提示词的静态前缀（规则部分），不包含日期、持仓或价格，所有时段都相同
+    """
+    return agent_system_prompt_astock_prefix.format(STOP_SIGNAL=STOP_SIGNAL)
+
+
 def get_agent_system_prompt_astock(today_date: str, signature: str, stock_symbols: Optional[List[str]] = None) -> str:
     """
     生成A股专用系统提示词
@@ -106,7 +116,7 @@ def get_agent_system_prompt_astock(today_date: str, signature: str, stock_symbol
         stock_symbols: 股票代码列表，默认为上证50成分股
 
     Returns:
-        格式化的系统提示词字符串
+        格式化的系统提示词字符串（静态前缀 + 本时段数据）
     """
     print(f"signature: {signature}")
     print(f"today_date: {today_date}")
@@ -138,10 +148,9 @@ def get_agent_system_prompt_astock(today_date: str, signature: str, stock_symbol
     yesterday_sell_prices_display = format_price_dict_with_names(yesterday_sell_prices, market="cn")
     today_buy_price_display = format_price_dict_with_names(today_buy_price, market="cn")
 
-    return agent_system_prompt_astock.format(
+    return get_agent_system_prompt_astock_prefix() + agent_system_prompt_astock_suffix.format(
         date=today_date,
         positions=today_init_position,
-        STOP_SIGNAL=STOP_SIGNAL,
         yesterday_close_price=yesterday_sell_prices_display,
         today_buy_price=today_buy_price_display,
         current_profit=current_profit,
@@ -21,7 +21,7 @@ from tools.price_tools import (format_price_dict_with_names, get_open_prices,
 
 STOP_SIGNAL = "<FINISH_SIGNAL>"
 
-agent_system_prompt_crypto = """
+agent_system_prompt_crypto_prefix = """
 You are a cryptocurrency trading assistant specializing in digital asset analysis and portfolio management.
 
 Your goals are:
@@ -43,6 +43,13 @@ Notes:
 - Cryptocurrency markets operate 24/7, but we use daily UTC 00:00 as the reference point for trading
 - Be aware of the high volatility nature of cryptocurrencies
 
+When you think your task is complete, output
+{STOP_SIGNAL}
+"""
+
+# Dynamic part of the system prompt, appended after the static prefix so the
+# rules block above stays byte-identical across sessions (provider prompt caching)
+agent_system_prompt_crypto_suffix = """
 Here is the information you need:
 
 Current time:
@@ -56,12 +63,14 @@ The current value represented by the cryptocurrencies you hold:
 
 Current buying prices:
 {today_buy_price}
-
-When you think your task is complete, output
-{STOP_SIGNAL}
 """
 
 
+def get_agent_system_prompt_crypto_prefix() -> str:
+    """Static part of the system prompt (no dates, positions or prices), identical for every session"""
+    return agent_system_prompt_crypto_prefix.format(STOP_SIGNAL=STOP_SIGNAL)
+
+
 def get_agent_system_prompt_crypto(
     today_date: str, signature: str, market: str = "crypto", crypto_symbols: Optional[List[str]] = None
 ) -> str:
@@ -82,10 +91,9 @@ def get_agent_system_prompt_crypto(
     today_init_position = get_today_init_position(today_date, signature)
     # yesterday_profit = get_yesterday_profit(today_date, yesterday_buy_prices, yesterday_sell_prices, today_init_position)
 
-    return agent_system_prompt_crypto.format(
+    return get_agent_system_prompt_crypto_prefix() + agent_system_prompt_crypto_suffix.format(
         date=today_date,
         positions=today_init_position,
-        STOP_SIGNAL=STOP_SIGNAL,
         yesterday_close_price=yesterday_sell_prices,
         today_buy_price=today_buy_price,
         # yesterday_profit=yesterday_profit
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark Intraday Table Renderers
+Renders the hourly intraday table in every `intraday_format` for the same slots and
+reports its size in characters and tokens, so the cheapest encoding can be picked
+for agent_config. Decision quality is not measured here — compare runs of the
+candidate formats over the same date range for that.
+
+Tokens are counted with tiktoken when it is installed, otherwise estimated as
+characters / 4.
+
+Usage:
+    python scripts/benchmark_intraday_renderers.py
+    python scripts/benchmark_intraday_renderers.py --date 2025-06-03 --slots "10:15,12:15,15:15"
+    python scripts/benchmark_intraday_renderers.py --symbols RELIANCE,TCS,INFY --show
+"""
+
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from prompts.agent_prompt import INTRADAY_FORMATS, NSE_HOURLY_SLOTS, IntradayContext
+from tools.price_tools import all_nifty_50_symbols, get_market_store
+
+
+def get_token_counter(encoding_name: str):
+    """Return (count_fn, description)."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(encoding_name)
+        return (lambda text: len(encoding.encode(text))), f"tiktoken/{encoding_name}"
+    except Exception:
+        return (lambda text: max(1, len(text) // 4)), "chars/4 estimate (tiktoken not available)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt size of the intraday table encodings")
+    parser.add_argument("--date", help="Trading day (YYYY-MM-DD); default: last day in the Indian market data")
+    parser.add_argument("--slots", help="Comma-separated slots (HH:MM); default: every hourly slot")
+    parser.add_argument("--symbols", help="Comma-separated symbols; default: NIFTY 50")
+    parser.add_argument("--encoding", default="o200k_base", help="tiktoken encoding (default: o200k_base)")
+    parser.add_argument("--show", action="store_true", help="Print each format's table for the last slot")
+    args = parser.parse_args()
+
+    store = get_market_store("in")
+    if not store.timestamps:
+        print("❌ No Indian market data found")
+        sys.exit(1)
+    date = args.date or store.timestamps[-1].split(" ")[0]
+    symbols = args.symbols.split(",") if args.symbols else all_nifty_50_symbols
+    slots = [f"{s}:00" for s in args.slots.split(",")] if args.slots else NSE_HOURLY_SLOTS
+    count_tokens, counter_name = get_token_counter(args.encoding)
+
+    totals = {fmt: {"chars": 0, "tokens": 0, "render_ms": 0.0} for fmt in INTRADAY_FORMATS}
+    context = None
+    tables = {}
+    for slot in slots:
+        today_date = f"{date} {slot}"
+        context = IntradayContext.for_slot(context, today_date, symbols, market="in")
+        for fmt in INTRADAY_FORMATS:
+            started = time.perf_counter()
+            table = context.render(symbols, fmt=fmt)
+            totals[fmt]["render_ms"] += (time.perf_counter() - started) * 1000
+            totals[fmt]["chars"] += len(table)
+            totals[fmt]["tokens"] += count_tokens(table)
+            tables[fmt] = table
+
+    print(f"📊 {date}, {len(slots)} slot(s), {len(symbols)} symbols — tokens via {counter_name}")
+    print(f"{'format':<10} {'chars/slot':>11} {'tokens/slot':>12} {'vs ohlc':>8} {'render ms':>10}")
+    baseline = totals["ohlc"]["tokens"] or 1
+    for fmt in INTRADAY_FORMATS:
+        t = totals[fmt]
+        print(
+            f"{fmt:<10} {t['chars'] / len(slots):>11.0f} {t['tokens'] / len(slots):>12.0f} "
+            f"{t['tokens'] / baseline * 100:>7.0f}% {t['render_ms'] / len(slots):>10.2f}"
+        )
+
+    if args.show:
+        for fmt in INTRADAY_FORMATS:
+            print(f"\n===== {fmt} ({date} {slots[-1][:5]}) =====")
+            print(tables[fmt])
+
+
+if __name__ == "__main__":
+    main()
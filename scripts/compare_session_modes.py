@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compare Session Modes
+Summarizes log/session_stats.jsonl of two or more hourly runs (e.g. the same model
+run once with session_mode "per_slot" and once with "continuous", or with
+decision_mode "tool_loop" vs "single_shot", over the same date range) on model
+calls, tokens, cached tokens, context size and latency per slot. "new chars" is the
+part of the context that is not an unchanged prefix of an earlier call, i.e. what
+a prefix-caching provider has to process afresh.
+
+Usage:
+    python scripts/compare_session_modes.py gpt-4o-per-slot gpt-4o-continuous
+    python scripts/compare_session_modes.py sig_a sig_b --log-path ./data/agent_data_in
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+COLUMNS = ("model_calls", "tool_calls", "input_tokens", "cached_tokens", "output_tokens", "context_chars", "new_context_chars", "steps", "elapsed_s")
+
+
+def load_session_stats(log_path: Path, signature: str) -> List[Dict[str, Any]]:
+    """Read one signature's session_stats.jsonl (last record wins for slots that were retried)."""
+    stats_file = log_path / signature / "log" / "session_stats.jsonl"
+    if not stats_file.exists():
+        print(f"❌ {stats_file} not found")
+        return []
+    by_date: Dict[str, Dict[str, Any]] = {}
+    with stats_file.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                by_date[record["date"]] = record
+    return [by_date[d] for d in sorted(by_date)]
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    slots = len(records)
+    summary = {
+        "slots": slots,
+        "modes": sorted({f"{r.get('session_mode', '?')}/{r.get('decision_mode', 'tool_loop')}" for r in records}),
+    }
+    summary["continued"] = sum(1 for r in records if r.get("session") == "continued")
+    for column in COLUMNS:
+        total = sum(r.get(column, 0) or 0 for r in records)
+        summary[column] = total
+        summary[f"{column}_per_slot"] = total / slots if slots else 0.0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare hourly session and decision modes")
+    parser.add_argument("signatures", nargs="+", help="Agent signatures to compare")
+    parser.add_argument("--log-path", default="./data/agent_data", help="log_path of the runs (default: ./data/agent_data)")
+    parser.add_argument("--common-dates", action="store_true", help="Only compare slots present in every run")
+    args = parser.parse_args()
+
+    log_path = Path(args.log_path)
+    runs = {sig: load_session_stats(log_path, sig) for sig in args.signatures}
+    if not any(runs.values()):
+        sys.exit(1)
+    if args.common_dates:
+        common = set.intersection(*({r["date"] for r in records} for records in runs.values()))
+        runs = {sig: [r for r in records if r["date"] in common] for sig, records in runs.items()}
+
+    summaries = {sig: summarize(records) for sig, records in runs.items()}
+    baseline_sig = args.signatures[0]
+    baseline = summaries[baseline_sig]
+
+    print(f"{'signature':<28} {'mode':<22} {'slots':>5} {'cont.':>5} {'calls/slot':>10} {'tools/slot':>10} {'in tok/slot':>12} {'cached/slot':>12} "
+          f"{'out tok/slot':>12} {'ctx chars/slot':>15} {'new chars/slot':>15} {'s/slot':>7} {'in tok vs ' + baseline_sig[:10]:>22}")
+    for sig, s in summaries.items():
+        vs = (
+            f"{s['input_tokens_per_slot'] / baseline['input_tokens_per_slot'] * 100:.0f}%"
+            if baseline["input_tokens_per_slot"] else "n/a"
+        )
+        print(f"{sig:<28} {','.join(s['modes']):<22} {s['slots']:>5} {s['continued']:>5} "
+              f"{s['model_calls_per_slot']:>10.2f} {s['tool_calls_per_slot']:>10.2f} "
+              f"{s['input_tokens_per_slot']:>12.0f} {s['cached_tokens_per_slot']:>12.0f} "
+              f"{s['output_tokens_per_slot']:>12.0f} {s['context_chars_per_slot']:>15.0f} "
+              f"{s['new_context_chars_per_slot']:>15.0f} "
+              f"{s['elapsed_s_per_slot']:>7.2f} {vs:>22}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,17 @@ Output:
 """
 
 import os
+import sys
 import json
 import hashlib
 from pathlib import Path
 from datetime import datetime
 import yaml
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools.online_metrics import OnlineMetrics, default_periods_per_year, get_live_metrics_file
+
 
 def get_data_version_hash(market_config):
     """
@@ -187,6 +192,60 @@ def get_closing_price(symbol, date, price_data, market='us'):
         return None
 
 
+def load_live_metrics_snapshot(agent_folder, market_config, asset_history):
+    """
+    Metrics for the frontend: the agent's persisted live_metrics.json when present
+    (no recomputation), else folded once over the asset history with OnlineMetrics.
+    """
+    data_dir = market_config.get('data_dir', 'agent_data')
+    metrics_file = get_live_metrics_file(Path(__file__).parent.parent / 'docs' / 'data' / data_dir / agent_folder)
+    if metrics_file.exists():
+        try:
+            with open(metrics_file, 'r') as f:
+                return json.load(f).get('metrics', {})
+        except Exception as e:
+            print(f"    Warning: Failed to read {metrics_file}: {e}")
+
+    accumulator = OnlineMetrics()
+    for point in asset_history:
+        if point['value'] is not None:
+            accumulator.update(point['date'], point['value'])
+    return accumulator.metrics(default_periods_per_year(asset_history[0]['date'] if asset_history else None))
+
+
+def attach_benchmark_metrics(agents_data, market_config):
+    """
+    Add 'benchmarkMetrics' (alpha, beta, tracking error, IR, up/down capture) to each
+    agent, computed for all agents at once by tools/benchmark_analytics.py.
+    """
+    benchmark_file = market_config.get('benchmark_file')
+    benchmark_path = Path(__file__).parent.parent / 'docs' / 'data' / benchmark_file if benchmark_file else None
+    if benchmark_path is None or not benchmark_path.exists():
+        print("    Benchmark file not found, skipping benchmark-relative metrics")
+        return
+    try:
+        # numpy/pandas are only needed here; the rest of the cache builds without them
+        from tools.benchmark_analytics import benchmark_analytics, load_benchmark
+    except ImportError as e:
+        print(f"    {e}, skipping benchmark-relative metrics")
+        return
+    try:
+        benchmark = load_benchmark(benchmark_path)
+    except Exception as e:
+        print(f"    Warning: Failed to load benchmark {benchmark_path}: {e}")
+        return
+
+    navs = {}
+    for agent_name, agent_data in agents_data.items():
+        history = [h for h in agent_data.get('assetHistory', []) if h['value'] is not None]
+        if history:
+            navs[agent_name] = ([h['date'] for h in history], [h['value'] for h in history])
+    results = benchmark_analytics(navs, benchmark)
+    for agent_name, metrics in results.items():
+        agents_data[agent_name]['benchmarkMetrics'] = metrics
+    print(f"  Benchmark-relative metrics for {len(results)} agents")
+
+
 def calculate_asset_value(position, date, price_data, market='us'):
     """Calculate total asset value for a position on a given date."""
     total_value = position['positions'].get('CASH', 0)
@@ -263,7 +322,8 @@ def process_agent_data_us(agent_config, market_config):
         'assetHistory': asset_history,
         'initialValue': asset_history[0]['value'] if asset_history else 10000,
         'currentValue': asset_history[-1]['value'] if asset_history else 0,
-        'return': ((asset_history[-1]['value'] - asset_history[0]['value']) / asset_history[0]['value'] * 100) if asset_history else 0
+        'return': ((asset_history[-1]['value'] - asset_history[0]['value']) / asset_history[0]['value'] * 100) if asset_history else 0,
+        'liveMetrics': load_live_metrics_snapshot(agent_folder, market_config, asset_history)
     }
 
     print(f"    ✓ {len(positions)} positions, {len(asset_history)} data points")
@@ -346,7 +406,8 @@ def process_agent_data_cn(agent_config, market_config, price_cache):
             'assetHistory': asset_history,
             'initialValue': asset_history[0]['value'] if asset_history else 10000,
             'currentValue': asset_history[-1]['value'] if asset_history else 0,
-            'return': ((asset_history[-1]['value'] - asset_history[0]['value']) / asset_history[0]['value'] * 100) if asset_history else 0
+            'return': ((asset_history[-1]['value'] - asset_history[0]['value']) / asset_history[0]['value'] * 100) if asset_history else 0,
+            'liveMetrics': load_live_metrics_snapshot(agent_folder, market_config, asset_history)
         }
 
         print(f"    ✓ {len(result['positions'])} positions, {len(asset_history)} data points (hourly)")
@@ -400,7 +461,8 @@ def process_agent_data_cn(agent_config, market_config, price_cache):
         'assetHistory': asset_history,
         'initialValue': asset_history[0]['value'] if asset_history else 10000,
         'currentValue': asset_history[-1]['value'] if asset_history else 0,
-        'return': ((asset_history[-1]['value'] - asset_history[0]['value']) / asset_history[0]['value'] * 100) if asset_history else 0
+        'return': ((asset_history[-1]['value'] - asset_history[0]['value']) / asset_history[0]['value'] * 100) if asset_history else 0,
+        'liveMetrics': load_live_metrics_snapshot(agent_folder, market_config, asset_history)
     }
 
     print(f"    ✓ {len(positions)} positions, {len(asset_history)} data points")
@@ -636,6 +698,8 @@ def generate_cache_for_market(market_id, market_config, config):
                 if result:
                     agents_data[agent_config['folder']] = result
 
+        attach_benchmark_metrics(agents_data, market_config)
+
         # Process benchmark (pass agents_data for initial value matching)
         benchmark_data = process_benchmark_us(market_config, agents_data)
         if benchmark_data:
@@ -654,6 +718,8 @@ def generate_cache_for_market(market_id, market_config, config):
                 if result:
                     agents_data[agent_config['folder']] = result
 
+        attach_benchmark_metrics(agents_data, market_config)
+
         # Process benchmark (pass agents_data for initial value matching and date range filtering)
         benchmark_data = process_benchmark_cn(market_config, agents_data)
         if benchmark_data:
@@ -661,7 +727,7 @@ def generate_cache_for_market(market_id, market_config, config):
 
     # Create cache object
     # Add a manual version prefix to force cache invalidation when data structure changes
-    CACHE_FORMAT_VERSION = 'v4'  # Increment this when changing data structure (v4: fixed hourly SSE-50 benchmark)
+    CACHE_FORMAT_VERSION = 'v6'  # Increment this when changing data structure (v6: per-agent benchmarkMetrics)
     cache = {
         'version': f"{CACHE_FORMAT_VERSION}_{version}",
         'generatedAt': datetime.now().isoformat(),
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Serve Live Metrics
+Small JSON endpoint for a live dashboard during long runs. It returns the
+metrics each agent keeps in <signature>/position/live_metrics.json (see
+tools/online_metrics.py), read as-is on every request, so nothing is recomputed.
+
+Usage:
+    python scripts/serve_live_metrics.py
+    python scripts/serve_live_metrics.py --log-path ./data/agent_data_in --port 8890
+
+Endpoints:
+    GET /api/live-metrics              {signature: {"updated_at", "metrics"}} for every agent
+    GET /api/live-metrics/<signature>  One agent's {"updated_at", "metrics"}
+"""
+
+import argparse
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from tools.online_metrics import LIVE_METRICS_FILE
+
+ROUTE = "/api/live-metrics"
+
+
+def read_live_metrics(log_path: Path, signature: str):
+    """Metrics snapshot of one signature, None if it has none yet."""
+    metrics_file = log_path / signature / "position" / LIVE_METRICS_FILE
+    try:
+        with metrics_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return {"updated_at": data.get("updated_at"), "metrics": data.get("metrics", {})}
+
+
+def make_handler(log_path: Path):
+    class LiveMetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlparse(self.path).path.rstrip("/")
+            if path == ROUTE:
+                body = {}
+                for metrics_file in sorted(log_path.glob(f"*/position/{LIVE_METRICS_FILE}")):
+                    snapshot = read_live_metrics(log_path, metrics_file.parents[1].name)
+                    if snapshot is not None:
+                        body[metrics_file.parents[1].name] = snapshot
+                return self._send(200, body)
+            if path.startswith(ROUTE + "/"):
+                signature = unquote(path[len(ROUTE) + 1:])
+                snapshot = read_live_metrics(log_path, signature) if "/" not in signature else None
+                if snapshot is None:
+                    return self._send(404, {"error": f"no live metrics for '{signature}'"})
+                return self._send(200, snapshot)
+            return self._send(404, {"error": f"unknown path, use {ROUTE}"})
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            # The dashboard is served from a different port (scripts/start_ui.sh)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return LiveMetricsHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve live_metrics.json of running agents as JSON")
+    parser.add_argument("--log-path", default="./data/agent_data", help="log_path of the runs (default: ./data/agent_data)")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8890, help="Port (default: 8890)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(Path(args.log_path)))
+    print(f"📈 Live metrics at http://{args.host}:{args.port}{ROUTE} (log path {args.log_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
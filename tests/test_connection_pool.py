@@ -0,0 +1,76 @@
+"""
+ConnectionPoolManager keeps one MCP session per HTTP tool server: agents that
+load the same server share its tools, and calls reuse keep-alive connections
+instead of opening one per call.
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from tools.connection_pool import ConnectionPoolManager
+
+CALLS = 10
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def math_server_url():
+    """tool_math.py as main.py's runners start it (start_mcp_services.py), on a free port."""
+    port = _free_port()
+    env = dict(os.environ, MATH_HTTP_PORT=str(port), FASTMCP_JSON_RESPONSE="true")
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(project_root, "agent_tools", "tool_math.py")],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 20
+        while True:
+            try:
+                socket.create_connection(("localhost", port), timeout=0.5).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.time() > deadline:
+                    pytest.skip("math MCP server did not start")
+                time.sleep(0.2)
+        yield f"http://localhost:{port}/mcp"
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def test_mcp_session_shared_and_connections_reused(math_server_url):
+    config = {"math": {"transport": "streamable_http", "url": math_server_url}}
+
+    async def run():
+        async with ConnectionPoolManager(concurrency=1) as pool:
+            # Two agents loading the same server get the tools of one session
+            first = await pool.get_mcp_tools(config)
+            second = await pool.get_mcp_tools(config)
+            assert [id(t) for t in first] == [id(t) for t in second]
+
+            add = next(t for t in first if t.name == "add")
+            for i in range(CALLS):
+                assert float(await add.ainvoke({"a": i, "b": 1})) == i + 1
+            return pool.stats()
+
+    stats = asyncio.run(run())
+    assert stats["mcp_sessions"] == 1
+    # initialize + list_tools + one request per call, over a handful of connections
+    assert stats["mcp"]["requests"] >= CALLS + 2
+    assert stats["mcp"]["connections"] <= 3
+    assert stats["mcp"]["reuse_rate"] > 0.5
@@ -0,0 +1,52 @@
+"""
+In-process tools run sync tool functions off the event loop, inside the calling
+task's runtime_context: a slow buy/sell in one agent must not stall the others.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from fastmcp import FastMCP
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from agent_tools.inprocess_tools import _to_langchain_tool
+from tools.general_tools import get_config_value, runtime_context, write_config_value
+
+mcp = FastMCP("TestTools")
+
+
+@mcp.tool()
+def slow_trade(seconds: float) -> str:
+    """Blocks like a trade's file lock + ledger write, then marks the session as traded."""
+    time.sleep(seconds)
+    write_config_value("IF_TRADE", True)
+    return get_config_value("SIGNATURE")
+
+
+def test_sync_tool_does_not_block_event_loop():
+    async def run():
+        tools = await mcp.get_tools()
+        tool = _to_langchain_tool("test", tools["slow_trade"])
+        ticks = []
+
+        async def ticker():
+            for _ in range(10):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        with runtime_context(SIGNATURE="agent-a", IF_TRADE=False) as context:
+            start = time.monotonic()
+            result, _ = await asyncio.gather(tool.ainvoke({"seconds": 0.3}), ticker())
+            return result, context, start, ticks
+
+    result, context, start, ticks = asyncio.run(run())
+    # The tool saw its task's runtime_context, and its writes landed there
+    assert result == "agent-a"
+    assert context["IF_TRADE"] is True
+    # The other coroutine kept running while the tool slept
+    assert sum(1 for t in ticks if t - start < 0.3) >= 5
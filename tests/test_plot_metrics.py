@@ -0,0 +1,122 @@
+"""
+calculate_rolling_metrics (cumulative sums, O(n)) must reproduce the original
+per-row expanding loops (O(n²)) for CR, SR, Vol and MDD, NaNs included, on the
+repo's agent ledgers valued into portfolio_values.csv, hourly and daily.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("seaborn")
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from tools.calculate_metrics import (calculate_portfolio_values, ledger_symbols, load_all_price_files,
+                                     load_position_data)
+from tools.plot_metrics import calculate_rolling_metrics, load_portfolio_data
+
+AGENT_DATA = Path(project_root) / "data" / "agent_data"
+PRICE_DIR = Path(project_root) / "docs" / "data"
+# US agents: hourly ledgers, valued with the daily price files in docs/data
+AGENTS = ["claude-3.7-sonnet", "deepseek-v3", "gemini-2.5-flash", "gpt-5", "MiniMax-M2", "qwen3-max"]
+METRICS = ["CR", "SR", "Vol", "MDD"]
+
+
+def reference_rolling_metrics(df, is_hourly=True):
+    """The original implementation of calculate_rolling_metrics (expanding windows, one row at a time)."""
+    df['returns'] = df['total_value'].pct_change()
+
+    initial_value = df['total_value'].iloc[0]
+    df['CR'] = (df['total_value'] - initial_value) / initial_value * 100
+
+    periods_per_year = 252 * 6.5 if is_hourly else 252
+    sortino_ratios = []
+    min_periods = 10 if is_hourly else 3
+    for i in range(len(df)):
+        if i < min_periods:
+            sortino_ratios.append(np.nan)
+            continue
+        returns_so_far = df['returns'].iloc[1:i+1].dropna()
+        if len(returns_so_far) < min_periods:
+            sortino_ratios.append(np.nan)
+            continue
+        negative_returns = returns_so_far[returns_so_far < 0]
+        if len(negative_returns) > 0:
+            downside_std = max(negative_returns.std(), 0.0001)
+            sortino = np.clip((returns_so_far.mean() / downside_std) * np.sqrt(periods_per_year), -20, 20)
+        else:
+            sortino = 20 if returns_so_far.mean() > 0 else 0
+        sortino_ratios.append(sortino)
+    df['SR'] = sortino_ratios
+
+    volatilities = []
+    for i in range(len(df)):
+        if i < 2:
+            volatilities.append(np.nan)
+            continue
+        returns_so_far = df['returns'].iloc[1:i+1].dropna()
+        if len(returns_so_far) < 2:
+            volatilities.append(np.nan)
+            continue
+        volatilities.append(returns_so_far.std() * np.sqrt(periods_per_year) * 100)
+    df['Vol'] = volatilities
+
+    cumulative = (1 + df['returns'].fillna(0)).cumprod()
+    running_max = cumulative.expanding().max()
+    df['MDD'] = (cumulative - running_max) / running_max * 100
+    return df
+
+
+@pytest.fixture(scope="module")
+def portfolio_dirs(tmp_path_factory):
+    """<agent>/position/portfolio_values.csv per agent and frequency, as calculate_metrics.py writes them."""
+    positions = {agent: load_position_data(AGENT_DATA / agent / "position" / "position.jsonl") for agent in AGENTS}
+    symbols = set().union(*(ledger_symbols(p) for p in positions.values()))
+    price_data = load_all_price_files(PRICE_DIR, symbols=symbols)
+    if not price_data:
+        pytest.skip(f"no price files in {PRICE_DIR}")
+
+    root = tmp_path_factory.mktemp("agent_data")
+    dirs = {}
+    for agent, ledger in positions.items():
+        hourly = calculate_portfolio_values(ledger, price_data, verbose=False)
+        daily = hourly.groupby(hourly["date"].dt.normalize(), as_index=False).last()
+        daily["date"] = daily["date"].dt.normalize()
+        for frequency, df in (("hourly", hourly), ("daily", daily)):
+            agent_dir = root / frequency / agent
+            (agent_dir / "position").mkdir(parents=True)
+            df.to_csv(agent_dir / "position" / "portfolio_values.csv", index=False)
+            dirs[(agent, frequency)] = agent_dir
+    return dirs
+
+
+def _compare(df, is_hourly):
+    expected = reference_rolling_metrics(df.copy(), is_hourly)
+    actual = calculate_rolling_metrics(df.copy(), is_hourly)
+    for metric in METRICS:
+        np.testing.assert_array_equal(np.isnan(actual[metric]), np.isnan(expected[metric]), err_msg=metric)
+        np.testing.assert_allclose(actual[metric], expected[metric], rtol=1e-9, atol=1e-9, equal_nan=True,
+                                   err_msg=metric)
+
+
+@pytest.mark.parametrize("frequency", ["hourly", "daily"])
+@pytest.mark.parametrize("agent", AGENTS)
+def test_rolling_metrics_match_reference(portfolio_dirs, agent, frequency):
+    df = load_portfolio_data(portfolio_dirs[(agent, frequency)])
+    assert len(df) > 10
+    _compare(df, frequency == "hourly")
+
+
+@pytest.mark.parametrize("frequency", ["hourly", "daily"])
+def test_rolling_metrics_match_reference_with_missing_values(portfolio_dirs, frequency):
+    df = load_portfolio_data(portfolio_dirs[("deepseek-v3", frequency)])
+    # A missing value early and one mid-series: its return and the next are NaN
+    df.loc[[4, len(df) // 2], "total_value"] = np.nan
+    _compare(df, frequency == "hourly")
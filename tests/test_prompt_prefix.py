@@ -0,0 +1,131 @@
+"""
+The static system prompt prefix must stay byte-identical across slots (provider
+prompt caching) and carry no session data: every prompt starts with its prefix,
+and no date, position or price of the rendered sessions appears in it.
+"""
+
+import os
+import sys
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import prompts.agent_prompt as agent_prompt
+import prompts.agent_prompt_astock as agent_prompt_astock
+import prompts.agent_prompt_crypto as agent_prompt_crypto
+
+# Two sessions with different dates, holdings, cash and prices
+SLOTS = [
+    {
+        "hourly": "2025-06-03 10:15:00",
+        "daily": "2025-06-03",
+        "positions": {"RELIANCE": 13, "CASH": 81234.57},
+        "price": 1437.21,
+        "close": 1429.83,
+    },
+    {
+        "hourly": "2025-07-18 14:15:00",
+        "daily": "2025-07-18",
+        "positions": {"TCS": 29, "CASH": 5678.91},
+        "price": 3316.47,
+        "close": 3298.06,
+    },
+]
+SYMBOLS = ["RELIANCE", "TCS"]
+
+
+class _IntradayStub:
+    def __init__(self, slot):
+        self.slot = slot
+
+    def render(self, symbols, fmt="ohlc"):
+        return "\n".join(f"{sym} | {self.slot['close']} → {self.slot['price']}" for sym in symbols)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Point every prompt module's data sources at the slot being rendered."""
+    current = {}
+
+    def positions(today_date, signature):
+        return dict(current["slot"]["positions"])
+
+    def open_prices(today_date, symbols, merged_path=None, market="us"):
+        return {f"{sym}_price": current["slot"]["price"] for sym in symbols}
+
+    def open_and_close(today_date, symbols, merged_path=None, market="us"):
+        return ({f"{sym}_price": current["slot"]["close"] for sym in symbols},
+                {f"{sym}_price": current["slot"]["close"] for sym in symbols})
+
+    for module in (agent_prompt, agent_prompt_astock, agent_prompt_crypto):
+        monkeypatch.setattr(module, "get_today_init_position", positions)
+        monkeypatch.setattr(module, "get_open_prices", open_prices)
+        monkeypatch.setattr(module, "get_yesterday_open_and_close_price", open_and_close)
+    monkeypatch.setattr(agent_prompt_astock, "get_yesterday_profit", lambda *args: {"RELIANCE": 7.43})
+    monkeypatch.setattr(agent_prompt_astock, "format_price_dict_with_names", lambda prices, market="cn": prices)
+    monkeypatch.setattr(agent_prompt, "load_orders",
+                        lambda signature: [{"id": 1, "type": "stop", "symbol": "RELIANCE",
+                                            "trigger_price": current["slot"]["close"], "amount": 0}])
+    monkeypatch.setattr(agent_prompt, "load_memory", lambda signature: {})
+
+    def use(slot):
+        current["slot"] = slot
+        return slot
+
+    return use
+
+
+def _render(kind, slot):
+    if kind == "us-hourly":
+        return agent_prompt.get_agent_system_prompt(slot["hourly"], "sig", market="us", stock_symbols=SYMBOLS)
+    if kind == "in-hourly":
+        return agent_prompt.get_agent_system_prompt(slot["hourly"], "sig", market="in", stock_symbols=SYMBOLS,
+                                                    intraday_context=_IntradayStub(slot), agent_memory=True)
+    if kind == "in-hourly-single-shot":
+        return agent_prompt.get_agent_system_prompt(slot["hourly"], "sig", market="in", stock_symbols=SYMBOLS,
+                                                    intraday_context=_IntradayStub(slot), agent_memory=True,
+                                                    decision_mode="single_shot")
+    if kind == "astock":
+        return agent_prompt_astock.get_agent_system_prompt_astock(slot["daily"], "sig", stock_symbols=SYMBOLS)
+    return agent_prompt_crypto.get_agent_system_prompt_crypto(slot["daily"], "sig", crypto_symbols=SYMBOLS)
+
+
+PREFIXES = {
+    "us-hourly": lambda: agent_prompt.get_agent_system_prompt_prefix("us", hourly=True),
+    "in-hourly": lambda: agent_prompt.get_agent_system_prompt_prefix("in", hourly=True, agent_memory=True),
+    "in-hourly-single-shot": lambda: agent_prompt.get_agent_system_prompt_prefix(
+        "in", hourly=True, agent_memory=True, decision_mode="single_shot"),
+    "astock": agent_prompt_astock.get_agent_system_prompt_astock_prefix,
+    "crypto": agent_prompt_crypto.get_agent_system_prompt_crypto_prefix,
+}
+
+
+@pytest.mark.parametrize("kind", sorted(PREFIXES))
+def test_prefix_stable_across_slots(session, kind):
+    prefix = PREFIXES[kind]()
+    prompts = [_render(kind, session(slot)) for slot in SLOTS]
+
+    for prompt, slot in zip(prompts, SLOTS):
+        assert prompt.startswith(prefix)
+        # The session's data is rendered, but only after the prefix
+        assert slot["daily"] in prompt[len(prefix):]
+        assert str(slot["positions"]["CASH"]) in prompt[len(prefix):]
+
+    # Both sessions share at least the whole prefix
+    assert os.path.commonprefix(prompts).startswith(prefix)
+
+    for slot in SLOTS:
+        for text in (slot["daily"], slot["hourly"].split(" ")[1][:5], str(slot["positions"]["CASH"]),
+                     str(slot["price"]), str(slot["close"])):
+            assert text not in prefix
+        for symbol, amount in slot["positions"].items():
+            assert f"'{symbol}': {amount}" not in prefix
+
+
+def test_single_shot_prefix_has_no_tool_loop_instructions():
+    prefix = PREFIXES["in-hourly-single-shot"]()
+    for text in ("get_price_local", "30 steps", agent_prompt.STOP_SIGNAL, "<MEMORY>", "`place_stop`"):
+        assert text not in prefix
@@ -0,0 +1,156 @@
+"""
+Cross-session memory of open trade theses per signature.
+
+Notes live next to the ledger in
+../data/agent_data/{signature}/position/memory.json, one bounded record per held
+symbol (thesis, entry, stop, target, last review). They are shown in the system
+prompt at the start of each session and updated from the <MEMORY>{...}</MEMORY>
+block of the session's final message.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tools.general_tools import get_config_value
+
+# Bounds that keep the prompt section small
+MAX_NOTES = 20
+MAX_THESIS_CHARS = 240
+NOTE_PRICE_FIELDS = ("entry", "stop", "target")
+
+_MEMORY_BLOCK = re.compile(r"<MEMORY>\s*(.*?)\s*</MEMORY>", re.DOTALL)
+
+
+def get_memory_file(signature: str) -> Path:
+    """Path of the memory file for a signature (same LOG_PATH rules as position.jsonl)."""
+    base_dir = Path(__file__).resolve().parents[1]
+    log_path = get_config_value("LOG_PATH", "./data/agent_data")
+    if os.path.isabs(log_path):
+        return Path(log_path) / signature / "position" / "memory.json"
+    if log_path.startswith("./data/"):
+        log_path = log_path[7:]  # Remove "./data/" prefix
+    return base_dir / "data" / log_path / signature / "position" / "memory.json"
+
+
+def load_memory(signature: str) -> Dict[str, Dict[str, Any]]:
+    """Return {symbol: note} for a signature; empty if there is no memory yet."""
+    path = get_memory_file(signature)
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            notes = json.load(f).get("notes", {})
+    except Exception:
+        return {}
+    return notes if isinstance(notes, dict) else {}
+
+
+def _write_memory(signature: str, notes: Dict[str, Dict[str, Any]]) -> None:
+    path = get_memory_file(signature)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({"notes": notes}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def parse_memory_block(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract the last <MEMORY>{...}</MEMORY> block from a model message
+
+    Returns:
+        {symbol: note or None}, or None if there is no valid block
+    """
+    matches = _MEMORY_BLOCK.findall(text or "")
+    if not matches:
+        return None
+    raw = matches[-1].strip()
+    if raw.startswith("```"):
+        raw = raw.strip("`").removeprefix("json").strip()
+    try:
+        updates = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    return updates if isinstance(updates, dict) else None
+
+
+def _clean_note(note: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Any]:
+    cleaned = dict(previous)
+    if "thesis" in note and note["thesis"] is not None:
+        cleaned["thesis"] = str(note["thesis"]).strip()[:MAX_THESIS_CHARS]
+    for field in NOTE_PRICE_FIELDS:
+        if field not in note:
+            continue
+        try:
+            cleaned[field] = None if note[field] is None else round(float(note[field]), 2)
+        except (TypeError, ValueError):
+            pass
+    return cleaned
+
+
+def update_memory(
+    signature: str,
+    updates: Optional[Dict[str, Any]],
+    positions: Dict[str, float],
+    review_date: str,
+) -> Dict[str, Any]:
+    """
+    Apply a session's memory updates and drop notes on symbols no longer held
+
+    Args:
+        signature: Model signature
+        updates: {symbol: {"thesis", "entry", "stop", "target"} or None to drop}; None for prune-only
+        positions: Positions after the session
+        review_date: Session timestamp, stored as last_review on updated notes
+
+    Returns:
+        {"updated": [...], "dropped": [...], "notes": count}
+    """
+    notes = load_memory(signature)
+    updated, dropped = [], []
+    for symbol, note in (updates or {}).items():
+        if note is None:
+            if notes.pop(symbol, None) is not None:
+                dropped.append(symbol)
+            continue
+        if not isinstance(note, dict):
+            continue
+        previous = notes.get(symbol, {"opened": review_date})
+        notes[symbol] = {**_clean_note(note, previous), "last_review": review_date}
+        updated.append(symbol)
+
+    for symbol in [s for s in notes if positions.get(s, 0) <= 0]:
+        notes.pop(symbol)
+        dropped.append(symbol)
+
+    if len(notes) > MAX_NOTES:
+        keep = sorted(notes, key=lambda s: notes[s].get("last_review", ""), reverse=True)[:MAX_NOTES]
+        dropped.extend(s for s in notes if s not in keep)
+        notes = {s: notes[s] for s in keep}
+
+    updated = [s for s in updated if s in notes]
+    if updated or dropped:
+        _write_memory(signature, notes)
+    return {"updated": updated, "dropped": dropped, "notes": len(notes)}
+
+
+def format_memory(notes: Dict[str, Dict[str, Any]]) -> str:
+    """One-line-per-holding summary for the system prompt."""
+    if not notes:
+        return "none"
+    lines: List[str] = []
+    for symbol in sorted(notes):
+        note = notes[symbol]
+        parts = [symbol]
+        for field in NOTE_PRICE_FIELDS:
+            if note.get(field) is not None:
+                parts.append(f"{field} {note[field]:.2f}")
+        parts.append(f"opened {note.get('opened', '?')}, reviewed {note.get('last_review', '?')}")
+        line = " | ".join(parts)
+        if note.get("thesis"):
+            line += f" | thesis: {note['thesis']}"
+        lines.append(line)
+    return "\n  ".join(lines)
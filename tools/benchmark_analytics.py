@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark-relative analytics: alpha, beta, tracking error, information ratio
+and up/down capture of every agent against one benchmark.
+
+The aligned-returns engine joins all agents' NAV series on one trading calendar
+(the union of their timestamps) and attaches the benchmark close as of each
+timestamp (pd.merge_asof, last bar at or before it); each agent's returns are
+paired with the benchmark's over the same intervals. With a daily benchmark, intraday
+NAVs are taken at each day's last value, since the benchmark's close is only
+known at the end of the day. The statistics are then computed for all agents at
+once on the (periods, agents) return matrix, each agent over the periods where
+both its return and the benchmark's are defined.
+
+Used by this CLI, bootstrap_ci.py and scripts/precompute_frontend_cache.py.
+
+Usage:
+    python tools/benchmark_analytics.py --agent-data data/agent_data --benchmark docs/data/daily_prices_QQQ.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Project root on the path, so tools.* imports work when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from tools.calculate_metrics import _is_intraday, _series_arrays, _time_series, get_periods_per_year, load_price_data
+
+RELATIVE_METRICS = ['Alpha', 'Beta', 'Correlation', 'Tracking Error', 'Information Ratio',
+                    'Up Capture', 'Down Capture', 'Excess Return', 'Periods']
+
+
+def load_benchmark(benchmark_file):
+    """
+    Closes of a benchmark price file (Alpha Vantage format, as written by data/get_*_price.py)
+
+    Returns:
+        (Series of closes indexed by timestamp, sorted; whether the bars are intraday)
+    """
+    series = _time_series(load_price_data(benchmark_file))
+    if series is None:
+        raise ValueError(f"no time series in {benchmark_file}")
+    time_series_key, time_series = series
+    keys, closes = _series_arrays(time_series)
+    closes = pd.Series(closes, index=pd.to_datetime(keys)).dropna()
+    return closes, _is_intraday(time_series_key)
+
+
+def aligned_navs(navs, benchmark):
+    """
+    Join NAV series and a benchmark on one calendar with as-of semantics
+
+    Args:
+        navs: {name: (dates, values)}; dates as 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' strings
+        benchmark: (closes, intraday) from load_benchmark
+
+    Returns:
+        (DataFrame of NAVs indexed by the calendar, one column per name and NaN where a
+        series has no point; benchmark closes on the calendar, NaN before its first bar)
+    """
+    closes, benchmark_intraday = benchmark
+    columns = {}
+    for name, (dates, values) in navs.items():
+        nav = pd.Series(np.asarray(values, dtype=float), index=pd.to_datetime(pd.Index(dates))).dropna()
+        nav = nav[~nav.index.duplicated(keep='last')].sort_index()
+        if not benchmark_intraday:
+            nav = nav.groupby(nav.index.normalize()).last()
+        if len(nav):
+            columns[name] = nav
+    if not columns:
+        return pd.DataFrame(), np.array([])
+
+    wide = pd.DataFrame(columns).sort_index()
+    calendar = pd.DataFrame({'ts': wide.index})
+    benchmark_frame = pd.DataFrame({'ts': closes.index, 'close': closes.to_numpy()})
+    joined = pd.merge_asof(calendar, benchmark_frame, on='ts', direction='backward')
+    return wide, joined['close'].to_numpy(dtype=float)
+
+
+def aligned_returns(wide, benchmark_closes):
+    """
+    Period returns of every NAV column and of the benchmark over the same intervals
+
+    A column's return at a calendar point is taken from its own previous point, and the
+    benchmark's return over that same interval is paired with it, so each agent's
+    statistics do not depend on which other agents share the calendar.
+
+    Returns:
+        (agent returns, benchmark returns), both of shape (periods, agents); NaN where
+        the column has no point or no previous point
+    """
+    values = wide.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    rows = np.arange(len(values))[:, None]
+    last_valid = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    previous = np.full(values.shape, -1)
+    previous[1:] = last_valid[:-1]
+    has_previous = valid & (previous >= 0)
+    prev_rows = np.maximum(previous, 0)
+    cols = np.arange(values.shape[1])[None, :]
+    closes = np.asarray(benchmark_closes, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        agent_returns = np.where(has_previous, values / values[prev_rows, cols] - 1, np.nan)
+        benchmark_returns = np.where(has_previous, closes[:, None] / closes[prev_rows] - 1, np.nan)
+    return agent_returns, benchmark_returns
+
+
+def calendar_strings(index):
+    """Calendar timestamps in the ledger's format (dates only when no point has a time of day)."""
+    if len(index) and (index == index.normalize()).all():
+        return index.strftime('%Y-%m-%d').to_numpy()
+    return index.strftime('%Y-%m-%d %H:%M:%S').to_numpy()
+
+
+def relative_metrics(agent_returns, benchmark_returns, periods_per_year=252):
+    """
+    Benchmark-relative statistics of every column of a (periods, agents) return matrix
+
+    benchmark_returns is either one column shared by all agents or a matrix of the
+    same shape (from aligned_returns). Each column uses the periods where both it and
+    the benchmark have a return.
+    Standard deviations are population ones, as in calculate_metrics. Alpha and
+    excess return are annualized arithmetically; up/down capture is the ratio of the
+    agent's to the benchmark's geometric mean return over the periods the benchmark
+    rose / fell.
+
+    Returns:
+        {metric: array of shape (agents,)} for RELATIVE_METRICS (NaN where undefined)
+    """
+    a = np.asarray(agent_returns, dtype=float)
+    b = np.asarray(benchmark_returns, dtype=float)
+    b = np.broadcast_to(b[:, None] if b.ndim == 1 else b, a.shape)
+    mask = ~np.isnan(a) & ~np.isnan(b)
+    n = mask.sum(axis=0)
+    a0, b0 = np.where(mask, a, 0.0), np.where(mask, b, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_a, mean_b = a0.sum(axis=0) / n, b0.sum(axis=0) / n
+        da, db = np.where(mask, a - mean_a, 0.0), np.where(mask, b - mean_b, 0.0)
+        cov = (da * db).sum(axis=0) / n
+        var_a, var_b = (da * da).sum(axis=0) / n, (db * db).sum(axis=0) / n
+        beta = np.where(var_b > 0, cov / var_b, np.nan)
+        correlation = np.where((var_a > 0) & (var_b > 0), cov / np.sqrt(var_a * var_b), np.nan)
+        alpha = (mean_a - beta * mean_b) * periods_per_year
+
+        active_mean = mean_a - mean_b
+        active_std = np.sqrt(np.clip(var_a + var_b - 2 * cov, 0, None))
+        tracking_error = active_std * np.sqrt(periods_per_year)
+        information_ratio = np.where(active_std > 0, active_mean * periods_per_year / tracking_error, np.nan)
+
+        def capture(side):
+            n_side = side.sum(axis=0)
+            geo_a = np.expm1(np.where(side, np.log1p(a0), 0.0).sum(axis=0) / n_side)
+            geo_b = np.expm1(np.where(side, np.log1p(b0), 0.0).sum(axis=0) / n_side)
+            return np.where((n_side > 0) & (geo_b != 0), geo_a / geo_b, np.nan)
+
+        up_capture = capture(mask & (b > 0))
+        down_capture = capture(mask & (b < 0))
+
+    return {
+        'Alpha': alpha,
+        'Beta': beta,
+        'Correlation': correlation,
+        'Tracking Error': tracking_error,
+        'Information Ratio': information_ratio,
+        'Up Capture': up_capture,
+        'Down Capture': down_capture,
+        'Excess Return': active_mean * periods_per_year,
+        'Periods': n.astype(float),
+    }
+
+
+def benchmark_analytics(navs, benchmark, is_crypto=False):
+    """
+    Benchmark-relative metrics of all NAV series in one pass
+
+    Args:
+        navs: {name: (dates, values)}
+        benchmark: (closes, intraday) from load_benchmark
+
+    Returns:
+        {name: {metric: value or None}}
+    """
+    wide, benchmark_closes = aligned_navs(navs, benchmark)
+    if wide.empty:
+        return {}
+    is_hourly = bool((wide.index != wide.index.normalize()).any())
+    periods_per_year = get_periods_per_year(is_hourly, is_crypto)
+    agent_returns, benchmark_returns = aligned_returns(wide, benchmark_closes)
+    metrics = relative_metrics(agent_returns, benchmark_returns, periods_per_year)
+    results = {}
+    for col, name in enumerate(wide.columns):
+        row = {}
+        for metric in RELATIVE_METRICS:
+            value = float(metrics[metric][col])
+            row[metric] = value if math.isfinite(value) else None
+        row['Periods'] = int(row['Periods'] or 0)
+        results[name] = row
+    return results
+
+
+def load_portfolio_navs(agent_data, agents=None):
+    """{signature: (dates, values)} of every <agent_data>/<signature>/position/portfolio_values.csv."""
+    navs = {}
+    for portfolio_file in sorted(Path(agent_data).glob('*/position/portfolio_values.csv')):
+        signature = portfolio_file.parents[1].name
+        if agents and signature not in agents:
+            continue
+        df = pd.read_csv(portfolio_file, usecols=['date', 'total_value'])
+        navs[signature] = (df['date'].astype(str).to_numpy(), df['total_value'].to_numpy(dtype=float))
+    return navs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alpha, beta, tracking error, IR and capture ratios vs a benchmark')
+    parser.add_argument('--agent-data', default='data/agent_data',
+                        help='Directory of <signature>/position/portfolio_values.csv (run calculate_metrics.py first)')
+    parser.add_argument('--benchmark', required=True, help='Benchmark price file (e.g. docs/data/daily_prices_QQQ.json)')
+    parser.add_argument('--agents', nargs='+', help='Only these signatures')
+    parser.add_argument('--is-crypto', action='store_true', help='Annualize daily series over 365 days')
+    args = parser.parse_args()
+
+    navs = load_portfolio_navs(args.agent_data, args.agents)
+    if not navs:
+        print(f"No portfolio_values.csv found under {args.agent_data}")
+        return
+    results = benchmark_analytics(navs, load_benchmark(args.benchmark), args.is_crypto)
+
+    agent_data = Path(args.agent_data)
+    summary = pd.DataFrame.from_dict(results, orient='index')[RELATIVE_METRICS]
+    summary.index.name = 'signature'
+    summary.to_csv(agent_data / 'benchmark_analytics.csv')
+    with open(agent_data / 'benchmark_analytics.json', 'w') as f:
+        json.dump({'benchmark': args.benchmark, 'agents': results}, f, indent=2)
+    pd.set_option('display.width', 200)
+    print(summary.to_string(float_format=lambda v: f'{v:.4f}'))
+    print(f"\nSaved to {agent_data / 'benchmark_analytics.csv'} and {agent_data / 'benchmark_analytics.json'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Bootstrap confidence intervals for agent performance against a benchmark.
+
+A single NAV path gives one noisy estimate of CR / Sortino. This resamples the
+period returns of each agent's portfolio_values.csv (written by
+calculate_metrics.py) with a stationary (Politis-Romano) or moving-block
+bootstrap, which keeps short-range dependence in the returns, and recomputes
+the metrics on every resample. The benchmark (QQQ, SSE 50, an NSE index or any
+other price file in the same format) is resampled with the same indices, so
+each resample is a paired comparison and P(outperform) is the share of
+resamples in which the agent beats the benchmark.
+
+All resamples of a batch are drawn and evaluated as (resamples, periods) NumPy
+arrays; there is no per-resample Python loop.
+
+Usage:
+    python tools/bootstrap_ci.py --agent-data data/agent_data --benchmark docs/data/daily_prices_QQQ.json
+    python tools/bootstrap_ci.py --agent-data data/agent_data_astock \\
+        --benchmark docs/data/A_stock/index_daily_sse_50.json --resamples 10000 --block-length 5
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Project root on the path, so tools.* imports work when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from tools.benchmark_analytics import aligned_navs, calendar_strings, load_benchmark
+from tools.calculate_metrics import calculate_metrics, get_periods_per_year
+
+METHODS = ('stationary', 'block')
+BOOTSTRAP_METRICS = ['CR', 'SR', 'Sharpe Ratio', 'Vol', 'MDD']
+# Metrics where a higher value beats the benchmark (MDD is negative, so higher is better too)
+OUTPERFORM_METRICS = ['CR', 'SR', 'Sharpe Ratio', 'MDD']
+# Resamples evaluated per array operation; bounds memory at batch x periods floats per array
+BATCH_SIZE = 1000
+
+
+def default_block_length(n):
+    """Mean block length rule of thumb: n ** (1/3), at least 1."""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def bootstrap_indices(n, resamples, block_length, method='stationary', rng=None):
+    """
+    Resampling indices of shape (resamples, n), built without a Python loop over resamples
+
+    stationary: a new block starts at each period with probability 1 / block_length
+    (geometric block lengths); block: a new block every block_length periods. Each
+    block starts at a uniformly drawn period and wraps around the end of the series.
+    """
+    rng = rng or np.random.default_rng()
+    t = np.arange(n)
+    if method == 'stationary':
+        new_block = rng.random((resamples, n)) < 1.0 / block_length
+        new_block[:, 0] = True
+    elif method == 'block':
+        new_block = np.broadcast_to(t % block_length == 0, (resamples, n))
+    else:
+        raise ValueError(f"method must be one of {METHODS}")
+    starts = rng.integers(0, n, size=(resamples, n))
+    # Period at which the current block began, for every (resample, period)
+    block_begin = np.maximum.accumulate(np.where(new_block, t, 0), axis=1)
+    block_start = np.take_along_axis(starts, block_begin, axis=1)
+    return (block_start + t - block_begin) % n
+
+
+def resampled_metrics(returns, periods_per_year=252, risk_free_rate=0.0):
+    """
+    calculate_metrics definitions evaluated along axis 1 of a (resamples, n) returns array
+
+    Returns:
+        {metric: array of shape (resamples,)} for BOOTSTRAP_METRICS
+    """
+    sqrt_ppy = np.sqrt(periods_per_year)
+    growth = np.cumprod(1 + returns, axis=1)
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1)
+    excess = mean - risk_free_rate / periods_per_year
+
+    negative = returns < 0
+    negative_count = negative.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        negative_mean = np.where(negative, returns, 0).sum(axis=1) / negative_count
+        downside_std = np.sqrt(np.where(negative, (returns - negative_mean[:, None]) ** 2, 0).sum(axis=1) / negative_count)
+        sharpe = np.where(std > 0, excess / std * sqrt_ppy, 0.0)
+        sortino = np.where(downside_std > 0, excess / downside_std * sqrt_ppy, 0.0)
+    sortino = np.where(negative_count > 0, sortino, np.where(mean > 0, np.inf, 0.0))
+
+    running_max = np.maximum.accumulate(growth, axis=1)
+    return {
+        'CR': growth[:, -1] - 1,
+        'SR': sortino,
+        'Sharpe Ratio': sharpe,
+        'Vol': std * sqrt_ppy if returns.shape[1] > 1 else np.zeros(len(returns)),
+        'MDD': ((growth - running_max) / running_max).min(axis=1),
+    }
+
+
+def bootstrap(returns, benchmark_returns=None, resamples=5000, block_length=None, method='stationary',
+              periods_per_year=252, risk_free_rate=0.0, seed=None):
+    """
+    Bootstrap distributions of the metrics of one return series (and a paired benchmark)
+
+    Args:
+        returns: Period returns of the agent
+        benchmark_returns: Benchmark returns on the same periods, resampled with the same indices
+
+    Returns:
+        (agent {metric: samples}, benchmark {metric: samples} or None)
+    """
+    returns = np.asarray(returns, dtype=float)
+    n = len(returns)
+    block_length = block_length or default_block_length(n)
+    rng = np.random.default_rng(seed)
+    agent, benchmark = {m: [] for m in BOOTSTRAP_METRICS}, {m: [] for m in BOOTSTRAP_METRICS}
+    for batch_start in range(0, resamples, BATCH_SIZE):
+        idx = bootstrap_indices(n, min(BATCH_SIZE, resamples - batch_start), block_length, method, rng)
+        for metric, values in resampled_metrics(returns[idx], periods_per_year, risk_free_rate).items():
+            agent[metric].append(values)
+        if benchmark_returns is not None:
+            benchmark_values = resampled_metrics(np.asarray(benchmark_returns, dtype=float)[idx],
+                                                 periods_per_year, risk_free_rate)
+            for metric, values in benchmark_values.items():
+                benchmark[metric].append(values)
+    agent = {m: np.concatenate(v) for m, v in agent.items()}
+    if benchmark_returns is None:
+        return agent, None
+    return agent, {m: np.concatenate(v) for m, v in benchmark.items()}
+
+
+def _finite_or_none(value):
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def confidence_interval(samples, confidence=0.95):
+    """(lower, upper) percentile interval; inverted CDF, so infinite Sortino samples are kept."""
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(samples, [alpha, 1 - alpha], method='inverted_cdf')
+    return _finite_or_none(lower), _finite_or_none(upper)
+
+
+def paired_navs(portfolio_df, benchmark=None):
+    """
+    Agent NAV and benchmark closes on common periods (benchmark_analytics.aligned_navs)
+
+    With a daily benchmark, an intraday NAV is taken at each day's last value (the
+    benchmark's close is only known at the end of the day). Benchmark closes are the
+    last bar at or before each period; periods before the first bar are dropped.
+
+    Returns:
+        (dates, agent values, benchmark closes or None)
+    """
+    df = portfolio_df[['date', 'total_value']].dropna()
+    dates = df['date'].astype(str).to_numpy()
+    values = df['total_value'].to_numpy(dtype=float)
+    if benchmark is None:
+        return dates, values, None
+    wide, benchmark_closes = aligned_navs({'agent': (dates, values)}, benchmark)
+    keep = ~np.isnan(benchmark_closes)
+    return calendar_strings(wide.index)[keep], wide['agent'].to_numpy()[keep], benchmark_closes[keep]
+
+
+def analyze_agent(portfolio_file, benchmark=None, resamples=5000, block_length=None, method='stationary',
+                  confidence=0.95, is_crypto=False, risk_free_rate=0.0, seed=None):
+    """
+    Bootstrap report of one agent's portfolio_values.csv
+
+    Returns:
+        Dict with point estimates, confidence intervals and (with a benchmark)
+        P(outperform) per metric and the CI of the CR difference
+    """
+    portfolio_df = pd.read_csv(portfolio_file)
+    dates, values, benchmark_closes = paired_navs(portfolio_df, benchmark)
+    if len(values) < 3:
+        raise ValueError(f"only {len(values)} usable NAV points")
+    is_hourly = ' ' in dates[0]
+    periods_per_year = get_periods_per_year(is_hourly, is_crypto)
+    returns = np.diff(values) / values[:-1]
+    benchmark_returns = None if benchmark_closes is None else np.diff(benchmark_closes) / benchmark_closes[:-1]
+    block_length = block_length or default_block_length(len(returns))
+
+    agent, bench = bootstrap(returns, benchmark_returns, resamples, block_length, method,
+                             periods_per_year, risk_free_rate, seed)
+    point = calculate_metrics(pd.DataFrame({'date': dates, 'total_value': values}), periods_per_year, risk_free_rate)
+    report = {
+        'date_range': f"{dates[0]} to {dates[-1]}",
+        'periods': len(returns),
+        'periods_per_year': periods_per_year,
+        'method': method,
+        'block_length': block_length,
+        'resamples': resamples,
+        'confidence': confidence,
+        'metrics': {
+            metric: {
+                'point': _finite_or_none(point[metric]),
+                'ci': confidence_interval(agent[metric], confidence),
+                'median': _finite_or_none(np.quantile(agent[metric], 0.5, method='inverted_cdf')),
+            }
+            for metric in BOOTSTRAP_METRICS
+        },
+    }
+    if bench is not None:
+        benchmark_point = calculate_metrics(pd.DataFrame({'date': dates, 'total_value': benchmark_closes}),
+                                            periods_per_year, risk_free_rate)
+        report['benchmark'] = {
+            metric: {
+                'point': _finite_or_none(benchmark_point[metric]),
+                'ci': confidence_interval(bench[metric], confidence),
+            }
+            for metric in BOOTSTRAP_METRICS
+        }
+        report['p_outperform'] = {metric: float(np.mean(agent[metric] > bench[metric])) for metric in OUTPERFORM_METRICS}
+        report['excess_cr_ci'] = confidence_interval(agent['CR'] - bench['CR'], confidence)
+    return report
+
+
+def summary_row(signature, report):
+    """Flat summary row of one agent's report."""
+    row = {'signature': signature, 'periods': report['periods']}
+    for metric in ('CR', 'SR'):
+        stats = report['metrics'][metric]
+        row[metric] = stats['point']
+        row[f'{metric} low'], row[f'{metric} high'] = stats['ci']
+    for metric, p in report.get('p_outperform', {}).items():
+        row[f'P({metric} > bench)'] = p
+    if 'excess_cr_ci' in report:
+        row['Excess CR low'], row['Excess CR high'] = report['excess_cr_ci']
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bootstrap confidence intervals of agent metrics vs a benchmark')
+    parser.add_argument('--agent-data', default='data/agent_data',
+                        help='Directory of <signature>/position/portfolio_values.csv (run calculate_metrics.py first)')
+    parser.add_argument('--benchmark', help='Benchmark price file (e.g. docs/data/daily_prices_QQQ.json)')
+    parser.add_argument('--agents', nargs='+', help='Only these signatures')
+    parser.add_argument('--resamples', type=int, default=5000, help='Bootstrap resamples per agent (default: 5000)')
+    parser.add_argument('--block-length', type=int, help='Mean (stationary) or fixed (block) block length (default: n^(1/3))')
+    parser.add_argument('--method', choices=METHODS, default='stationary', help='Bootstrap scheme (default: stationary)')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level (default: 0.95)')
+    parser.add_argument('--is-crypto', action='store_true', help='Annualize daily series over 365 days')
+    parser.add_argument('--risk-free-rate', type=float, default=0.0, help='Annual risk-free rate')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    benchmark = load_benchmark(args.benchmark) if args.benchmark else None
+    agent_data = Path(args.agent_data)
+    rows = []
+    for portfolio_file in sorted(agent_data.glob('*/position/portfolio_values.csv')):
+        signature = portfolio_file.parents[1].name
+        if args.agents and signature not in args.agents:
+            continue
+        try:
+            report = analyze_agent(portfolio_file, benchmark, args.resamples, args.block_length, args.method,
+                                   args.confidence, args.is_crypto, args.risk_free_rate, args.seed)
+        except Exception as e:
+            print(f"⚠️  {signature}: {e}")
+            continue
+        if args.benchmark:
+            report['benchmark_file'] = args.benchmark
+        with open(portfolio_file.parent / 'bootstrap_ci.json', 'w') as f:
+            json.dump(report, f, indent=2)
+        rows.append(summary_row(signature, report))
+
+    if not rows:
+        print(f"No portfolio_values.csv found under {agent_data}")
+        return
+    summary = pd.DataFrame(rows).set_index('signature')
+    summary.to_csv(agent_data / 'bootstrap_summary.csv')
+    pd.set_option('display.width', 200)
+    print(summary.to_string(float_format=lambda v: f'{v:.4f}'))
+    print(f"\n{len(rows)} agents, {args.resamples} {args.method} resamples each, in {time.perf_counter() - started:.2f}s; "
+          f"reports saved as <signature>/position/bootstrap_ci.json and {agent_data / 'bootstrap_summary.csv'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,15 +7,34 @@ Metrics:
 - SR (Sortino Ratio): Risk-adjusted return using downside deviation
 - Vol (Volatility): Annualized standard deviation of returns
 - MDD (Maximum Drawdown): Largest peak-to-trough decline
+- Trading friction from the action log: turnover, fees by category, gross vs. net P&L,
+  round-trip returns and holding periods (tools/trade_analytics.py)
+
+Usage:
+    python tools/calculate_metrics.py data/agent_data/gpt-5/position/position.jsonl --data-dir data
+    python tools/calculate_metrics.py metrics-all --agent-data data/agent_data --data-dir data
 """
 
+import itertools
 import json
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 import argparse
 
+# Project root on the path, so tools.* imports work when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from tools.trade_analytics import analyze_trades
+
 
 def load_position_data(position_file):
     """Load position data from JSONL file."""
@@ -33,6 +52,30 @@ def load_price_data(price_file):
     return data
 
 
+TIME_SERIES_KEYS = ['Time Series (60min)', 'Time Series (Daily)', 'Time Series (Hourly)']
+
+
+def _time_series(symbol_data):
+    """Return (time series key, time series) of a symbol's price file, or None."""
+    if not symbol_data:
+        return None
+    for key in TIME_SERIES_KEYS:
+        if key in symbol_data:
+            return key, symbol_data[key]
+    return None
+
+
+def _is_intraday(time_series_key):
+    return 'min' in time_series_key or 'Hourly' in time_series_key
+
+
+def _bar_price(bar, is_crypto=False):
+    """Close of one bar ('sell price' for crypto, '4. close' otherwise, each falling back to the other), or None."""
+    primary, fallback = ('4. sell price', '4. close') if is_crypto else ('4. close', '4. sell price')
+    price_str = bar.get(primary, bar.get(fallback))
+    return float(price_str) if price_str else None
+
+
 def get_price_at_date(price_data, symbol, date_str, is_crypto=False):
     """
     Get the price for a symbol at a specific date/datetime.
@@ -46,62 +89,107 @@ def get_price_at_date(price_data, symbol, date_str, is_crypto=False):
     Returns:
         Price as float, or None if not found
     """
-    if symbol not in price_data:
+    series = _time_series(price_data.get(symbol))
+    if series is None:
         return None
+    time_series_key, time_series = series
 
-    symbol_data = price_data[symbol]
+    # Hourly data matches full timestamps, daily data just the date part
+    lookup = date_str if _is_intraday(time_series_key) else date_str.split(' ')[0]
 
-    # Determine the time series key (could be hourly, daily, etc.)
-    time_series_key = None
-    for key in ['Time Series (60min)', 'Time Series (Daily)', 'Time Series (Hourly)']:
-        if key in symbol_data:
-            time_series_key = key
-            break
+    # Exact match first, else the closest previous timestamp
+    if lookup not in time_series:
+        lookup = max((d for d in time_series if d <= lookup), default=None)
+        if lookup is None:
+            return None
+    return _bar_price(time_series[lookup], is_crypto)
 
-    if not time_series_key:
-        return None
 
-    time_series = symbol_data[time_series_key]
-
-    # For hourly data, try exact timestamp match first
-    if 'min' in time_series_key or 'Hourly' in time_series_key:
-        if date_str in time_series:
-            price_str = time_series[date_str].get('4. sell price' if is_crypto else '4. close',
-                                                    time_series[date_str].get('4. close'))
-            return float(price_str) if price_str else None
-
-        # Try to find the closest previous timestamp
-        available_dates = sorted([d for d in time_series.keys() if d <= date_str], reverse=True)
-        if available_dates:
-            closest_date = available_dates[0]
-            price_str = time_series[closest_date].get('4. sell price' if is_crypto else '4. close',
-                                                        time_series[closest_date].get('4. close'))
-            return float(price_str) if price_str else None
-    else:
-        # For daily data, extract just the date part
-        date_only = date_str.split(' ')[0]
-
-        # Try exact match first
-        if date_only in time_series:
-            price_str = time_series[date_only].get('4. sell price' if is_crypto else '4. close',
-                                                     time_series[date_only].get('4. close'))
-            return float(price_str) if price_str else None
-
-        # Try to find the closest previous date
-        available_dates = sorted([d for d in time_series.keys() if d <= date_only], reverse=True)
-        if available_dates:
-            closest_date = available_dates[0]
-            price_str = time_series[closest_date].get('4. sell price' if is_crypto else '4. close',
-                                                        time_series[closest_date].get('4. close'))
-            return float(price_str) if price_str else None
+# id(time series) -> (time series, sorted timestamps, closes); price files are parsed once per process
+_SERIES_ARRAYS = {}
 
-    return None
 
+def _series_arrays(time_series, is_crypto=False):
+    """Sorted timestamps and parsed closes (NaN where missing) of one time series, cached."""
+    cache_key = (id(time_series), is_crypto)
+    cached = _SERIES_ARRAYS.get(cache_key)
+    if cached is None or cached[0] is not time_series:
+        keys = sorted(time_series)
+        closes = np.array([_bar_price(time_series[k], is_crypto) for k in keys], dtype=float)
+        cached = (time_series, np.array(keys, dtype=str), closes)
+        _SERIES_ARRAYS[cache_key] = cached
+    return cached[1], cached[2]
 
-def load_all_price_files(data_dir, is_crypto=False, is_astock=False):
-    """Load all price files from a directory."""
-    price_data = {}
 
+def build_price_matrix(price_data, symbols, dates, is_crypto=False):
+    """
+    As-of prices for every (date, symbol) pair, with the same lookup rules as get_price_at_date.
+
+    Each symbol's series is sorted and parsed once (and reused by later calls on the same
+    price data); np.searchsorted then finds the last timestamp <= each date (forward fill)
+    instead of scanning the series for every lookup.
+
+    Args:
+        price_data: Dict of symbol -> price data
+        symbols: Column symbols
+        dates: Row dates ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS')
+        is_crypto: Whether this is crypto data (uses 'sell price' field)
+
+    Returns:
+        Array of shape (len(dates), len(symbols)); NaN where get_price_at_date returns None
+    """
+    dates = np.asarray(dates, dtype=str)
+    day_dates = np.array([d.split(' ')[0] for d in dates], dtype=str)
+    matrix = np.full((len(dates), len(symbols)), np.nan)
+    for col, symbol in enumerate(symbols):
+        series = _time_series(price_data.get(symbol))
+        if series is None:
+            continue
+        time_series_key, time_series = series
+        keys, closes = _series_arrays(time_series, is_crypto)
+        if not len(keys):
+            continue
+        query = dates if _is_intraday(time_series_key) else day_dates
+        idx = np.searchsorted(keys, query, side='right') - 1
+        found = idx >= 0
+        matrix[found, col] = closes[idx[found]]
+    return matrix
+
+
+def _price_file_keys(stem, is_crypto=False, is_astock=False):
+    """Keys a daily_prices_<stem>.json file is stored under in price_data."""
+    original_symbol = stem.replace('daily_prices_', '')
+    # For A-stock, remove the extra 'H' suffix (e.g., .SHH -> .SH)
+    symbol = original_symbol[:-1] if is_astock and original_symbol.endswith('HH') else original_symbol
+    keys = [symbol]
+    # Also store with original symbol for compatibility
+    if original_symbol != symbol:
+        keys.append(original_symbol)
+    # For crypto, also store with USDT suffix for compatibility
+    if is_crypto:
+        keys.append(f"{symbol}-USDT")
+    return keys
+
+
+def _load_json_file(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def load_all_price_files(data_dir, is_crypto=False, is_astock=False, symbols=None, max_workers=8):
+    """
+    Load price files from a directory.
+
+    Args:
+        data_dir: Directory containing daily_prices_*.json files
+        symbols: Only load the files of these symbols (e.g. the ones a position file ever
+            holds); None loads every file
+        max_workers: Threads reading files concurrently
+
+    Returns:
+        Dict of symbol -> price data; alias keys (original file name, SYMBOL-USDT for crypto)
+        refer to the same parsed object
+    """
     if is_crypto:
         # For crypto, data_dir should already point to the crypto folder
         price_dir = Path(data_dir) / 'coin'
@@ -114,75 +202,98 @@ def load_all_price_files(data_dir, is_crypto=False, is_astock=False):
     else:
         price_dir = Path(data_dir)
 
-    for price_file in price_dir.glob('daily_prices_*.json'):
-        # Extract symbol and normalize it
-        symbol = price_file.stem.replace('daily_prices_', '')
+    wanted = None if symbols is None else set(symbols)
+    files = {}
+    for price_file in sorted(price_dir.glob('daily_prices_*.json')):
+        keys = _price_file_keys(price_file.stem, is_crypto, is_astock)
+        if wanted is None or wanted.intersection(keys):
+            files[price_file] = keys
 
-        # For A-stock, remove the extra 'H' suffix (e.g., .SHH -> .SH)
-        if is_astock and symbol.endswith('HH'):
-            symbol = symbol[:-1]  # Remove one 'H'
+    price_data = {}
+    if not files:
+        return price_data
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files)))) as pool:
+        futures = [(price_file, pool.submit(_load_json_file, price_file)) for price_file in files]
+        for price_file, future in futures:
+            try:
+                data = future.result()
+            except Exception as e:
+                print(f"Warning: Could not load {price_file}: {e}")
+                continue
+            for key in files[price_file]:
+                price_data[key] = data
 
-        try:
-            with open(price_file, 'r') as f:
-                data = json.load(f)
-                price_data[symbol] = data
+    return price_data
 
-                # Also store with original symbol for compatibility
-                original_symbol = price_file.stem.replace('daily_prices_', '')
-                if original_symbol != symbol:
-                    price_data[original_symbol] = data
 
-                # For crypto, also store with USDT suffix for compatibility
-                if is_crypto:
-                    usdt_symbol = f"{symbol}-USDT"
-                    price_data[usdt_symbol] = data
+def load_price_store(merged_file, symbols=None):
+    """
+    Price data from a merged.jsonl price store (tools/market_store.py) instead of per-symbol files.
 
-        except Exception as e:
-            print(f"Warning: Could not load {price_file}: {e}")
+    The store is parsed once per process and its series are used as-is (no copies). Symbols
+    are resolved suffix-agnostically, so ledger symbols like RELIANCE match RELIANCE.NS.
 
+    Returns:
+        Dict of symbol -> {"Time Series (60min)" or "Time Series (Daily)": series}
+    """
+    from tools.market_store import get_store
+
+    store = get_store(Path(merged_file))
+    price_data = {}
+    for symbol in (store.series_by_symbol if symbols is None else symbols):
+        series = store.series(symbol, 'in')
+        if not series:
+            continue
+        intraday = any(' ' in ts for ts in itertools.islice(series, 1))
+        price_data[symbol] = {'Time Series (60min)' if intraday else 'Time Series (Daily)': series}
     return price_data
 
 
+def ledger_symbols(positions):
+    """Symbols that appear in a list of ledger records."""
+    return {symbol for entry in positions for symbol in entry['positions'] if symbol != 'CASH'}
+
+
 def calculate_portfolio_values(positions, price_data, is_crypto=False, verbose=True):
     """
     Calculate portfolio value at each timestamp.
 
+    Builds a (record x symbol) holdings matrix from the ledger and an as-of price matrix
+    over the ledger's timestamps (build_price_matrix); stock value is their row-wise dot product.
+
     Returns:
         DataFrame with columns: date, cash, stock_value, total_value
     """
-    portfolio_values = []
-    missing_prices = set()
+    dates = [entry['date'] for entry in positions]
+    symbols = sorted({symbol for entry in positions for symbol, amount in entry['positions'].items()
+                      if symbol != 'CASH' and amount != 0})
+    columns = {symbol: col for col, symbol in enumerate(symbols)}
+    cash = np.array([entry['positions'].get('CASH', 0) for entry in positions], dtype=float)
+    held = np.zeros((len(positions), len(symbols)))
+    for row, entry in enumerate(positions):
+        for symbol, amount in entry['positions'].items():
+            if amount and symbol in columns:
+                held[row, columns[symbol]] = amount
+
+    # Prices are looked up once per distinct timestamp
+    unique_dates, inverse = np.unique(np.asarray(dates, dtype=str), return_inverse=True)
+    prices = build_price_matrix(price_data, symbols, unique_dates, is_crypto)[inverse.reshape(-1)]
 
-    for entry in positions:
-        date = entry['date']
-        pos = entry['positions']
-
-        cash = pos.get('CASH', 0)
-        stock_value = 0
-
-        # Calculate value of all stock holdings
-        for symbol, amount in pos.items():
-            if symbol == 'CASH' or amount == 0:
-                continue
-
-            price = get_price_at_date(price_data, symbol, date, is_crypto)
-            if price is not None:
-                stock_value += amount * price
-            else:
-                if verbose and (symbol, date) not in missing_prices:
-                    print(f"Warning: No price found for {symbol} on {date}")
-                    missing_prices.add((symbol, date))
-
-        total_value = cash + stock_value
-
-        portfolio_values.append({
-            'date': date,
-            'cash': cash,
-            'stock_value': stock_value,
-            'total_value': total_value
-        })
-
-    df = pd.DataFrame(portfolio_values)
+    missing_prices = set()
+    for row, col in zip(*np.nonzero((held != 0) & np.isnan(prices))):
+        key = (symbols[col], dates[row])
+        if verbose and key not in missing_prices:
+            print(f"Warning: No price found for {key[0]} on {key[1]}")
+        missing_prices.add(key)
+
+    stock_value = np.einsum('ij,ij->i', held, np.nan_to_num(prices, nan=0.0))
+
+    df = pd.DataFrame({
+        'date': dates,
+        'cash': cash,
+        'stock_value': stock_value,
+        'total_value': cash + stock_value,
+    })
     df['date'] = pd.to_datetime(df['date'])
 
     if not verbose and missing_prices:
@@ -246,11 +357,9 @@ def calculate_metrics(portfolio_df, periods_per_year=252, risk_free_rate=0.0):
     avg_win = np.mean(returns[winning_periods]) if np.any(winning_periods) else 0
     avg_loss = np.mean(returns[~winning_periods]) if np.any(~winning_periods) else 0
 
-    # Calculate number of trades (excluding no_trade actions)
-    num_trades = 0
-    for i in range(1, len(portfolio_df)):
-        if portfolio_df.iloc[i]['total_value'] != portfolio_df.iloc[i-1]['total_value']:
-            num_trades += 1
+    # Calculate number of trades (excluding no_trade actions). The vectorized valuation sums
+    # in a different order than a per-record loop, so ignore sub-1e-9 rounding differences
+    num_trades = int(np.count_nonzero(~np.isclose(values[1:], values[:-1], rtol=0, atol=1e-9)))
 
     return {
         'CR': cr,
@@ -293,10 +402,167 @@ def detect_market_type(positions):
     return 'stock'
 
 
+def get_periods_per_year(is_hourly=False, is_crypto=False):
+    """Number of return periods per year used for annualization."""
+    if is_hourly:
+        # Approximately 252 trading days * 6.5 hours per day
+        return 252 * 6.5
+    if is_crypto:
+        # Crypto markets trade 365 days a year
+        return 365
+    # Traditional stock markets: 252 trading days per year
+    return 252
+
+
+def _serializable(metrics):
+    return {k: float(v) if isinstance(v, (np.integer, np.floating)) else v for k, v in metrics.items()}
+
+
+def save_agent_outputs(position_file, metrics, portfolio_df):
+    """Write performance_metrics.json and portfolio_values.csv next to a position file."""
+    output_file = Path(position_file).parent / 'performance_metrics.json'
+    with open(output_file, 'w') as f:
+        json.dump(_serializable(metrics), f, indent=2)
+    portfolio_csv = Path(position_file).parent / 'portfolio_values.csv'
+    portfolio_df.to_csv(portfolio_csv, index=False)
+    return output_file, portfolio_csv
+
+
+# Price data shared with metrics-all workers, keyed by (is_crypto, is_astock). Set in the
+# parent before the pool forks, so workers read it copy-on-write instead of reloading it.
+_SHARED_PRICE_DATA = {}
+
+SUMMARY_COLUMNS = ['CR', 'SR', 'Sharpe Ratio', 'Vol', 'MDD', 'Calmar Ratio', 'Annualized Return',
+                   'Win Rate', 'Initial Value', 'Final Value', 'Number of Trades', 'Total Positions',
+                   'Gross CR', 'Fee Drag', 'Turnover', 'Closed Trades', 'Date Range']
+
+
+def _evaluate_agent(task):
+    """metrics-all worker: value one ledger against the shared prices and write its per-agent files."""
+    position_file, kind, periods_per_year, risk_free_rate = task
+    agent = Path(position_file).parent.parent.name
+    started = time.perf_counter()
+    try:
+        positions = load_position_data(position_file)
+        portfolio_df = calculate_portfolio_values(positions, _SHARED_PRICE_DATA[kind], kind[0], verbose=False)
+        metrics = calculate_metrics(portfolio_df, periods_per_year, risk_free_rate)
+        metrics.update(analyze_trades(positions, portfolio_df=portfolio_df)[0])
+        save_agent_outputs(position_file, metrics, portfolio_df)
+    except Exception as e:
+        return {'agent': agent, 'error': f"{type(e).__name__}: {e}"}
+    return {'agent': agent, **_serializable(metrics), 'elapsed_s': round(time.perf_counter() - started, 3)}
+
+
+def metrics_all(agent_data, data_dir='data', workers=None, force_crypto=False, force_astock=False,
+                is_hourly=False, risk_free_rate=0.0, merged_file=None):
+    """
+    Evaluate every <agent_data>/*/position/position.jsonl with one price load
+
+    Prices of the symbols any agent held are loaded (and their series parsed) once per
+    market kind in this process; the agents are then valued in a fork-based process
+    pool that shares them copy-on-write. Each agent gets its usual
+    performance_metrics.json and portfolio_values.csv.
+
+    Args:
+        merged_file: Read prices from this merged.jsonl store instead of data_dir's price files
+
+    Returns:
+        List of per-agent summary rows, best CR first (failed agents last, with "error")
+    """
+    tasks, symbols_by_kind = [], {}
+    for position_file in sorted(Path(agent_data).glob('*/position/position.jsonl')):
+        positions = load_position_data(position_file)
+        if not positions:
+            continue
+        is_crypto = force_crypto or detect_market_type(positions) == 'crypto'
+        is_astock = force_astock or 'astock' in str(position_file).lower()
+        kind = (is_crypto, is_astock)
+        symbols_by_kind.setdefault(kind, set()).update(ledger_symbols(positions))
+        tasks.append((str(position_file), kind, get_periods_per_year(is_hourly, is_crypto), risk_free_rate))
+
+    for (is_crypto, is_astock), symbols in symbols_by_kind.items():
+        started = time.perf_counter()
+        if merged_file:
+            price_data = load_price_store(merged_file, symbols)
+        else:
+            price_data = load_all_price_files(data_dir, is_crypto, is_astock, symbols=symbols)
+        for symbol_data in price_data.values():
+            series = _time_series(symbol_data)
+            if series is not None:
+                _series_arrays(series[1], is_crypto)
+        _SHARED_PRICE_DATA[(is_crypto, is_astock)] = price_data
+        print(f"Loaded price data for {len(price_data)} symbols in {time.perf_counter() - started:.2f}s")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    can_fork = 'fork' in multiprocessing.get_all_start_methods()
+    if workers > 1 and can_fork:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            rows = list(pool.map(_evaluate_agent, tasks))
+    else:
+        # Without fork, workers would have to reload the prices; evaluate in this process instead
+        rows = [_evaluate_agent(task) for task in tasks]
+
+    return sorted(rows, key=lambda r: ('error' in r, -(r.get('CR') or 0.0)))
+
+
+def metrics_all_main(argv):
+    parser = argparse.ArgumentParser(
+        prog='calculate_metrics.py metrics-all',
+        description='Calculate metrics for every agent under an agent data directory with one price load',
+    )
+    parser.add_argument('--agent-data', default='data/agent_data', help='Directory with <agent>/position/position.jsonl')
+    parser.add_argument('--data-dir', default='data', help='Directory containing price data')
+    parser.add_argument('--merged-file', help='Read prices from a merged.jsonl price store instead of --data-dir')
+    parser.add_argument('--output-dir', help='Where to write metrics_summary.csv/json (default: --agent-data)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--is-crypto', action='store_true', help='Force crypto mode')
+    parser.add_argument('--is-astock', action='store_true', help='Force A-stock mode')
+    parser.add_argument('--is-hourly', action='store_true', help='Use hourly trading periods (affects annualization)')
+    parser.add_argument('--risk-free-rate', type=float, default=0.0, help='Annual risk-free rate (default: 0.0)')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rows = metrics_all(args.agent_data, args.data_dir, args.workers, args.is_crypto, args.is_astock,
+                       args.is_hourly, args.risk_free_rate, args.merged_file)
+    if not rows:
+        print(f"ERROR: No position files found under {args.agent_data}")
+        return
+
+    output_dir = Path(args.output_dir or args.agent_data)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary = pd.DataFrame(rows, columns=['agent'] + SUMMARY_COLUMNS + ['elapsed_s', 'error'])
+    summary = summary.astype({'Number of Trades': 'Int64', 'Total Positions': 'Int64', 'Closed Trades': 'Int64'})
+    summary.to_csv(output_dir / 'metrics_summary.csv', index=False)
+    with open(output_dir / 'metrics_summary.json', 'w') as f:
+        json.dump(rows, f, indent=2)
+
+    print("\n" + "="*86)
+    print(f"{'Agent':<28} {'CR':>9} {'SR':>8} {'Sharpe':>8} {'Vol':>8} {'MDD':>9} {'Trades':>7}")
+    print("-"*86)
+    for row in rows:
+        if 'error' in row:
+            print(f"{row['agent']:<28} ERROR: {row['error']}")
+            continue
+        print(f"{row['agent']:<28} {row['CR']*100:>8.2f}% {row['SR']:>8.2f} {row['Sharpe Ratio']:>8.2f} "
+              f"{row['Vol']*100:>7.2f}% {row['MDD']*100:>8.2f}% {row['Number of Trades']:>7}")
+    print("="*86)
+    print(f"{len(rows)} agents in {time.perf_counter() - started:.2f}s; summary saved to "
+          f"{output_dir / 'metrics_summary.csv'} and {output_dir / 'metrics_summary.json'}")
+
+
 def main():
-    parser = argparse.ArgumentParser(description='Calculate trading performance metrics')
+    if len(sys.argv) > 1 and sys.argv[1] == 'metrics-all':
+        return metrics_all_main(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(
+        description='Calculate trading performance metrics',
+        epilog='Use "metrics-all --help" to evaluate every agent under an agent data directory at once.',
+    )
     parser.add_argument('position_file', help='Path to position.jsonl file')
     parser.add_argument('--data-dir', default='data', help='Directory containing price data')
+    parser.add_argument('--merged-file', help='Read prices from a merged.jsonl price store instead of --data-dir')
+    parser.add_argument('--all-symbols', action='store_true',
+                        help='Load every price file, not only the symbols in the position file')
     parser.add_argument('--is-crypto', action='store_true', help='Force crypto mode')
     parser.add_argument('--is-astock', action='store_true', help='Force A-stock mode')
     parser.add_argument('--is-hourly', action='store_true', help='Use hourly trading periods (affects annualization)')
@@ -324,11 +590,17 @@ def main():
     print(f"Detected market type: {market_type}")
 
     # Load price data
-    print(f"Loading price data from {args.data_dir}...")
-    price_data = load_all_price_files(args.data_dir, is_crypto, is_astock)
+    symbols = None if args.all_symbols else ledger_symbols(positions)
+    if args.merged_file:
+        print(f"Loading price data from {args.merged_file}...")
+        price_data = load_price_store(args.merged_file, symbols)
+    else:
+        print(f"Loading price data from {args.data_dir}...")
+        price_data = load_all_price_files(args.data_dir, is_crypto, is_astock, symbols=symbols)
     print(f"Loaded price data for {len(price_data)} symbols")
 
-    if len(price_data) == 0:
+    # A ledger that only ever held cash needs no prices
+    if len(price_data) == 0 and (symbols is None or symbols):
         print("ERROR: No price data loaded! Check your --data-dir path.")
         print(f"Looking in: {args.data_dir}")
         if is_astock:
@@ -339,20 +611,12 @@ def main():
     print("Calculating portfolio values...")
     portfolio_df = calculate_portfolio_values(positions, price_data, is_crypto, args.verbose)
 
-    # Determine periods per year based on data frequency and market type
-    if args.is_hourly:
-        # Approximately 252 trading days * 6.5 hours per day
-        periods_per_year = 252 * 6.5
-    elif is_crypto:
-        # Crypto markets trade 365 days a year
-        periods_per_year = 365
-    else:
-        # Traditional stock markets: 252 trading days per year
-        periods_per_year = 252
+    periods_per_year = get_periods_per_year(args.is_hourly, is_crypto)
 
     # Calculate metrics
     print("Calculating metrics...")
     metrics = calculate_metrics(portfolio_df, periods_per_year, args.risk_free_rate)
+    metrics.update(analyze_trades(positions, portfolio_df=portfolio_df)[0])
 
     # Print results
     print("\n" + "="*60)
@@ -377,22 +641,22 @@ def main():
     print(f"  Win Rate:                  {metrics['Win Rate']*100:>8.2f}%")
     print(f"  Average Win:               {metrics['Average Win']*100:>8.2f}%")
     print(f"  Average Loss:              {metrics['Average Loss']*100:>8.2f}%")
+    print("-"*60)
+    print("TRADING FRICTION:")
+    print(f"  Traded Value:              {metrics['Traded Value']:>12,.2f}")
+    print(f"  Turnover:                  {metrics['Turnover']:>8.2f}x")
+    print(f"  Total Fees:                {metrics['Total Fees']:>12,.2f}")
+    print(f"  Gross CR (before fees):    {metrics['Gross CR']*100:>8.2f}%")
+    print(f"  Fee Drag:                  {metrics['Fee Drag']*100:>8.2f}%")
+    print(f"  Closed Trades:             {metrics['Closed Trades']:>8d}")
+    if metrics['Closed Trades']:
+        print(f"  Trade Win Rate (net):      {metrics['Trade Win Rate']*100:>8.2f}%")
+        print(f"  Avg Holding Days:          {metrics['Avg Holding Days']:>8.2f}")
     print("="*60)
 
-    # Save detailed results
-    output_file = Path(args.position_file).parent / 'performance_metrics.json'
-    with open(output_file, 'w') as f:
-        # Convert to serializable format
-        output_metrics = {k: float(v) if isinstance(v, (np.integer, np.floating)) else v
-                         for k, v in metrics.items()}
-        json.dump(output_metrics, f, indent=2)
+    output_file, portfolio_csv = save_agent_outputs(args.position_file, metrics, portfolio_df)
     print(f"\nDetailed metrics saved to {output_file}")
-
-    # Save portfolio values
-    portfolio_csv = Path(args.position_file).parent / 'portfolio_values.csv'
-    portfolio_df.to_csv(portfolio_csv, index=False)
     print(f"Portfolio values saved to {portfolio_csv}")
 
-
 if __name__ == '__main__':
     main()
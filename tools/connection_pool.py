@@ -0,0 +1,178 @@
+"""
+Connection pool manager for the runners.
+
+Hands out one shared keep-alive httpx client for model requests and one
+persistent MCP session per HTTP tool server, so agents running in the same
+process reuse TCP/TLS connections instead of opening new ones per call.
+main.py uses both; the in-process runner (main_parrallel.py --in-process)
+loads its tools directly and only uses the model client.
+"""
+
+import asyncio
+import importlib.util
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+
+class _CountingTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts requests and newly opened TCP connections."""
+
+    def __init__(self, stats: Dict[str, int], **kwargs: Any):
+        super().__init__(**kwargs)
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._stats["requests"] += 1
+        previous_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self._stats["connections"] += 1
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        return await super().handle_async_request(request)
+
+
+class ConnectionPoolManager:
+    """
+    Shared HTTP clients and MCP sessions for agents running in one process
+
+    Args:
+        concurrency: Number of agents expected to run at once; pool limits scale with it
+        timeout: Request timeout in seconds for model calls
+        keepalive_expiry: Seconds an idle connection is kept open
+    """
+
+    def __init__(self, concurrency: int = 4, timeout: float = 300.0, keepalive_expiry: float = 60.0):
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self.limits = httpx.Limits(
+            max_connections=self.concurrency * 4,
+            max_keepalive_connections=self.concurrency * 2,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._llm_stats = {"requests": 0, "connections": 0}
+        self._mcp_stats = {"requests": 0, "connections": 0}
+        self._llm_client: Optional[httpx.AsyncClient] = None
+        self._closing = asyncio.Event()
+        self._session_tasks: List[asyncio.Task] = []
+        self._mcp_tools: Dict[Tuple[str, str], List[Any]] = {}
+        self._mcp_lock = asyncio.Lock()
+
+    @property
+    def llm_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client for ChatOpenAI (HTTP/2 when the h2 package is installed)."""
+        if self._llm_client is None:
+            transport = _CountingTransport(self._llm_stats, http2=self.http2, limits=self.limits)
+            self._llm_client = httpx.AsyncClient(
+                transport=transport,
+                timeout=self.timeout,
+                limits=self.limits,
+            )
+        return self._llm_client
+
+    def _mcp_http_client_factory(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        auth: Optional[httpx.Auth] = None,
+    ) -> httpx.AsyncClient:
+        """httpx_client_factory for MCP streamable HTTP connections (same defaults as the mcp SDK)."""
+        transport = _CountingTransport(self._mcp_stats, limits=self.limits)
+        return httpx.AsyncClient(
+            transport=transport,
+            headers=headers,
+            timeout=timeout or httpx.Timeout(30.0),
+            auth=auth,
+            follow_redirects=True,
+            limits=self.limits,
+        )
+
+    async def get_mcp_tools(self, mcp_config: Dict[str, Dict[str, Any]]) -> List[Any]:
+        """
+        Load tools for every server in mcp_config over persistent sessions
+
+        Sessions are opened once per (server name, url) and kept open until aclose(),
+        so tool calls from all agents reuse them instead of opening a session per call.
+        """
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+
+        tools: List[Any] = []
+        async with self._mcp_lock:
+            for name, connection in mcp_config.items():
+                key = (name, str(connection.get("url", connection.get("command", ""))))
+                if key not in self._mcp_tools:
+                    connection = dict(connection)
+                    if connection.get("transport") == "streamable_http":
+                        connection.setdefault("httpx_client_factory", self._mcp_http_client_factory)
+                    client = MultiServerMCPClient({name: connection})
+                    ready: asyncio.Future = asyncio.get_running_loop().create_future()
+                    task = asyncio.create_task(self._hold_session(client, name, ready))
+                    self._session_tasks.append(task)
+                    self._mcp_tools[key] = await ready
+                tools.extend(self._mcp_tools[key])
+        return tools
+
+    async def _hold_session(self, client: Any, name: str, ready: asyncio.Future) -> None:
+        """Own one MCP session for the lifetime of the pool.
+
+        The session is entered and exited in this task because the transport's
+        cancel scopes must be closed by the task that opened them.
+        """
+        from langchain_mcp_adapters.tools import load_mcp_tools
+
+        try:
+            async with client.session(name) as session:
+                ready.set_result(await load_mcp_tools(session))
+                await self._closing.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            elif not isinstance(e, asyncio.CancelledError):
+                print(f"⚠️  MCP session '{name}' closed with error: {e}")
+
+    @staticmethod
+    def _summarize(stats: Dict[str, int]) -> Dict[str, Any]:
+        requests = stats["requests"]
+        connections = stats["connections"]
+        reuse_rate = (1 - connections / requests) if requests else 0.0
+        return {"requests": requests, "connections": connections, "reuse_rate": round(max(reuse_rate, 0.0), 4)}
+
+    def stats(self) -> Dict[str, Any]:
+        """Request/connection counts and connection reuse rate for model and MCP traffic."""
+        return {
+            "http2": self.http2,
+            "mcp_sessions": len(self._mcp_tools),
+            "llm": self._summarize(self._llm_stats),
+            "mcp": self._summarize(self._mcp_stats),
+        }
+
+    def report(self) -> None:
+        stats = self.stats()
+        print("🔌 Connection pool summary:")
+        print(f"   - HTTP/2: {'enabled' if stats['http2'] else 'unavailable (install h2)'}")
+        print(f"   - Persistent MCP sessions: {stats['mcp_sessions']}")
+        for label in ("llm", "mcp"):
+            s = stats[label]
+            print(f"   - {label.upper()}: {s['requests']} requests over {s['connections']} connections "
+                  f"(reuse rate {s['reuse_rate']:.1%})")
+
+    async def aclose(self) -> None:
+        self._closing.set()
+        if self._session_tasks:
+            await asyncio.gather(*self._session_tasks, return_exceptions=True)
+        self._session_tasks.clear()
+        self._mcp_tools.clear()
+        if self._llm_client is not None:
+            await self._llm_client.aclose()
+            self._llm_client = None
+
+    async def __aenter__(self) -> "ConnectionPoolManager":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
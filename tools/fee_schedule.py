@@ -0,0 +1,81 @@
+"""
+Indian market (NSE equity delivery) guardrails and fee schedule.
+
+Shared by the trade tools (agent_tools/tool_trade.py), which charge the fees,
+tools/trade_analytics.py, which reconstructs them from the ledger, and
+tools/replay.py, which re-executes a ledger under modified rules.
+"""
+
+# --- Indian Market Guardrails & Taxes ---
+MIN_TRADE_VALUE_INR = 2000.0  # Prevent DP charge eat-up
+DP_CHARGE_INR = 15.93         # Flat DP charge per sell action (inc. GST)
+STT_RATE = 0.001              # 0.1% for Equity Delivery (Buy & Sell)
+STAMP_DUTY_BUY_RATE = 0.00015 # 0.015% (Buy only)
+TRANS_CHARGE_RATE = 0.0000345 # 0.00345% (NSE)
+SEBI_CHARGE_RATE = 0.000001   # 0.0001% (SEBI)
+GST_RATE = 0.18               # 18% on Trans + SEBI
+POSITION_CAP_FRACTION = 0.40  # Per-stock cap: this share of current cash...
+POSITION_CAP_FLOOR_INR = 40000.0  # ...but at least this much
+# -------------------------------
+
+FEE_CATEGORIES = ("stt", "stamp", "trans", "sebi", "gst", "dp")
+
+# The schedule above as overridable keys (tools/replay.py rule variants)
+DEFAULT_SCHEDULE = {
+    "stt_rate": STT_RATE,
+    "stamp_duty_buy_rate": STAMP_DUTY_BUY_RATE,
+    "trans_charge_rate": TRANS_CHARGE_RATE,
+    "sebi_charge_rate": SEBI_CHARGE_RATE,
+    "gst_rate": GST_RATE,
+    "dp_charge": DP_CHARGE_INR,
+}
+
+
+def _schedule(schedule=None):
+    return DEFAULT_SCHEDULE if not schedule else {k: schedule.get(k, v) for k, v in DEFAULT_SCHEDULE.items()}
+
+
+def fee_rates(schedule=None):
+    """(buy, sell) turnover-proportional fee rates; the sell's DP charge is flat."""
+    s = _schedule(schedule)
+    stt, trans, sebi = s["stt_rate"], s["trans_charge_rate"], s["sebi_charge_rate"]
+    buy = stt + s["stamp_duty_buy_rate"] + trans + sebi + (trans + sebi) * s["gst_rate"]
+    sell = stt + trans + sebi + (trans + sebi) * s["gst_rate"]
+    return buy, sell
+
+
+BUY_FEE_RATE, SELL_FEE_RATE = fee_rates()
+
+
+def nse_fees(turnover, is_buy, schedule=None):
+    """
+    Fees of a trade by category
+
+    Works on scalars (one trade) and on NumPy arrays (many trades at once).
+
+    Args:
+        turnover: Price × shares
+        is_buy: True for a buy (stamp duty), False for a sell (DP charge)
+        schedule: Overrides of DEFAULT_SCHEDULE keys (other keys are ignored)
+
+    Returns:
+        {"stt", "stamp", "trans", "sebi", "gst", "dp", "total"}
+    """
+    s = _schedule(schedule)
+    buy = 1 * is_buy
+    stt = turnover * s["stt_rate"]
+    stamp = turnover * s["stamp_duty_buy_rate"] * buy
+    trans = turnover * s["trans_charge_rate"]
+    sebi = turnover * s["sebi_charge_rate"]
+    gst = (trans + sebi) * s["gst_rate"]
+    # DP Charge is applied once per sell action per stock
+    dp = s["dp_charge"] * (1 - buy)
+    return {
+        "stt": stt,
+        "stamp": stamp,
+        "trans": trans,
+        "sebi": sebi,
+        "gst": gst,
+        "dp": dp,
+        "total": stt + stamp + trans + sebi + gst + dp,
+    }
@@ -1,12 +1,36 @@
 import json
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, Iterator, Optional
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Per-task runtime config. When set (e.g. by the in-process concurrent runner),
+# get_config_value/write_config_value use this dict instead of RUNTIME_ENV_PATH,
+# so several agents can share one process without clobbering each other.
+_RUNTIME_CONTEXT: ContextVar[Optional[Dict[str, Any]]] = ContextVar("runtime_context", default=None)
+
+
+@contextmanager
+def runtime_context(**values: Any) -> Iterator[Dict[str, Any]]:
+    """Scope runtime config values to the current task/context instead of the shared env file.
+
+    Example:
+        >>> with runtime_context(SIGNATURE="gpt-5", MARKET="in"):
+        ...     get_config_value("SIGNATURE")
+        'gpt-5'
+    """
+    token = _RUNTIME_CONTEXT.set(dict(values))
+    try:
+        yield _RUNTIME_CONTEXT.get()
+    finally:
+        _RUNTIME_CONTEXT.reset(token)
+
+
 def _resolve_runtime_env_path() -> str:
     """Resolve runtime env path from RUNTIME_ENV_PATH in .env file.
     
@@ -48,6 +72,12 @@ def _load_runtime_env() -> dict:
 
 
 def get_config_value(key: str, default=None):
+    context = _RUNTIME_CONTEXT.get()
+    if context is not None:
+        if key in context:
+            return context[key]
+        return os.getenv(key, default)
+
     _RUNTIME_ENV = _load_runtime_env()
 
     if key in _RUNTIME_ENV:
@@ -56,6 +86,11 @@ def get_config_value(key: str, default=None):
 
 
 def write_config_value(key: str, value: Any):
+    context = _RUNTIME_CONTEXT.get()
+    if context is not None:
+        context[key] = value
+        return
+
     path = _resolve_runtime_env_path()
     if path is None:
         print(f"⚠️  WARNING: RUNTIME_ENV_PATH not set, config value '{key}' not persisted")
@@ -0,0 +1,224 @@
+"""
+Shared in-memory market data store.
+
+A merged.jsonl price file is parsed once per process and then served to
+prompts, agents and in-process tools.  The store is reloaded automatically
+when the underlying file changes on disk.
+"""
+
+import bisect
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """Convert a raw price field (e.g. "1,418.50") to float, None if unavailable."""
+    if value is None:
+        return None
+    try:
+        return float(str(value).replace(",", ""))
+    except Exception:
+        return None
+
+
+class MarketDataStore:
+    """
+    Parsed view of a merged.jsonl file
+
+    Holds, per symbol, the first "Time Series ..." mapping of each document, plus
+    sorted timestamp indexes used for previous-timestamp and trading-day lookups.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._loaded = False
+        self.series_by_symbol: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.names: Dict[str, str] = {}
+        self.daily_dates: set = set()
+        self.timestamps: List[str] = []
+        self._clean_symbols: Dict[str, str] = {}
+        self._datetimes: List[datetime] = []
+        self._symbol_order: List[str] = []
+        self._symbol_rows: Dict[str, int] = {}
+        self._timestamp_cols: Dict[str, int] = {}
+        self._matrices: Dict[str, np.ndarray] = {}
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def ensure_loaded(self) -> "MarketDataStore":
+        """Load the file on first use, or reload it if its mtime changed."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if self._loaded and mtime == self._mtime:
+            return self
+        with self._lock:
+            if not (self._loaded and mtime == self._mtime):
+                self._load(mtime)
+        return self
+
+    def _load(self, mtime: Optional[float]) -> None:
+        series_by_symbol: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        names: Dict[str, str] = {}
+        daily_dates: set = set()
+        all_timestamps: set = set()
+
+        if mtime is not None:
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        doc = json.loads(line)
+                    except Exception:
+                        continue
+                    if not isinstance(doc, dict):
+                        continue
+                    meta = doc.get("Meta Data", {}) or {}
+                    symbol = meta.get("2. Symbol")
+                    daily = doc.get("Time Series (Daily)")
+                    if isinstance(daily, dict):
+                        daily_dates.update(daily.keys())
+                    series = None
+                    for key, value in doc.items():
+                        if key.startswith("Time Series"):
+                            series = value
+                            break
+                    if not isinstance(series, dict):
+                        continue
+                    all_timestamps.update(series.keys())
+                    if not symbol:
+                        continue
+                    if meta.get("2.1. Name"):
+                        names[symbol] = meta["2.1. Name"]
+                    series_by_symbol.setdefault(symbol, {}).update(series)
+
+        datetimes = []
+        for ts in all_timestamps:
+            try:
+                datetimes.append(datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"))
+            except Exception:
+                continue
+
+        self.series_by_symbol = series_by_symbol
+        self.names = names
+        self.daily_dates = daily_dates
+        self.timestamps = sorted(all_timestamps)
+        self._clean_symbols = {sym.split(".")[0]: sym for sym in series_by_symbol}
+        self._datetimes = sorted(datetimes)
+        self._symbol_order = sorted(series_by_symbol)
+        self._symbol_rows = {sym: i for i, sym in enumerate(self._symbol_order)}
+        self._timestamp_cols = {ts: i for i, ts in enumerate(self.timestamps)}
+        self._matrices = {}
+        self._mtime = mtime
+        self._loaded = True
+
+    def resolve_symbol(self, symbol: str, market: str = "us") -> Optional[str]:
+        """Map a requested symbol to the key stored in the file (NSE symbols may carry a suffix)."""
+        self.ensure_loaded()
+        if symbol in self.series_by_symbol:
+            return symbol
+        if market == "in":
+            return self._clean_symbols.get(symbol)
+        return None
+
+    def series(self, symbol: str, market: str = "us") -> Optional[Dict[str, Dict[str, Any]]]:
+        resolved = self.resolve_symbol(symbol, market)
+        if resolved is None:
+            return None
+        return self.series_by_symbol.get(resolved)
+
+    def bar(self, symbol: str, timestamp: str, market: str = "us") -> Optional[Dict[str, Any]]:
+        series = self.series(symbol, market)
+        if not series:
+            return None
+        bar = series.get(timestamp)
+        return bar if isinstance(bar, dict) else None
+
+    def symbol_row(self, symbol: str, market: str = "us") -> Optional[int]:
+        """Row of a symbol in field_matrix(), None if the symbol is not in the file."""
+        resolved = self.resolve_symbol(symbol, market)
+        return None if resolved is None else self._symbol_rows.get(resolved)
+
+    def timestamp_col(self, timestamp: str) -> Optional[int]:
+        """Column of a timestamp in field_matrix() (index into self.timestamps)."""
+        self.ensure_loaded()
+        return self._timestamp_cols.get(timestamp)
+
+    def field_matrix(self, field: str) -> np.ndarray:
+        """
+        Dense float matrix of one bar field, e.g. "4. sell price"
+
+        Shape is (symbols, timestamps) with rows in sorted symbol order and columns
+        aligned with self.timestamps; missing bars are NaN. Built once per load.
+        """
+        self.ensure_loaded()
+        matrix = self._matrices.get(field)
+        if matrix is None:
+            with self._lock:
+                matrix = self._matrices.get(field)
+                if matrix is None:
+                    matrix = np.full((len(self._symbol_order), len(self.timestamps)), np.nan)
+                    cols = self._timestamp_cols
+                    for row, sym in enumerate(self._symbol_order):
+                        for ts, bar in self.series_by_symbol[sym].items():
+                            col = cols.get(ts)
+                            if col is None or not isinstance(bar, dict):
+                                continue
+                            value = parse_price(bar.get(field))
+                            if value is not None:
+                                matrix[row, col] = value
+                    self._matrices[field] = matrix
+        return matrix
+
+    def rows_for(self, symbols: List[str], market: str = "us") -> Tuple[List[str], np.ndarray]:
+        """(symbols present in the file, their row indices) for use with field_matrix()."""
+        present, rows = [], []
+        for sym in symbols:
+            row = self.symbol_row(sym, market)
+            if row is not None:
+                present.append(sym)
+                rows.append(row)
+        return present, np.array(rows, dtype=int)
+
+    def previous_datetime(self, dt: datetime) -> Optional[datetime]:
+        """Latest full timestamp strictly earlier than dt."""
+        self.ensure_loaded()
+        idx = bisect.bisect_left(self._datetimes, dt)
+        if idx == 0:
+            return None
+        return self._datetimes[idx - 1]
+
+    def has_timestamp_prefix(self, prefix: str) -> bool:
+        """True if any timestamp equals or starts with prefix (e.g. a YYYY-MM-DD date)."""
+        self.ensure_loaded()
+        if prefix in self.daily_dates:
+            return True
+        idx = bisect.bisect_left(self.timestamps, prefix)
+        return idx < len(self.timestamps) and self.timestamps[idx].startswith(prefix)
+
+
+_STORES: Dict[Path, MarketDataStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(path: Path) -> MarketDataStore:
+    """Return the process-wide store for a merged.jsonl path, loading it if needed."""
+    path = Path(path).resolve()
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = MarketDataStore(path)
+            _STORES[path] = store
+    return store.ensure_loaded()
@@ -0,0 +1,200 @@
+"""
+Incremental performance metrics, updated one NAV point at a time.
+
+OnlineMetrics keeps running moments (Welford) of the period returns and of the
+negative returns, the running peak and maximum drawdown, and win/trade counts,
+so CR, Sortino, Sharpe, volatility, MDD, Calmar and win rate are available after
+every slot without re-reading the ledger. The definitions match
+tools/calculate_metrics.py calculate_metrics (population standard deviations,
+Sortino on the standard deviation of negative returns, drawdown measured from
+the first return onwards).
+
+State and the latest metrics are persisted next to the ledger in
+{log_path}/{signature}/position/live_metrics.json.
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+LIVE_METRICS_FILE = "live_metrics.json"
+
+
+def get_live_metrics_file(data_path: str) -> Path:
+    """Path of the live metrics file for an agent data directory ({log_path}/{signature})."""
+    return Path(data_path) / "position" / LIVE_METRICS_FILE
+
+
+def default_periods_per_year(date: Optional[str], market: str = "us") -> float:
+    """Annualization used by calculate_metrics: hourly 252 * 6.5, crypto 365, else 252."""
+    if date and " " in date:
+        return 252 * 6.5
+    if market == "crypto":
+        return 365
+    return 252
+
+
+class RunningMoments:
+    """Count, mean and population variance of a stream (Welford's algorithm)"""
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.n) if self.n else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"n": self.n, "mean": self.mean, "m2": self.m2}
+
+
+class OnlineMetrics:
+    """Streaming version of calculate_metrics over a NAV series"""
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.points = state.get("points", 0)
+        self.first_date = state.get("first_date")
+        self.last_date = state.get("last_date")
+        self.initial_value = state.get("initial_value")
+        self.last_value = state.get("last_value")
+        self.trades = state.get("trades", 0)
+        self.wins = state.get("wins", 0)
+        self.win_sum = state.get("win_sum", 0.0)
+        self.loss_sum = state.get("loss_sum", 0.0)
+        # Cumulative growth (value / initial value) peak and worst drawdown from it
+        self.peak = state.get("peak")
+        self.max_drawdown = state.get("max_drawdown", 0.0)
+        self.returns = RunningMoments(**state.get("returns", {}))
+        self.downside = RunningMoments(**state.get("downside", {}))
+        # Last known price per symbol, used when a bar is missing at a NAV point
+        self.last_prices: Dict[str, float] = state.get("last_prices", {})
+
+    def update(self, date: str, value: float) -> bool:
+        """
+        Add one NAV point
+
+        Points at or before the last recorded date are ignored, so a retried or
+        resumed slot is not counted twice.
+
+        Returns:
+            True if the point was added
+        """
+        if self.last_date is not None and date <= self.last_date:
+            return False
+        if self.points == 0:
+            self.first_date, self.initial_value = date, value
+        else:
+            ret = (value - self.last_value) / self.last_value if self.last_value else 0.0
+            self.returns.update(ret)
+            if ret < 0:
+                self.downside.update(ret)
+            if ret > 0:
+                self.wins += 1
+                self.win_sum += ret
+            else:
+                self.loss_sum += ret
+            if value != self.last_value:
+                self.trades += 1
+            growth = value / self.initial_value if self.initial_value else 0.0
+            self.peak = growth if self.peak is None else max(self.peak, growth)
+            if self.peak:
+                self.max_drawdown = min(self.max_drawdown, (growth - self.peak) / self.peak)
+        self.points += 1
+        self.last_date, self.last_value = date, value
+        return True
+
+    def metrics(self, periods_per_year: float = 252, risk_free_rate: float = 0.0) -> Dict[str, Any]:
+        """Current metrics, same keys as calculate_metrics; non-finite values are None"""
+        if not self.points:
+            return {}
+        n = self.returns.n
+        cr = (self.last_value - self.initial_value) / self.initial_value if self.initial_value else 0.0
+        years = n / periods_per_year
+        annualized_return = (1 + cr) ** (1 / years) - 1 if years > 0 else 0
+        std = self.returns.std
+        excess_return = self.returns.mean - (risk_free_rate / periods_per_year)
+        sharpe = excess_return / std * math.sqrt(periods_per_year) if std > 0 else 0
+        if self.downside.n:
+            downside_std = self.downside.std
+            sortino = excess_return / downside_std * math.sqrt(periods_per_year) if downside_std > 0 else 0
+        else:
+            sortino = float("inf") if self.returns.mean > 0 else 0
+        mdd = self.max_drawdown
+        losses = n - self.wins
+        metrics = {
+            "CR": cr,
+            "Annualized Return": annualized_return,
+            "SR": sortino,
+            "Sharpe Ratio": sharpe,
+            "Vol": std * math.sqrt(periods_per_year) if n > 1 else 0,
+            "MDD": mdd,
+            "Calmar Ratio": annualized_return / abs(mdd) if mdd != 0 else 0,
+            "Win Rate": self.wins / n if n else 0,
+            "Average Win": self.win_sum / self.wins if self.wins else 0,
+            "Average Loss": self.loss_sum / losses if losses else 0,
+            "Initial Value": self.initial_value,
+            "Final Value": self.last_value,
+            "Total Positions": self.points,
+            "Number of Trades": self.trades,
+            "Date Range": f"{self.first_date} to {self.last_date}",
+        }
+        return {
+            k: None if isinstance(v, float) and not math.isfinite(v) else v
+            for k, v in metrics.items()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "points": self.points,
+            "first_date": self.first_date,
+            "last_date": self.last_date,
+            "initial_value": self.initial_value,
+            "last_value": self.last_value,
+            "trades": self.trades,
+            "wins": self.wins,
+            "win_sum": self.win_sum,
+            "loss_sum": self.loss_sum,
+            "peak": self.peak,
+            "max_drawdown": self.max_drawdown,
+            "returns": self.returns.to_dict(),
+            "downside": self.downside.to_dict(),
+            "last_prices": self.last_prices,
+        }
+
+
+def load_live_metrics(path: Path) -> OnlineMetrics:
+    """Accumulator saved at path; empty if there is none yet."""
+    try:
+        with Path(path).open("r", encoding="utf-8") as f:
+            return OnlineMetrics(json.load(f).get("state"))
+    except (OSError, ValueError):
+        return OnlineMetrics()
+
+
+def save_live_metrics(path: Path, accumulator: OnlineMetrics, periods_per_year: float) -> Dict[str, Any]:
+    """Write state and current metrics atomically; returns the metrics."""
+    path = Path(path)
+    metrics = accumulator.metrics(periods_per_year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump({
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "periods_per_year": periods_per_year,
+            "metrics": metrics,
+            "state": accumulator.to_dict(),
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return metrics
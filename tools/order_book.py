@@ -0,0 +1,157 @@
+"""
+Standing stop-loss / take-profit orders per signature.
+
+Orders live next to the ledger in
+../data/agent_data/{signature}/position/orders.json and are evaluated by the
+hourly backtest loop against each new bar, without an LLM call.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tools.general_tools import get_config_value
+
+ORDER_TYPES = ("stop", "target")
+
+
+def get_orders_file(signature: str) -> Path:
+    """Path of the standing-order file for a signature (same LOG_PATH rules as position.jsonl)."""
+    base_dir = Path(__file__).resolve().parents[1]
+    log_path = get_config_value("LOG_PATH", "./data/agent_data")
+    if os.path.isabs(log_path):
+        return Path(log_path) / signature / "position" / "orders.json"
+    if log_path.startswith("./data/"):
+        log_path = log_path[7:]  # Remove "./data/" prefix
+    return base_dir / "data" / log_path / signature / "position" / "orders.json"
+
+
+def _read_book(signature: str) -> Dict[str, Any]:
+    path = get_orders_file(signature)
+    if not path.exists():
+        return {"next_id": 1, "orders": []}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            book = json.load(f)
+    except Exception:
+        return {"next_id": 1, "orders": []}
+    book.setdefault("next_id", 1)
+    book.setdefault("orders", [])
+    return book
+
+
+def _write_book(signature: str, book: Dict[str, Any]) -> None:
+    path = get_orders_file(signature)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(book, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_orders(signature: str) -> List[Dict[str, Any]]:
+    """Return all standing orders for a signature."""
+    return _read_book(signature)["orders"]
+
+
+def add_order(
+    signature: str, order_type: str, symbol: str, trigger_price: float, amount: int, created: str
+) -> Dict[str, Any]:
+    """
+    Add a standing order
+
+    Args:
+        signature: Model signature
+        order_type: "stop" (sell when price falls to trigger) or "target" (sell when price rises to trigger)
+        symbol: Stock symbol
+        trigger_price: Trigger price
+        amount: Shares to sell when triggered; 0 means the whole position at fill time
+        created: Timestamp the order was placed at
+
+    Returns:
+        The stored order
+    """
+    if order_type not in ORDER_TYPES:
+        raise ValueError(f"order_type must be one of {ORDER_TYPES}")
+    book = _read_book(signature)
+    order = {
+        "id": book["next_id"],
+        "type": order_type,
+        "symbol": symbol,
+        "trigger_price": float(trigger_price),
+        "amount": int(amount),
+        "created": created,
+    }
+    book["next_id"] += 1
+    book["orders"].append(order)
+    _write_book(signature, book)
+    return order
+
+
+def remove_orders(signature: str, order_ids: List[int]) -> List[Dict[str, Any]]:
+    """Remove orders by id and return the removed ones."""
+    ids = set(order_ids)
+    book = _read_book(signature)
+    removed = [o for o in book["orders"] if o["id"] in ids]
+    if removed:
+        book["orders"] = [o for o in book["orders"] if o["id"] not in ids]
+        _write_book(signature, book)
+    return removed
+
+
+def evaluate_orders(
+    orders: List[Dict[str, Any]],
+    prev_low: Dict[str, Optional[float]],
+    prev_high: Dict[str, Optional[float]],
+    open_prices: Dict[str, Optional[float]],
+) -> List[Tuple[Dict[str, Any], float]]:
+    """
+    Find standing orders breached since the last decision
+
+    A stop triggers when the previous (completed) bar's low or the current open is
+    at or below its trigger; a target when the previous bar's high or the current
+    open is at or above it. Triggered orders fill at the current open, the same
+    price the trade tools use, so no future bar is looked at.
+
+    Args:
+        orders: Standing orders
+        prev_low: {symbol: low of the previous bar}
+        prev_high: {symbol: high of the previous bar}
+        open_prices: {symbol: open of the current bar}
+
+    Returns:
+        [(order, fill_price)] in order id order; orders without a current open are skipped
+    """
+    if not orders:
+        return []
+
+    def _column(prices: Dict[str, Optional[float]]) -> np.ndarray:
+        return np.array(
+            [np.nan if prices.get(o["symbol"]) is None else prices[o["symbol"]] for o in orders], dtype=float
+        )
+
+    trigger = np.array([o["trigger_price"] for o in orders], dtype=float)
+    is_stop = np.array([o["type"] == "stop" for o in orders])
+    opens = _column(open_prices)
+    # Missing previous bar → fall back to the open alone
+    lows = np.fmin(_column(prev_low), opens)
+    highs = np.fmax(_column(prev_high), opens)
+
+    with np.errstate(invalid="ignore"):
+        hit = np.where(is_stop, lows <= trigger, highs >= trigger) & ~np.isnan(opens)
+
+    return [(orders[i], float(opens[i])) for i in np.flatnonzero(hit)]
+
+
+def format_orders(orders: List[Dict[str, Any]]) -> str:
+    """One-line-per-order summary for the system prompt."""
+    if not orders:
+        return "none"
+    lines = []
+    for o in sorted(orders, key=lambda x: (x["symbol"], x["id"])):
+        size = "all shares" if not o["amount"] else f"{o['amount']} shares"
+        lines.append(f"#{o['id']} {o['type'].upper()} {o['symbol']} @ {o['trigger_price']:.2f} ({size})")
+    return "\n  ".join(lines)
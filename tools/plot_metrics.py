@@ -1,16 +1,27 @@
 #!/usr/bin/env python3
 """
 Visualize trading metrics over time for all agents in both markets.
-Creates two figures (US and A-Stock), each with 4 horizontal subplots for CR, SR, Vol, MDD.
+Creates one figure per market (US, A-Stock, Crypto), each with 4 horizontal subplots for CR, SR, Vol, MDD.
+
+Figures are rendered in a process pool and only when their inputs changed: each
+figure's portfolio_values.csv files, baseline file, date range and this script
+are hashed into <output-dir>/plot_manifest.json together with render timings.
 """
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Figures are only saved; also safe in worker processes
 import matplotlib.pyplot as plt
 import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
+import hashlib
 import json
 import argparse
+import os
+import time
 
 # Set seaborn style for beautiful plots
 sns.set_theme(style="whitegrid", palette="husl")
@@ -49,8 +60,62 @@ def load_portfolio_data(agent_dir):
     return df
 
 
-def calculate_rolling_metrics(df, is_hourly=True):
-    """Calculate rolling metrics from portfolio values."""
+# Window (in periods) of the rolling Sharpe / volatility columns
+ROLLING_WINDOW = 20
+
+
+def _cumulative_moments(values, mask):
+    """
+    Running count, mean and sample std of values[mask] up to each index
+
+    Computed from cumulative sums of the values shifted by the first selected
+    value, which keeps the sum-of-squares variance stable for small returns.
+
+    Returns:
+        (count, mean, std) arrays; std is NaN where count < 2
+    """
+    shift = values[mask][0] if mask.any() else 0.0
+    centered = np.where(mask, values - shift, 0.0)
+    count = np.cumsum(mask)
+    total = np.cumsum(centered)
+    total_sq = np.cumsum(centered * centered)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count + shift
+        var = (total_sq - total * total / count) / (count - 1)
+        std = np.sqrt(np.clip(var, 0, None))
+    std[count < 2] = np.nan
+    return count, mean, std
+
+
+def _rolling_moments(values, mask, window):
+    """Mean and sample std of the last `window` values (NaN unless all of them are selected by mask)."""
+    n = len(values)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if window < 2 or n < window:
+        return mean, std
+    shift = values[mask][0] if mask.any() else 0.0
+    centered = np.where(mask, values - shift, 0.0)
+    count = np.concatenate(([0], np.cumsum(mask)))
+    total = np.concatenate(([0.0], np.cumsum(centered)))
+    total_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    full = (count[window:] - count[:-window]) == window
+    window_sum = total[window:] - total[:-window]
+    window_sq = total_sq[window:] - total_sq[:-window]
+    mean[window - 1:] = np.where(full, window_sum / window + shift, np.nan)
+    var = np.clip((window_sq - window_sum * window_sum / window) / (window - 1), 0, None)
+    std[window - 1:] = np.where(full, np.sqrt(var), np.nan)
+    return mean, std
+
+
+def calculate_rolling_metrics(df, is_hourly=True, window=ROLLING_WINDOW):
+    """
+    Calculate rolling metrics from portfolio values.
+
+    CR, SR (expanding Sortino), Vol (expanding volatility) and MDD, plus
+    'Rolling Sharpe' and 'Rolling Vol' over the last `window` periods. All
+    columns are computed in one pass over cumulative sums.
+    """
     # Calculate returns
     df['returns'] = df['total_value'].pct_change()
 
@@ -58,70 +123,40 @@ def calculate_rolling_metrics(df, is_hourly=True):
     initial_value = df['total_value'].iloc[0]
     df['CR'] = (df['total_value'] - initial_value) / initial_value * 100
 
-    # SR: Sortino Ratio (expanding window)
     periods_per_year = 252 * 6.5 if is_hourly else 252
-    sortino_ratios = []
+    returns = df['returns'].to_numpy(dtype=float)
+    valid = ~np.isnan(returns)
+    valid[:1] = False
+    index = np.arange(len(df))
+    count, mean, std = _cumulative_moments(returns, valid)
 
+    # SR: Sortino Ratio (expanding window)
     # Use minimum periods to avoid unstable early calculations
     # For daily: 3 days is enough, for hourly: 10 hours
     min_periods = 10 if is_hourly else 3
-
-    for i in range(len(df)):
-        if i < min_periods:
-            sortino_ratios.append(np.nan)
-            continue
-
-        returns_so_far = df['returns'].iloc[1:i+1].dropna()
-
-        if len(returns_so_far) < min_periods:
-            sortino_ratios.append(np.nan)
-            continue
-
-        # Calculate downside deviation
-        negative_returns = returns_so_far[returns_so_far < 0]
-
-        if len(negative_returns) > 0:
-            downside_std = negative_returns.std()
-            # Use a minimum threshold for downside std to avoid extreme spikes
-            min_downside_std = 0.0001
-            downside_std = max(downside_std, min_downside_std)
-
-            sortino = (returns_so_far.mean() / downside_std) * np.sqrt(periods_per_year)
-            # Cap to reasonable range
-            sortino = np.clip(sortino, -20, 20)
-        else:
-            # No negative returns yet
-            mean_return = returns_so_far.mean()
-            if mean_return > 0:
-                sortino = 20  # Cap at upper limit
-            else:
-                sortino = 0
-
-        sortino_ratios.append(sortino)
-
-    df['SR'] = sortino_ratios
+    negative = valid & (returns < 0)
+    negative_count, _, downside_std = _cumulative_moments(returns, negative)
+    # Use a minimum threshold for downside std to avoid extreme spikes
+    downside_std = np.where(np.isnan(downside_std), np.nan, np.maximum(downside_std, 0.0001))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Cap to reasonable range
+        sortino = np.clip(mean / downside_std * np.sqrt(periods_per_year), -20, 20)
+    # No negative returns yet: cap at the upper limit when gaining
+    sortino = np.where(negative_count > 0, sortino, np.where(mean > 0, 20.0, 0.0))
+    df['SR'] = np.where((index < min_periods) | (count < min_periods), np.nan, sortino)
 
     # Vol: Expanding Volatility
-    volatilities = []
-    for i in range(len(df)):
-        if i < 2:
-            volatilities.append(np.nan)
-            continue
+    df['Vol'] = np.where(index < 2, np.nan, std * np.sqrt(periods_per_year) * 100)
 
-        returns_so_far = df['returns'].iloc[1:i+1].dropna()
-
-        if len(returns_so_far) < 2:
-            volatilities.append(np.nan)
-            continue
-
-        vol = returns_so_far.std() * np.sqrt(periods_per_year) * 100
-        volatilities.append(vol)
-
-    df['Vol'] = volatilities
+    # Rolling Sharpe / Vol over the last `window` returns (windows with a missing return are NaN)
+    rolling_mean, rolling_std = _rolling_moments(returns, valid, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        df['Rolling Sharpe'] = np.where(rolling_std > 0, rolling_mean / rolling_std * np.sqrt(periods_per_year), np.nan)
+    df['Rolling Vol'] = rolling_std * np.sqrt(periods_per_year) * 100
 
     # MDD: Maximum Drawdown
     cumulative = (1 + df['returns'].fillna(0)).cumprod()
-    running_max = cumulative.expanding().max()
+    running_max = cumulative.cummax()
     drawdown = (cumulative - running_max) / running_max * 100
     df['MDD'] = drawdown
 
@@ -238,20 +273,32 @@ def plot_single_metric(agent_data, baseline_data, market_name, metric_key, ylabe
     plt.close()
 
 
-def plot_separate_metrics(agent_data, baseline_data, market_name, output_dir, is_hourly=True):
-    """Create 4 separate plots for each metric."""
+def separate_metric_specs(rolling=False):
+    """(metric_key, ylabel, title) of each separate plot."""
     metrics = [
         ('CR', 'Cumulative Return (%)', 'Cumulative Return (CR)'),
         ('SR', 'Sortino Ratio', 'Sortino Ratio (SR)'),
         ('Vol', 'Volatility (%)', 'Volatility (Vol)'),
         ('MDD', 'Maximum Drawdown (%)', 'Maximum Drawdown (MDD)')
     ]
+    if rolling:
+        metrics += [
+            ('Rolling Sharpe', 'Sharpe Ratio', f'Rolling {ROLLING_WINDOW}-Period Sharpe'),
+            ('Rolling Vol', 'Volatility (%)', f'Rolling {ROLLING_WINDOW}-Period Volatility'),
+        ]
+    return metrics
 
+
+def separate_plot_file(market_name, metric_key):
+    """File name of one separate metric plot."""
     market_suffix = market_name.lower().replace(' ', '_').replace('-', '_').replace('(', '').replace(')', '')
+    return f"{market_suffix}_{metric_key.lower().replace(' ', '_')}_metrics.pdf"
+
 
-    for metric_key, ylabel, title in metrics:
-        filename = f"{market_suffix}_{metric_key.lower()}_metrics.pdf"
-        output_file = output_dir / filename
+def plot_separate_metrics(agent_data, baseline_data, market_name, output_dir, is_hourly=True, rolling=False):
+    """Create 4 separate plots for each metric (plus rolling Sharpe / Vol plots if rolling)."""
+    for metric_key, ylabel, title in separate_metric_specs(rolling):
+        output_file = output_dir / separate_plot_file(market_name, metric_key)
         plot_single_metric(agent_data, baseline_data, market_name, metric_key, ylabel, title, output_file)
 
 
@@ -306,13 +353,235 @@ def plot_market_metrics(agent_data, baseline_data, market_name, output_file, is_
     plt.close()
 
 
+# Markets plotted by main(): agent data directory, baseline file and output names
+MARKETS = [
+    {
+        'key': 'us',
+        'title': 'U.S. MARKET',
+        'name': 'U.S. Market (NASDAQ-100)',
+        'data_dir': 'data/agent_data',
+        'baseline': 'data/daily_prices_QQQ.json',
+        'combined_file': 'us_market_metrics.pdf',
+        'is_hourly': True,
+        'start_date': None,
+    },
+    {
+        'key': 'astock',
+        'title': 'A-SHARE MARKET',
+        'name': 'A-Share Market (SSE-50)',
+        'data_dir': 'data/agent_data_astock',
+        'baseline': 'data/A_stock/index_daily_sse_50.json',
+        'combined_file': 'astock_market_metrics.pdf',
+        'is_hourly': False,
+        # Override start date to Sep 30 for A-Stock
+        'start_date': '2025-09-30',
+    },
+    {
+        'key': 'crypto',
+        'title': 'CRYPTO MARKET',
+        'name': 'Crypto Market',
+        'data_dir': 'data/agent_data_crypto',
+        'baseline': 'data/crypto/CD5_crypto_index.json',
+        'combined_file': 'crypto_market_metrics.pdf',
+        # Daily trading for crypto
+        'is_hourly': False,
+        'start_date': None,
+    },
+]
+
+MANIFEST_FILE = 'plot_manifest.json'
+
+# Market data loaded in this process, keyed by market key (a worker may render several figures of one market)
+_MARKET_DATA = {}
+
+
+def market_inputs(market):
+    """Portfolio files of the plotted agents and the baseline date range of a market."""
+    data_dir = Path(market['data_dir'])
+    if not data_dir.is_dir():
+        return {}, None
+    portfolio_files = {}
+    for agent_dir in sorted(data_dir.iterdir()):
+        portfolio_file = agent_dir / 'position' / 'portfolio_values.csv'
+        if agent_dir.is_dir() and agent_dir.name in AGENT_MAPPING and portfolio_file.exists():
+            portfolio_files[agent_dir.name] = str(portfolio_file)
+    date_range = get_agent_date_range(data_dir)
+    if date_range and market['start_date']:
+        date_range = (market['start_date'], date_range[1])
+    return portfolio_files, date_range
+
+
+def load_market_data(market, portfolio_files, date_range):
+    """Agent and baseline metric frames of a market, cached per process."""
+    if market['key'] in _MARKET_DATA:
+        return _MARKET_DATA[market['key']]
+    agent_data = {}
+    for agent_name, portfolio_file in portfolio_files.items():
+        df = load_portfolio_data(Path(portfolio_file).parents[1])
+        if df is not None:
+            agent_data[agent_name] = calculate_rolling_metrics(df, is_hourly=market['is_hourly'])
+    baseline_data = None
+    if Path(market['baseline']).exists():
+        baseline_data = load_baseline_data(market['baseline'], is_hourly=market['is_hourly'], date_range=date_range)
+    _MARKET_DATA[market['key']] = (agent_data, baseline_data)
+    return agent_data, baseline_data
+
+
+def _file_digest(path, cache):
+    if path not in cache:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        cache[path] = digest.hexdigest()
+    return cache[path]
+
+
+def figure_jobs(output_dir, separate=False, rolling=False, skip=()):
+    """
+    One job per figure to render, with a content hash of everything it depends on
+
+    Returns:
+        List of {"output", "market", "metric", "portfolio_files", "date_range", "hash"};
+        metric is None for the combined 4-subplot figure
+    """
+    digests = {}
+    code_digest = _file_digest(os.path.abspath(__file__), digests)
+    jobs = []
+    for market in MARKETS:
+        if market['key'] in skip:
+            continue
+        portfolio_files, date_range = market_inputs(market)
+        if not portfolio_files:
+            continue
+        inputs = {name: _file_digest(path, digests) for name, path in portfolio_files.items()}
+        baseline = _file_digest(market['baseline'], digests) if Path(market['baseline']).exists() else None
+        if separate:
+            figures = [(separate_plot_file(market['name'], spec[0]), spec) for spec in separate_metric_specs(rolling)]
+        else:
+            figures = [(market['combined_file'], None)]
+        for output, spec in figures:
+            key = json.dumps({
+                'output': output, 'metric': spec, 'inputs': inputs, 'baseline': baseline,
+                'date_range': date_range, 'is_hourly': market['is_hourly'], 'code': code_digest,
+            }, sort_keys=True)
+            jobs.append({
+                'output': str(Path(output_dir) / output),
+                'market': market['key'],
+                'metric': spec,
+                'portfolio_files': portfolio_files,
+                'date_range': date_range,
+                'hash': hashlib.sha256(key.encode('utf-8')).hexdigest(),
+            })
+    return jobs
+
+
+def render_figure(job):
+    """Render one figure job; returns its timing record."""
+    started = time.perf_counter()
+    market = next(m for m in MARKETS if m['key'] == job['market'])
+    agent_data, baseline_data = load_market_data(market, job['portfolio_files'], job['date_range'])
+    if job['metric'] is None:
+        plot_market_metrics(agent_data, baseline_data, market['name'], job['output'], is_hourly=market['is_hourly'])
+    else:
+        metric_key, ylabel, title = job['metric']
+        plot_single_metric(agent_data, baseline_data, market['name'], metric_key, ylabel, title, job['output'])
+    return {
+        'output': job['output'],
+        'seconds': round(time.perf_counter() - started, 3),
+        'agents': len(agent_data),
+        'baseline_points': 0 if baseline_data is None else len(baseline_data),
+    }
+
+
+def load_manifest(output_dir):
+    """Previous figure records by file name; empty if there is no manifest yet."""
+    try:
+        with open(Path(output_dir) / MANIFEST_FILE, 'r') as f:
+            return json.load(f).get('figures', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def render_figures(output_dir, separate=False, rolling=False, skip=(), workers=None, force=False):
+    """
+    Render the figures whose inputs changed since the last run and update the manifest
+
+    Returns:
+        Manifest dict ({"generated_at", "total_seconds", "rendered", "unchanged", "failed", "figures"})
+    """
+    started = time.perf_counter()
+    output_dir = Path(output_dir)
+    previous = load_manifest(output_dir)
+    jobs = figure_jobs(output_dir, separate=separate, rolling=rolling, skip=skip)
+
+    figures, pending = {}, []
+    for job in jobs:
+        name = Path(job['output']).name
+        record = previous.get(name, {})
+        if not force and record.get('hash') == job['hash'] and Path(job['output']).exists():
+            figures[name] = {**record, 'status': 'unchanged'}
+            print(f"⏭️  Unchanged: {job['output']}")
+        else:
+            pending.append(job)
+
+    results = []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(job, pool.submit(render_figure, job)) for job in pending]
+            for job, future in futures:
+                try:
+                    results.append((job, future.result(), None))
+                except Exception as e:
+                    results.append((job, None, e))
+    else:
+        for job in pending:
+            try:
+                results.append((job, render_figure(job), None))
+            except Exception as e:
+                results.append((job, None, e))
+
+    rendered_at = datetime.now().isoformat(timespec='seconds')
+    for job, result, error in results:
+        name = Path(job['output']).name
+        record = {'market': job['market'], 'inputs': sorted(job['portfolio_files'].values())}
+        if error is None:
+            figures[name] = {**record, **result, 'hash': job['hash'], 'status': 'rendered', 'rendered_at': rendered_at}
+        else:
+            # No hash, so the figure is retried on the next run
+            figures[name] = {**record, 'status': 'failed', 'error': str(error)}
+            print(f"⚠️  Failed: {job['output']}: {error}")
+
+    statuses = [f['status'] for f in figures.values()]
+    manifest = {
+        'generated_at': rendered_at,
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'workers': workers,
+        'rendered': statuses.count('rendered'),
+        'unchanged': statuses.count('unchanged'),
+        'failed': statuses.count('failed'),
+        # Keep records of figures not part of this run (e.g. a skipped market), without a run status
+        'figures': {**{name: {k: v for k, v in record.items() if k != 'status'} for name, record in previous.items()},
+                    **figures},
+    }
+    tmp_path = output_dir / f'{MANIFEST_FILE}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, output_dir / MANIFEST_FILE)
+    return manifest
+
+
 def main():
     parser = argparse.ArgumentParser(description='Visualize trading metrics over time')
     parser.add_argument('--skip-us', action='store_true', help='Skip US market plots')
     parser.add_argument('--skip-astock', action='store_true', help='Skip A-Stock market plots')
     parser.add_argument('--skip-crypto', action='store_true', help='Skip Crypto market plots')
     parser.add_argument('--separate-plots', action='store_true', help='Save each metric as a separate plot instead of combined 4-subplot figure')
+    parser.add_argument('--rolling', action='store_true', help=f'With --separate-plots, also plot rolling {ROLLING_WINDOW}-period Sharpe and volatility')
     parser.add_argument('--output-dir', default='plots', help='Output directory for plots')
+    parser.add_argument('--workers', type=int, help='Rendering processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Re-render every figure even if its inputs are unchanged')
 
     args = parser.parse_args()
 
@@ -320,152 +589,17 @@ def main():
     output_dir = Path(args.output_dir)
     output_dir.mkdir(exist_ok=True)
 
-    # Process US Market
-    if not args.skip_us:
-        print("=" * 70)
-        print("PROCESSING U.S. MARKET VISUALIZATIONS")
-        print("=" * 70)
-
-        us_data_dir = Path('data/agent_data')
-        agent_data = {}
-
-        for agent_dir in sorted(us_data_dir.iterdir()):
-            if not agent_dir.is_dir():
-                continue
-
-            agent_name = agent_dir.name
-
-            if agent_name not in AGENT_MAPPING:
-                continue
-
-            print(f"📊 Loading {agent_name}...")
-            df = load_portfolio_data(agent_dir)
-
-            if df is not None:
-                df = calculate_rolling_metrics(df, is_hourly=True)
-                agent_data[agent_name] = df
-                print(f"✅ {agent_name}: {len(df)} time points")
-
-        # Load baseline
-        print("📊 Loading QQQ baseline...")
-        qqq_file = Path('data/daily_prices_QQQ.json')
-        baseline_data = None
-
-        if qqq_file.exists():
-            date_range = get_agent_date_range(us_data_dir)
-            baseline_data = load_baseline_data(qqq_file, is_hourly=True, date_range=date_range)
-            if baseline_data is not None:
-                print(f"✅ QQQ Baseline: {len(baseline_data)} time points")
-
-        # Create plot
-        if agent_data:
-            if args.separate_plots:
-                plot_separate_metrics(agent_data, baseline_data, 'U.S. Market (NASDAQ-100)',
-                                    output_dir, is_hourly=True)
-            else:
-                output_file = output_dir / 'us_market_metrics.pdf'
-                plot_market_metrics(agent_data, baseline_data, 'U.S. Market (NASDAQ-100)',
-                                  output_file, is_hourly=True)
-
-    # Process A-Stock Market
-    if not args.skip_astock:
-        print("\n" + "=" * 70)
-        print("PROCESSING A-SHARE MARKET VISUALIZATIONS")
-        print("=" * 70)
-
-        astock_data_dir = Path('data/agent_data_astock')
-        agent_data = {}
-
-        for agent_dir in sorted(astock_data_dir.iterdir()):
-            if not agent_dir.is_dir():
-                continue
-
-            agent_name = agent_dir.name
-
-            if agent_name not in AGENT_MAPPING:
-                continue
-
-            print(f"📊 Loading {agent_name}...")
-            df = load_portfolio_data(agent_dir)
-
-            if df is not None:
-                df = calculate_rolling_metrics(df, is_hourly=False)
-                agent_data[agent_name] = df
-                print(f"✅ {agent_name}: {len(df)} time points")
-
-        # Load baseline
-        print("📊 Loading SSE-50 baseline...")
-        sse_file = Path('data/A_stock/index_daily_sse_50.json')
-        baseline_data = None
-
-        if sse_file.exists():
-            date_range = get_agent_date_range(astock_data_dir)
-            # Override start date to Sep 30 for A-Stock
-            if date_range:
-                date_range = ('2025-09-30', date_range[1])
-            baseline_data = load_baseline_data(sse_file, is_hourly=False, date_range=date_range)
-            if baseline_data is not None:
-                print(f"✅ SSE-50 Baseline: {len(baseline_data)} time points")
-
-        # Create plot
-        if agent_data:
-            if args.separate_plots:
-                plot_separate_metrics(agent_data, baseline_data, 'A-Share Market (SSE-50)',
-                                    output_dir, is_hourly=False)
-            else:
-                output_file = output_dir / 'astock_market_metrics.pdf'
-                plot_market_metrics(agent_data, baseline_data, 'A-Share Market (SSE-50)',
-                                  output_file, is_hourly=False)
-
-    # Process Crypto Market
-    if not args.skip_crypto:
-        print("\n" + "=" * 70)
-        print("PROCESSING CRYPTO MARKET VISUALIZATIONS")
-        print("=" * 70)
-
-        crypto_data_dir = Path('data/agent_data_crypto')
-        agent_data = {}
-
-        for agent_dir in sorted(crypto_data_dir.iterdir()):
-            if not agent_dir.is_dir():
-                continue
-
-            agent_name = agent_dir.name
-
-            if agent_name not in AGENT_MAPPING:
-                continue
-
-            print(f"📊 Loading {agent_name}...")
-            df = load_portfolio_data(agent_dir)
-
-            if df is not None:
-                df = calculate_rolling_metrics(df, is_hourly=False)  # Daily trading for crypto
-                agent_data[agent_name] = df
-                print(f"✅ {agent_name}: {len(df)} time points")
-
-        # Load baseline (using crypto index if available)
-        print("📊 Loading Crypto baseline...")
-        crypto_index_file = Path('data/crypto/CD5_crypto_index.json')
-        baseline_data = None
-
-        if crypto_index_file.exists():
-            date_range = get_agent_date_range(crypto_data_dir)
-            baseline_data = load_baseline_data(crypto_index_file, is_hourly=False, date_range=date_range)
-            if baseline_data is not None:
-                print(f"✅ Crypto Index Baseline: {len(baseline_data)} time points")
-
-        # Create plot
-        if agent_data:
-            if args.separate_plots:
-                plot_separate_metrics(agent_data, baseline_data, 'Crypto Market',
-                                    output_dir, is_hourly=False)
-            else:
-                output_file = output_dir / 'crypto_market_metrics.pdf'
-                plot_market_metrics(agent_data, baseline_data, 'Crypto Market',
-                                  output_file, is_hourly=False)
+    skip = {key for key, flag in (('us', args.skip_us), ('astock', args.skip_astock), ('crypto', args.skip_crypto)) if flag}
+    print("=" * 70)
+    print(f"RENDERING METRIC FIGURES ({', '.join(m['title'] for m in MARKETS if m['key'] not in skip)})")
+    print("=" * 70)
+    manifest = render_figures(output_dir, separate=args.separate_plots, rolling=args.rolling,
+                              skip=skip, workers=args.workers, force=args.force)
 
     print("\n" + "=" * 70)
-    print(f"✅ All plots saved to: {output_dir}/")
+    print(f"✅ {manifest['rendered']} rendered, {manifest['unchanged']} unchanged, {manifest['failed']} failed "
+          f"in {manifest['total_seconds']:.1f}s")
+    print(f"✅ All plots saved to: {output_dir}/ (timings in {MANIFEST_FILE})")
     print("=" * 70)
 
 
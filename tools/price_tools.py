@@ -14,6 +14,7 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 from tools.general_tools import get_config_value
+from tools.market_store import MarketDataStore, get_store, parse_price
 
 try:
     from nsepython import nse_quote_ltp
@@ -100,6 +101,10 @@ def get_merged_file_path(market: str = "us") -> Path:
         return base_dir / "data" / "merged_in.jsonl"
     return base_dir / "data" / "merged.jsonl"
 
+def get_market_store(market: str = "us") -> MarketDataStore:
+    """Get the process-wide parsed merged.jsonl store for the given market."""
+    return get_store(get_merged_file_path(market))
+
 def _resolve_merged_file_path_for_date(
     today_date: Optional[str], market: str, merged_path: Optional[str] = None
 ) -> Path:
@@ -150,27 +155,7 @@ def is_trading_day(date: str, market: str = "us") -> bool:
         return False
 
     try:
-        with open(merged_file_path, "r", encoding="utf-8") as f:
-            # Read first line to check if date exists
-            for line in f:
-                try:
-                    data = json.loads(line.strip())
-                    # Check for daily time series first
-                    time_series = data.get("Time Series (Daily)", {})
-                    if date in time_series:
-                        return True
-
-                    # If no daily data, check for hourly data (e.g., "Time Series (60min)")
-                    for key, value in data.items():
-                        if key.startswith("Time Series") and isinstance(value, dict):
-                            # Check if any hourly timestamp starts with the date
-                            for timestamp in value.keys():
-                                if timestamp.startswith(date):
-                                    return True
-                except json.JSONDecodeError:
-                    continue
-            # If we get here, checked all stocks and date was not found in any
-            return False
+        return get_market_store(market).has_timestamp_prefix(date)
     except Exception as e:
         print(f"⚠️  Error checking trading day: {e}")
         return False
@@ -191,18 +176,8 @@ def get_all_trading_days(market: str = "us") -> List[str]:
         print(f"⚠️  Warning: {merged_file_path} not found")
         return []
 
-    trading_days = set()
     try:
-        with open(merged_file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    data = json.loads(line.strip())
-                    time_series = data.get("Time Series (Daily)", {})
-                    # Add all dates from this stock's time series
-                    trading_days.update(time_series.keys())
-                except json.JSONDecodeError:
-                    continue
-        return sorted(list(trading_days))
+        return sorted(get_market_store(market).daily_dates)
     except Exception as e:
         print(f"⚠️  Error reading trading days: {e}")
         return []
@@ -222,20 +197,8 @@ def get_stock_name_mapping(market: str = "us") -> Dict[str, str]:
     if not merged_file_path.exists():
         return {}
 
-    name_map = {}
     try:
-        with open(merged_file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    data = json.loads(line.strip())
-                    meta = data.get("Meta Data", {})
-                    symbol = meta.get("2. Symbol")
-                    name = meta.get("2.1. Name", "")
-                    if symbol and name:
-                        name_map[symbol] = name
-                except json.JSONDecodeError:
-                    continue
-        return name_map
+        return dict(get_market_store(market).names)
     except Exception as e:
         print(f"⚠️  Error reading stock names: {e}")
         return {}
@@ -313,46 +276,8 @@ def get_yesterday_date(today_date: str, merged_path: Optional[str] = None, marke
             yesterday_dt = input_dt - timedelta(hours=1)
             return yesterday_dt.strftime("%Y-%m-%d %H:%M:%S")
     
-    # 从 merged.jsonl 读取所有可用的交易时间
-    all_timestamps = set()
-    
-    with merged_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-                # 查找所有以 "Time Series" 开头的键
-                for key, value in doc.items():
-                    if key.startswith("Time Series"):
-                        if isinstance(value, dict):
-                            all_timestamps.update(value.keys())
-                        break
-            except Exception:
-                continue
-    
-    if not all_timestamps:
-        # 如果没有找到任何时间戳，根据输入类型回退
-        if date_only:
-            yesterday_dt = input_dt - timedelta(days=1)
-            while yesterday_dt.weekday() >= 5:
-                yesterday_dt -= timedelta(days=1)
-            return yesterday_dt.strftime("%Y-%m-%d")
-        else:
-            yesterday_dt = input_dt - timedelta(hours=1)
-            return yesterday_dt.strftime("%Y-%m-%d %H:%M:%S")
-    
-    # 将所有时间戳转换为 datetime 对象，并找到小于 today_date 的最大时间戳
-    previous_timestamp = None
-    
-    for ts_str in all_timestamps:
-        try:
-            ts_dt = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-            if ts_dt < input_dt:
-                if previous_timestamp is None or ts_dt > previous_timestamp:
-                    previous_timestamp = ts_dt
-        except Exception:
-            continue
+    # 从共享的行情缓存中二分查找小于 today_date 的最大时间戳
+    previous_timestamp = get_store(merged_file).previous_datetime(input_dt)
     
     # 如果没有找到更早的时间戳，根据输入类型回退
     if previous_timestamp is None:
@@ -379,7 +304,6 @@ def get_open_prices(
     """从 data/merged.jsonl 中读取指定日期与标的的开盘价。
     如果是 Indian 且是今天，尝试通过 nsepython 获取实时 ltp。
     """
-    wanted = set(symbols)
     results: Dict[str, Optional[float]] = {}
 
     # 尝试通过 nsepython 获取实时 ltp (仅限今日且为印度市场)
@@ -404,54 +328,15 @@ def get_open_prices(
     if not merged_file.exists():
         return results
 
-    with merged_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-            except Exception:
-                continue
-            meta = doc.get("Meta Data", {}) if isinstance(doc, dict) else {}
-            sym = meta.get("2. Symbol", "")
-            
-            # 🇮🇳 Indian Market Suffix-Agnostic Matching
-            match_found = False
-            if market == "in":
-                clean_sym = sym.split('.')[0]
-                for wanted_sym in wanted:
-                    if wanted_sym == clean_sym or wanted_sym == sym:
-                        match_found = True
-                        current_wanted_sym = wanted_sym
-                        break
-            else:
-                if sym in wanted:
-                    match_found = True
-                    current_wanted_sym = sym
-
-            if not match_found:
-                continue
-
-            # 查找所有以 "Time Series" 开头的键
-            series = None
-            for key, value in doc.items():
-                if key.startswith("Time Series"):
-                    series = value
-                    break
-            if not isinstance(series, dict):
-                continue
-            bar = series.get(today_date)
-            
-            if isinstance(bar, dict):
-                open_val = bar.get("1. buy price")
-                
-                try:
-                    if open_val is not None:
-                        results[f"{current_wanted_sym}_price"] = float(str(open_val).replace(',', ''))
-                    else:
-                        results[f"{current_wanted_sym}_price"] = None
-                except Exception:
-                    results[f"{current_wanted_sym}_price"] = None
+    # 🇮🇳 Indian Market Suffix-Agnostic Matching is handled by the shared store
+    store = get_store(merged_file)
+    for sym in symbols:
+        series = store.series(sym, market)
+        if series is None:
+            continue
+        bar = series.get(today_date)
+        if isinstance(bar, dict):
+            results[f"{sym}_price"] = parse_price(bar.get("1. buy price"))
 
     return results
 
@@ -470,7 +355,6 @@ def get_yesterday_open_and_close_price(
     Returns:
         (买入价字典, 卖出价字典) 的元组；若未找到对应日期或标的，则值为 None。
     """
-    wanted = set(symbols)
     buy_results: Dict[str, Optional[float]] = {}
     sell_results: Dict[str, Optional[float]] = {}
 
@@ -481,91 +365,21 @@ def get_yesterday_open_and_close_price(
 
     yesterday_date = get_yesterday_date(today_date, merged_path=merged_path, market=market)
 
-    with merged_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-            except Exception:
-                continue
-            meta = doc.get("Meta Data", {}) if isinstance(doc, dict) else {}
-            sym = meta.get("2. Symbol", "")
-            
-            # 🇮🇳 Indian Market Suffix-Agnostic Matching
-            match_found = False
-            if market == "in":
-                clean_sym = sym.split('.')[0]
-                for wanted_sym in wanted:
-                    if wanted_sym == clean_sym or wanted_sym == sym:
-                        match_found = True
-                        current_wanted_sym = wanted_sym
-                        break
-            else:
-                if sym in wanted:
-                    match_found = True
-                    current_wanted_sym = sym
-
-            if not match_found:
-                continue
-
-            # 查找所有以 "Time Series" 开头的键
-            series = None
-            for key, value in doc.items():
-                if key.startswith("Time Series"):
-                    series = value
-                    break
-            if not isinstance(series, dict):
-                continue
-
-            # 尝试获取昨日买入价和卖出价
-            bar = series.get(yesterday_date)
-            if isinstance(bar, dict):
-                buy_val = bar.get("1. buy price")  # 买入价字段
-                sell_val = bar.get("4. sell price")  # 卖出价字段
+    # 🇮🇳 Indian Market Suffix-Agnostic Matching is handled by the shared store
+    store = get_store(merged_file)
+    for sym in symbols:
+        series = store.series(sym, market)
+        if series is None:
+            continue
 
-                try:
-                    buy_price = float(str(buy_val).replace(',', '')) if buy_val is not None else None
-                    sell_price = float(str(sell_val).replace(',', '')) if sell_val is not None else None
-                    buy_results[f"{current_wanted_sym}_price"] = buy_price
-                    sell_results[f"{current_wanted_sym}_price"] = sell_price
-                except Exception:
-                    buy_results[f"{current_wanted_sym}_price"] = None
-                    sell_results[f"{current_wanted_sym}_price"] = None
-            else:
-                buy_results[f'{current_wanted_sym}_price'] = None
-                sell_results[f'{current_wanted_sym}_price'] = None
-                # today_dt = datetime.strptime(today_date, "%Y-%m-%d")
-                # yesterday_dt = today_dt - timedelta(days=1)
-                # current_date = yesterday_dt
-                # found_data = False
-                
-                # # 最多向前查找5个交易日
-                # for _ in range(5):
-                #     current_date -= timedelta(days=1)
-                #     # 跳过周末
-                #     while current_date.weekday() >= 5:
-                #         current_date -= timedelta(days=1)
-                    
-                #     check_date = current_date.strftime("%Y-%m-%d")
-                #     bar = series.get(check_date)
-                #     if isinstance(bar, dict):
-                #         buy_val = bar.get("1. buy price")
-                #         sell_val = bar.get("4. sell price")
-                        
-                #         try:
-                #             buy_price = float(buy_val) if buy_val is not None else None
-                #             sell_price = float(sell_val) if sell_val is not None else None
-                #             buy_results[f'{sym}_price'] = buy_price
-                #             sell_results[f'{sym}_price'] = sell_price
-                #             found_data = True
-                #             break
-                #         except Exception:
-                #             continue
-                
-                # if not found_data:
-                #     buy_results[f'{sym}_price'] = None
-                #     sell_results[f'{sym}_price'] = None
+        # 尝试获取昨日买入价和卖出价
+        bar = series.get(yesterday_date)
+        if isinstance(bar, dict):
+            buy_results[f"{sym}_price"] = parse_price(bar.get("1. buy price"))  # 买入价字段
+            sell_results[f"{sym}_price"] = parse_price(bar.get("4. sell price"))  # 卖出价字段
+        else:
+            buy_results[f"{sym}_price"] = None
+            sell_results[f"{sym}_price"] = None
 
     return buy_results, sell_results
 
@@ -0,0 +1,88 @@
+"""
+Helpers for provider-side prompt caching.
+
+System prompts are built as a static prefix (rules, instructions) followed by a
+dynamic suffix (date, positions, prices), so providers that cache prompt prefixes
+can reuse the rules block across sessions. PromptPrefixTracker flags a prefix
+that changes between an agent's sessions; collect_token_usage sums the
+cached-token counts the provider reports for a model call.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+
+class PromptPrefixTracker:
+    """
+    Check that the static prefix stays the same from one session to the next
+
+    The prompt modules render every prompt as prefix + suffix (tests/test_prompt_prefix.py
+    checks that the prefix carries no session data), so there is nothing to compare within one
+    prompt. What this guards is the prefix itself changing between an agent's sessions, which
+    resets the provider's prompt cache.
+    """
+
+    def __init__(self):
+        self._prefix_sha: Optional[str] = None
+        self.stats = {"sessions": 0, "prefix_changes": 0}
+
+    def observe(self, system_prompt: str, prefix: str) -> Dict[str, Any]:
+        """
+        Record one session's system prompt
+
+        Args:
+            system_prompt: Full rendered system prompt (prefix + suffix)
+            prefix: Static prefix the prompt was built from
+
+        Returns:
+            {"prefix_sha", "prefix_chars", "suffix_chars", "prefix_stable"} — prefix_stable is
+            False when the prefix differs from the previous session's
+        """
+        prefix_sha = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+        stable = self._prefix_sha is None or prefix_sha == self._prefix_sha
+        if not stable:
+            self.stats["prefix_changes"] += 1
+            print(f"⚠️ Static system prompt prefix changed ({self._prefix_sha} → {prefix_sha}); prompt cache reset")
+        self.stats["sessions"] += 1
+        self._prefix_sha = prefix_sha
+        return {
+            "prefix_sha": prefix_sha,
+            "prefix_chars": len(prefix),
+            "suffix_chars": len(system_prompt) - len(prefix),
+            "prefix_stable": stable,
+        }
+
+
+def collect_token_usage(response: Any) -> Optional[Dict[str, int]]:
+    """
+    Sum token usage over the model calls of one agent invocation
+
+    Reads LangChain's usage_metadata (input_token_details.cache_read / cache_creation)
+    and falls back to OpenAI-style response_metadata.token_usage.prompt_tokens_details.cached_tokens.
+
+    Returns:
+        {"model_calls", "input_tokens", "output_tokens", "cached_tokens", "cache_creation_tokens"},
+        or None if no message reported usage
+    """
+    messages = response.get("messages", []) if isinstance(response, dict) else []
+    usage = {"model_calls": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "cache_creation_tokens": 0}
+    for msg in messages:
+        metadata = getattr(msg, "usage_metadata", None)
+        token_usage = (getattr(msg, "response_metadata", None) or {}).get("token_usage") or {}
+        if not metadata and not token_usage:
+            continue
+        usage["model_calls"] += 1
+        if metadata:
+            details = metadata.get("input_token_details") or {}
+            usage["input_tokens"] += metadata.get("input_tokens") or 0
+            usage["output_tokens"] += metadata.get("output_tokens") or 0
+            usage["cached_tokens"] += details.get("cache_read") or 0
+            usage["cache_creation_tokens"] += details.get("cache_creation") or 0
+        else:
+            details = token_usage.get("prompt_tokens_details") or {}
+            usage["input_tokens"] += token_usage.get("prompt_tokens") or 0
+            usage["output_tokens"] += token_usage.get("completion_tokens") or 0
+            usage["cached_tokens"] += details.get("cached_tokens") or 0
+    if not usage["model_calls"]:
+        return None
+    return usage
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Deterministic replay of an agent's action log under modified trade rules.
+
+The buy/sell intents an agent recorded are re-executed in-process against the
+trade tools' rules (agent_tools/tool_trade.py: whole shares, CN lots and T+1,
+the Indian minimum trade value and per-stock cap, cash and holdings checks) and
+fee schedule (tools/fee_schedule.py), without the LLM. Each rule variant yields
+a new position.jsonl and its metrics, so "what if STT were 0.05%", "what if the
+cap were 25% of cash" or "what if the minimum trade were ₹5,000" are answered in
+seconds from one recorded run.
+
+Intents come from:
+- position.jsonl: every executed buy/sell, at its executed price (reconstructed
+  from the record's cash change, see tools/trade_analytics.py)
+- the session logs (<signature>/log/<date>/log.jsonl): buy/sell orders that
+  single-shot sessions logged as rejected, priced at the session's open from the
+  price data. Tool-loop sessions do not log the arguments of failed tool calls,
+  so their rejected attempts cannot be replayed.
+
+Intents run in ledger order; logged rejections run after the trades of their
+session. The ledger's non-trade records are kept, so the replayed NAV has the
+original timeline; a recorded trade the variant rejects becomes a no_trade record.
+
+Variants are replayed in a fork-based process pool sharing the loaded ledger
+and prices. The "baseline" variant (the rules the run traded under) is always
+included and should reproduce the recorded ledger.
+
+Usage:
+    python tools/replay.py data/agent_data/nse-sniper-hourly-v1/position/position.jsonl \\
+        --merged-file data/merged_in.jsonl --is-hourly \\
+        --variant low-stt:stt_rate=0.0005 --variant tight-cap:position_cap_fraction=0.25,position_cap_floor=0
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+# Project root on the path, so tools.* imports work when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from tools.calculate_metrics import (_serializable, _time_series, calculate_metrics, calculate_portfolio_values,
+                                     detect_market_type, get_periods_per_year, ledger_symbols, load_all_price_files,
+                                     load_position_data, load_price_store, save_agent_outputs)
+from tools.fee_schedule import (DEFAULT_SCHEDULE, MIN_TRADE_VALUE_INR, POSITION_CAP_FLOOR_INR, POSITION_CAP_FRACTION,
+                                nse_fees)
+from tools.market_store import parse_price
+from tools.trade_analytics import TRADE_ACTIONS, analyze_trades, detect_fee_market, load_actions, price_trades
+
+# The rules the trade tools apply; a variant overrides any of these keys
+DEFAULT_RULES = {
+    **DEFAULT_SCHEDULE,
+    "min_trade_value": MIN_TRADE_VALUE_INR,
+    "position_cap_fraction": POSITION_CAP_FRACTION,
+    "position_cap_floor": POSITION_CAP_FLOOR_INR,
+    "cn_lot_size": 100,
+    # None: per symbol, as the trade tools do (.SH/.SZ → cn, otherwise the ledger's market)
+    "market": None,
+}
+
+NO_TRADE = {"action": "no_trade", "symbol": "", "amount": 0}
+
+SUMMARY_COLUMNS = ['CR', 'Sharpe Ratio', 'SR', 'Vol', 'MDD', 'Final Value', 'Total Fees', 'Fee Drag',
+                   'Gross CR', 'Turnover', 'Executed', 'Rejected', 'CR vs Baseline']
+
+
+def parse_variant(spec):
+    """'name:key=value,key=value' → (name, rule overrides)"""
+    name, _, assignments = spec.partition(':')
+    overrides = {}
+    for assignment in filter(None, assignments.split(',')):
+        key, sep, value = assignment.partition('=')
+        key = key.strip()
+        if not sep or key not in DEFAULT_RULES:
+            raise ValueError(f"bad rule '{assignment}' in variant '{name}' (rules: {', '.join(DEFAULT_RULES)})")
+        value = value.strip()
+        if key == 'market':
+            overrides[key] = None if value.lower() in ('', 'none', 'auto') else value
+        elif key == 'cn_lot_size':
+            overrides[key] = int(value)
+        else:
+            overrides[key] = float(value)
+    return name.strip(), overrides
+
+
+def load_variants(specs=(), variants_file=None):
+    """
+    Rule sets to replay: baseline first, then the --variant specs and a JSON file
+    ({name: {rule: value}} or [{"name", "rules"}])
+
+    Returns:
+        {name: complete rules dict}
+    """
+    overrides = []
+    if variants_file:
+        with open(variants_file, 'r') as f:
+            data = json.load(f)
+        items = data.items() if isinstance(data, dict) else ((v['name'], v.get('rules', {})) for v in data)
+        for name, rules in items:
+            unknown = set(rules) - set(DEFAULT_RULES)
+            if unknown:
+                raise ValueError(f"unknown rules {sorted(unknown)} in variant '{name}'")
+            overrides.append((name, rules))
+    overrides.extend(parse_variant(spec) for spec in specs)
+
+    variants = {'baseline': dict(DEFAULT_RULES)}
+    for name, rules in overrides:
+        variants[name] = {**DEFAULT_RULES, **rules}
+    return variants
+
+
+def _open_price(price_data, symbol, date):
+    """Open ("1. buy price") of a symbol's bar at a timestamp, as the trade tools execute at."""
+    series = _time_series(price_data.get(symbol))
+    if series is None:
+        return None
+    bar = series[1].get(date) or series[1].get(date.split(' ')[0])
+    if not isinstance(bar, dict):
+        return None
+    return parse_price(bar.get('1. buy price', bar.get('1. open')))
+
+
+def logged_rejections(agent_dir):
+    """(session date, order) of every buy/sell order a single-shot session logged as rejected."""
+    for log_file in sorted(Path(agent_dir).glob('log/*/log.jsonl')):
+        session = log_file.parent.name
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '"single_shot"' not in line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                for message in entry.get('new_messages', []):
+                    if message.get('role') != 'single_shot' or not isinstance(message.get('content'), dict):
+                        continue
+                    for rejection in message['content'].get('rejected', []):
+                        order = rejection.get('order')
+                        if isinstance(order, dict) and order.get('action') in TRADE_ACTIONS:
+                            yield session, order
+
+
+def build_events(positions, market, agent_dir=None, price_data=None):
+    """
+    Replay input of one ledger: its records in order, each buy/sell carrying its executed
+    price, with the logged single-shot rejections (priced at the session open) merged in
+    after the records of their session
+
+    Returns:
+        List of {"date", "this_action", "source", and for intents "action", "symbol", "amount", "price"}
+    """
+    trades = price_trades(load_actions(positions), market)
+    prices = dict(zip(trades['record'], trades['price']))
+    events = []
+    for index, record in enumerate(positions):
+        action = record.get('this_action')
+        event = {'date': record['date'], 'this_action': action, 'source': 'ledger'}
+        if index in prices:
+            event.update(action=action['action'], symbol=action['symbol'], amount=action['amount'],
+                         price=float(prices[index]))
+        events.append(event)
+
+    if agent_dir is None:
+        return events
+    logged = []
+    for session, order in logged_rejections(agent_dir):
+        symbol = order.get('symbol')
+        logged.append({
+            'date': session, 'this_action': None, 'source': 'log', 'action': order['action'],
+            'symbol': symbol, 'amount': order.get('amount'),
+            'price': _open_price(price_data or {}, symbol, session) if isinstance(symbol, str) else None,
+        })
+    # Stable sort: ledger order within a date is kept, and logged orders follow the ledger's records
+    return sorted(events + logged, key=lambda e: (e['date'], e['source'] == 'log'))
+
+
+def _execute(state, intent, rules, market, bought):
+    """Apply one buy/sell to state under the rules; None on success, else the rejection reason."""
+    symbol, price = intent['symbol'], intent['price']
+    try:
+        amount = int(intent['amount'])
+    except (TypeError, ValueError):
+        return "amount must be an integer"
+    if amount <= 0:
+        return "amount must be positive"
+    if market == 'cn' and amount % rules['cn_lot_size'] != 0:
+        return f"not a multiple of {rules['cn_lot_size']} shares"
+    if price is None or price <= 0:
+        return f"no price for {symbol} at {intent['date']}"
+
+    turnover = price * amount
+    if market == 'in' and turnover < rules['min_trade_value']:
+        return f"turnover {turnover:.2f} below minimum {rules['min_trade_value']:.2f}"
+    fees = nse_fees(turnover, intent['action'] == 'buy', rules)['total'] if market == 'in' else 0
+    cash = state.get('CASH', 0)
+    day = intent['date'].split(' ')[0]
+
+    if intent['action'] == 'buy':
+        if market == 'in':
+            cap = max(rules['position_cap_floor'], cash * rules['position_cap_fraction'])
+            if state.get(symbol, 0) * price + turnover > cap:
+                return f"position cap {cap:.0f} breached"
+        if cash - (turnover + fees) < 0:
+            return f"needs {turnover + fees:.2f} cash, {cash:.2f} available"
+        state['CASH'] = cash - (turnover + fees)
+        state[symbol] = state.get(symbol, 0) + amount
+        bought[(day, symbol)] = bought.get((day, symbol), 0) + amount
+        return None
+
+    if symbol not in state:
+        return f"no position in {symbol}"
+    if state[symbol] < amount:
+        return f"only {state[symbol]} shares held"
+    if market == 'cn' and amount > state[symbol] - bought.get((day, symbol), 0):
+        return "T+1: shares bought today cannot be sold"
+    state[symbol] -= amount
+    state['CASH'] = cash + (turnover - fees)
+    return None
+
+
+def replay(events, initial, rules, ledger_market):
+    """
+    Re-execute the intents of events from the initial positions
+
+    Args:
+        events: From build_events
+        initial: Positions before the first event
+        rules: Complete rules dict (see DEFAULT_RULES)
+        ledger_market: Market of the ledger's symbols ('in', 'us'), used when rules['market'] is None
+
+    Returns:
+        (ledger records in position.jsonl format, [{"date", "action", "symbol", "amount", "source", "reason"}])
+    """
+    state = dict(initial)
+    bought = {}
+    ledger, rejections = [], []
+    for event in events:
+        this_action = event['this_action']
+        if event.get('action') in TRADE_ACTIONS:
+            symbol = event['symbol']
+            market = rules['market'] or ('cn' if str(symbol).endswith(('.SH', '.SZ')) else ledger_market)
+            reason = _execute(state, event, rules, market, bought)
+            if reason is None:
+                this_action = {'action': event['action'], 'symbol': symbol, 'amount': int(event['amount'])}
+            else:
+                rejection = {key: event[key] for key in ('date', 'action', 'symbol', 'amount', 'source')}
+                rejections.append({**rejection, 'reason': reason})
+                if event['source'] == 'log':
+                    continue
+                this_action = dict(NO_TRADE)
+        record = {'date': event['date'], 'id': len(ledger)}
+        if this_action is not None:
+            record['this_action'] = this_action
+        record['positions'] = dict(state)
+        ledger.append(record)
+    return ledger, rejections
+
+
+# Ledger, events and prices shared with the variant workers; set in the parent before the pool forks
+_SHARED = {}
+
+
+def _replay_variant(task):
+    """Worker: replay one variant, write its ledger, metrics and rejections, return its summary row."""
+    name, rules = task
+    started = time.perf_counter()
+    ledger, rejections = replay(_SHARED['events'], _SHARED['initial'], rules, _SHARED['market'])
+    position_file = Path(_SHARED['output_dir']) / name / 'position' / 'position.jsonl'
+    position_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(position_file, 'w') as f:
+        for record in ledger:
+            f.write(json.dumps(record) + '\n')
+    with open(position_file.parent / 'replay_rejections.json', 'w') as f:
+        json.dump({'rules': rules, 'rejections': rejections}, f, indent=2)
+
+    portfolio_df = calculate_portfolio_values(ledger, _SHARED['price_data'], _SHARED['is_crypto'], verbose=False)
+    metrics = calculate_metrics(portfolio_df, _SHARED['periods_per_year'])
+    metrics.update(analyze_trades(ledger, market=_SHARED['market'], portfolio_df=portfolio_df, schedule=rules)[0])
+    executed = sum(1 for r in ledger if (r.get('this_action') or {}).get('action') in TRADE_ACTIONS)
+    metrics.update({'Executed': executed, 'Rejected': len(rejections)})
+    save_agent_outputs(position_file, metrics, portfolio_df)
+    return {'variant': name, **_serializable(metrics), 'elapsed_s': round(time.perf_counter() - started, 3)}
+
+
+def replay_variants(position_file, variants, output_dir, data_dir='data', merged_file=None, is_hourly=False,
+                    include_logs=True, workers=None):
+    """
+    Replay one agent's action log under every rule variant
+
+    The ledger, logged intents and prices are loaded once here; variants run in a
+    fork-based process pool that shares them copy-on-write.
+
+    Returns:
+        Summary rows, in variant order
+    """
+    positions = load_position_data(position_file)
+    if not positions:
+        raise ValueError(f"no records in {position_file}")
+    agent_dir = Path(position_file).parent.parent
+    is_crypto = detect_market_type(positions) == 'crypto'
+    market = detect_fee_market(ledger_symbols(positions))
+
+    # Prices of every symbol the ledger or the logged orders touch
+    logged = list(logged_rejections(agent_dir)) if include_logs else []
+    symbols = ledger_symbols(positions) | {o['symbol'] for _, o in logged if isinstance(o.get('symbol'), str)}
+    if merged_file:
+        price_data = load_price_store(merged_file, symbols)
+    else:
+        price_data = load_all_price_files(data_dir, is_crypto, 'astock' in str(position_file).lower(), symbols=symbols)
+
+    events = build_events(positions, market, agent_dir if include_logs else None, price_data)
+    # Replay starts from the first record's positions (that record has no cash change, so no intent)
+    _SHARED.update(events=events, initial=positions[0]['positions'], market=market, price_data=price_data,
+                   is_crypto=is_crypto, periods_per_year=get_periods_per_year(is_hourly, is_crypto),
+                   output_dir=str(output_dir))
+
+    tasks = list(variants.items())
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            rows = list(pool.map(_replay_variant, tasks))
+    else:
+        rows = [_replay_variant(task) for task in tasks]
+
+    baseline_cr = rows[0].get('CR')
+    for row in rows:
+        row['CR vs Baseline'] = row['CR'] - baseline_cr if baseline_cr is not None else None
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay an action log under modified trade rules and fee schedules')
+    parser.add_argument('position_file', help='Path to position.jsonl file')
+    parser.add_argument('--variant', action='append', default=[], metavar='NAME:RULE=VALUE,...',
+                        help=f"Rule variant (repeatable); rules: {', '.join(DEFAULT_RULES)}")
+    parser.add_argument('--variants-file', help='JSON file of variants: {name: {rule: value}}')
+    parser.add_argument('--output-dir', help='Where to write <variant>/position/ (default: <agent>/replay)')
+    parser.add_argument('--data-dir', default='data', help='Directory containing price data')
+    parser.add_argument('--merged-file', help='Read prices from a merged.jsonl price store instead of --data-dir')
+    parser.add_argument('--ledger-only', action='store_true', help='Ignore the rejected orders in the session logs')
+    parser.add_argument('--is-hourly', action='store_true', help='Use hourly trading periods (affects annualization)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    try:
+        variants = load_variants(args.variant, args.variants_file)
+    except ValueError as e:
+        parser.error(str(e))
+    output_dir = Path(args.output_dir or Path(args.position_file).parent.parent / 'replay')
+
+    started = time.perf_counter()
+    rows = replay_variants(args.position_file, variants, output_dir, args.data_dir, args.merged_file,
+                           args.is_hourly, not args.ledger_only, args.workers)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary = pd.DataFrame(rows).set_index('variant')
+    summary = summary.reindex(columns=SUMMARY_COLUMNS + ['elapsed_s'])
+    summary.to_csv(output_dir / 'replay_summary.csv')
+    pd.set_option('display.width', 200)
+    print(summary.to_string(float_format=lambda v: f'{v:.4f}'))
+    print(f"\n{len(rows)} variants in {time.perf_counter() - started:.2f}s; "
+          f"ledgers under {output_dir}, summary in {output_dir / 'replay_summary.csv'}")
+
+
+if __name__ == '__main__':
+    main()
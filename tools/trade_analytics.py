@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Trade-level analytics from the action log (position.jsonl).
+
+Each buy/sell record's execution price and fees are reconstructed from its cash
+change and the fee schedule the trade tools charge (tools/fee_schedule.py for
+the Indian market; fee-free elsewhere). From these come turnover, gross vs. net
+P&L, fees per category (STT, stamp duty, exchange/SEBI charges, GST, DP) and
+FIFO-matched round trips with holding periods and per-trade returns. Everything
+after reading the log is computed on NumPy arrays; FIFO matching uses the
+cumulative share counts of each symbol's buys and sells instead of a lot queue.
+
+calculate_metrics.py adds the summary to performance_metrics.json.
+
+Usage:
+    python tools/trade_analytics.py data/agent_data/nse-sniper-hourly-v1/position/position.jsonl --market in
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Project root on the path, so tools.* imports work when run as a script
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from tools.fee_schedule import DP_CHARGE_INR, FEE_CATEGORIES, fee_rates, nse_fees
+
+TRADE_ACTIONS = ("buy", "sell")
+
+
+def _action_rows(records):
+    """(date, action, symbol, amount, cash before, cash after, record index) of each buy/sell record."""
+    previous_cash = None
+    for index, record in enumerate(records):
+        cash = record.get("positions", {}).get("CASH", 0.0)
+        action = record.get("this_action") or {}
+        if action.get("action") in TRADE_ACTIONS and previous_cash is not None and action.get("amount"):
+            yield record["date"], action["action"], action.get("symbol", ""), action["amount"], previous_cash, cash, index
+        previous_cash = cash
+
+
+def _stream_records(position_file):
+    with open(position_file, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_actions(positions=None, position_file=None):
+    """
+    Buy/sell actions of a ledger, from loaded records or streamed from position.jsonl
+
+    Returns:
+        DataFrame with columns date, action, symbol, amount, cash_before, cash_after,
+        record (position of the record in the ledger)
+    """
+    records = positions if positions is not None else _stream_records(position_file)
+    columns = ["date", "action", "symbol", "amount", "cash_before", "cash_after", "record"]
+    return pd.DataFrame(list(_action_rows(records)), columns=columns)
+
+
+def detect_fee_market(symbols):
+    """'in' when the traded symbols are NSE ones (the trade tools then charge NSE fees), else 'us'."""
+    from tools.price_tools import all_nifty_50_symbols
+
+    return "in" if set(symbols) & set(all_nifty_50_symbols) else "us"
+
+
+def price_trades(actions, market="us", schedule=None):
+    """
+    Add turnover, price and per-category fees to each action, reconstructed from its cash change
+
+    Indian market: a buy pays turnover × (1 + BUY_FEE_RATE), a sell receives
+    turnover × (1 - SELL_FEE_RATE) - DP charge. Other markets trade without fees.
+    schedule overrides fee_schedule.DEFAULT_SCHEDULE keys, for ledgers written by
+    tools/replay.py under another fee schedule.
+    """
+    trades = actions.copy()
+    is_buy = (trades["action"] == "buy").to_numpy()
+    cash_flow = (trades["cash_after"] - trades["cash_before"]).to_numpy(dtype=float)
+    if market == "in":
+        buy_rate, sell_rate = fee_rates(schedule)
+        dp_charge = (schedule or {}).get("dp_charge", DP_CHARGE_INR)
+        turnover = np.where(is_buy, -cash_flow / (1 + buy_rate), (cash_flow + dp_charge) / (1 - sell_rate))
+        fees = nse_fees(turnover, is_buy, schedule)
+    else:
+        turnover = np.abs(cash_flow)
+        fees = {category: np.zeros(len(trades)) for category in (*FEE_CATEGORIES, "total")}
+    trades["turnover"] = turnover
+    trades["price"] = turnover / trades["amount"].to_numpy(dtype=float)
+    for category, values in fees.items():
+        trades[f"fee_{category}"] = values
+    trades["cash_flow"] = cash_flow
+    return trades
+
+
+def match_round_trips(trades):
+    """
+    FIFO-match each symbol's sells against its earlier buys
+
+    A symbol's buys cover the share intervals [cumulative shares before, after) and so do
+    its sells; FIFO pairs are the overlaps of the two partitions, found with searchsorted
+    on the merged breakpoints. Sells beyond the shares bought are left unmatched.
+
+    Returns:
+        DataFrame of matched lots: symbol, buy_index, sell_index, shares (indices into trades)
+    """
+    lots = []
+    for symbol, group in trades.groupby("symbol", sort=False):
+        buys = group[group["action"] == "buy"]
+        sells = group[group["action"] == "sell"]
+        if buys.empty or sells.empty:
+            continue
+        buy_edges = np.concatenate(([0.0], np.cumsum(buys["amount"].to_numpy(dtype=float))))
+        sell_edges = np.concatenate(([0.0], np.cumsum(sells["amount"].to_numpy(dtype=float))))
+        matched = min(buy_edges[-1], sell_edges[-1])
+        points = np.union1d(buy_edges, sell_edges)
+        points = points[points <= matched]
+        if len(points) < 2:
+            continue
+        starts, shares = points[:-1], np.diff(points)
+        buy_pos = np.searchsorted(buy_edges, starts, side="right") - 1
+        sell_pos = np.searchsorted(sell_edges, starts, side="right") - 1
+        lots.append(pd.DataFrame({
+            "symbol": symbol,
+            "buy_index": buys.index.to_numpy()[buy_pos],
+            "sell_index": sells.index.to_numpy()[sell_pos],
+            "shares": shares,
+        }))
+    if not lots:
+        return pd.DataFrame(columns=["symbol", "buy_index", "sell_index", "shares"])
+    return pd.concat(lots, ignore_index=True)
+
+
+def round_trip_returns(trades, lots):
+    """
+    Per closing trade (sell): matched shares, gross and net P&L and return, share-weighted holding days
+
+    Gross uses execution prices; net uses the cash actually paid (price + buy fees) and
+    received (price - sell fees) per share.
+    """
+    if lots.empty:
+        return pd.DataFrame(columns=["date", "symbol", "shares", "gross_pnl", "net_pnl",
+                                     "gross_return", "net_return", "holding_days"])
+    amount = trades["amount"].to_numpy(dtype=float)
+    price = trades["price"].to_numpy(dtype=float)
+    cash_per_share = np.abs(trades["cash_flow"].to_numpy(dtype=float)) / amount
+    dates = pd.to_datetime(trades["date"]).to_numpy()
+
+    b, s, q = lots["buy_index"].to_numpy(), lots["sell_index"].to_numpy(), lots["shares"].to_numpy(dtype=float)
+    frame = pd.DataFrame({
+        "sell_index": s,
+        "shares": q,
+        "gross_cost": q * price[b],
+        "gross_proceeds": q * price[s],
+        "net_cost": q * cash_per_share[b],
+        "net_proceeds": q * cash_per_share[s],
+        "share_days": q * (dates[s] - dates[b]) / np.timedelta64(1, "D"),
+    })
+    per_sell = frame.groupby("sell_index").sum()
+    result = pd.DataFrame({
+        "date": trades["date"].to_numpy()[per_sell.index],
+        "symbol": trades["symbol"].to_numpy()[per_sell.index],
+        "shares": per_sell["shares"].to_numpy(),
+        "gross_pnl": (per_sell["gross_proceeds"] - per_sell["gross_cost"]).to_numpy(),
+        "net_pnl": (per_sell["net_proceeds"] - per_sell["net_cost"]).to_numpy(),
+        "holding_days": (per_sell["share_days"] / per_sell["shares"]).to_numpy(),
+    })
+    result["gross_return"] = result["gross_pnl"] / per_sell["gross_cost"].to_numpy()
+    result["net_return"] = result["net_pnl"] / per_sell["net_cost"].to_numpy()
+    return result
+
+
+def trade_summary(trades, round_trips, portfolio_df=None):
+    """
+    Summary for performance_metrics.json
+
+    With portfolio values, total P&L is split into gross (before fees) and net, and
+    turnover is traded value / 2 relative to the average portfolio value.
+    """
+    is_buy = trades["action"] == "buy"
+    total_fees = float(trades["fee_total"].sum())
+    summary = {
+        "Buy Trades": int(is_buy.sum()),
+        "Sell Trades": int((~is_buy).sum()),
+        "Traded Value": float(trades["turnover"].sum()),
+        "Total Fees": total_fees,
+    }
+    for category in FEE_CATEGORIES:
+        summary[f"Fees {category.upper()}"] = float(trades[f"fee_{category}"].sum())
+
+    if portfolio_df is not None and len(portfolio_df):
+        values = portfolio_df["total_value"].to_numpy(dtype=float)
+        initial, final = values[0], values[-1]
+        summary["Turnover"] = summary["Traded Value"] / 2 / float(np.mean(values)) if np.mean(values) else 0.0
+        summary["Net P&L"] = float(final - initial)
+        summary["Gross P&L"] = float(final - initial + total_fees)
+        summary["Gross CR"] = summary["Gross P&L"] / initial if initial else 0.0
+        summary["Fee Drag"] = total_fees / initial if initial else 0.0
+
+    closed = len(round_trips)
+    summary["Closed Trades"] = closed
+    if closed:
+        summary["Realized Gross P&L"] = float(round_trips["gross_pnl"].sum())
+        summary["Realized Net P&L"] = float(round_trips["net_pnl"].sum())
+        summary["Trade Win Rate"] = float((round_trips["net_pnl"] > 0).mean())
+        summary["Avg Trade Gross Return"] = float(round_trips["gross_return"].mean())
+        summary["Avg Trade Net Return"] = float(round_trips["net_return"].mean())
+        summary["Avg Holding Days"] = float(np.average(round_trips["holding_days"], weights=round_trips["shares"]))
+        summary["Median Holding Days"] = float(round_trips["holding_days"].median())
+    return summary
+
+
+def analyze_trades(positions=None, position_file=None, market=None, portfolio_df=None, schedule=None):
+    """
+    Trade analytics of one ledger (schedule: fee overrides, see price_trades)
+
+    Returns:
+        (summary dict, priced trades DataFrame, round trips DataFrame)
+    """
+    actions = load_actions(positions, position_file)
+    market = market or detect_fee_market(actions["symbol"])
+    trades = price_trades(actions, market, schedule)
+    round_trips = round_trip_returns(trades, match_round_trips(trades))
+    return trade_summary(trades, round_trips, portfolio_df), trades, round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Turnover, fees and round-trip analytics of a position.jsonl')
+    parser.add_argument('position_file', help='Path to position.jsonl file')
+    parser.add_argument('--market', choices=['in', 'us', 'cn'], help='Fee schedule (default: detected from the symbols)')
+    parser.add_argument('--trades-csv', help='Also write the round trips to this CSV')
+    args = parser.parse_args()
+
+    summary, trades, round_trips = analyze_trades(position_file=args.position_file, market=args.market)
+    for key, value in summary.items():
+        print(f"{key:<24} {value:,.4f}" if isinstance(value, float) else f"{key:<24} {value}")
+    if args.trades_csv:
+        round_trips.to_csv(args.trades_csv, index=False)
+        print(f"\nRound trips saved to {args.trades_csv}")
+
+
+if __name__ == '__main__':
+    main()